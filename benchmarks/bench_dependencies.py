@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Dependency benchmark: incremental cycle checks and dependency-aware scheduling
+
+Builds a random DAG over the backlog. Edges follow a hidden order close to
+creation order (like `add --after`), with local swaps so that about 5% of
+the edges go against the stored order and force a repair. Then
+reverses existing edges (each would close a cycle and must be refused),
+and finally times a full scheduling plan that reads every edge.
+
+Usage:
+    python benchmarks/bench_dependencies.py                # 20k tasks, 100k edges
+    python benchmarks/bench_dependencies.py 5000 20000     # custom sizes
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.core.database import TaskManager
+from planit.core.dependencies import DependencyCycle, add_dependency
+from planit.core.planner import PlanningEngine
+
+
+def random_edges(tasks, edges, rng):
+    """
+    Arcs (tâche, prérequis) distincts, dans l'ordre d'insertion : le prérequis
+    vient avant dans un ordre caché = ids légèrement mélangés, et est proche
+    """
+    hidden = sorted(range(1, tasks + 1), key=lambda task_id: task_id + rng.uniform(0, 20))
+    seen = set()
+    while len(seen) < edges:
+        later = rng.randrange(1, tasks)
+        earlier = max(0, later - int(rng.expovariate(1 / 50)) - 1)
+        seen.add((hidden[later], hidden[earlier]))
+    # Arcs ajoutés à mesure que les tâches sont créées
+    return sorted(seen, key=lambda edge: max(edge))
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    edges = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+        manager = TaskManager(os.path.join(tmp, "bench.db"))
+        sys.stdout = stdout
+        engine = PlanningEngine(manager)
+
+        with manager.transaction() as cursor:
+            cursor.executemany(
+                "INSERT INTO tasks (title, duration) VALUES (?, ?)",
+                ((f"task {i}", 1 + i % 3) for i in range(tasks)),
+            )
+
+        samples, dag = [], random_edges(tasks, edges, rng)
+        start = time.perf_counter()
+        with manager.transaction() as cursor:
+            for task_id, depends_on in dag:
+                edge_start = time.perf_counter()
+                add_dependency(cursor, task_id, depends_on)
+                samples.append((time.perf_counter() - edge_start) * 1e6)
+        total = time.perf_counter() - start
+        samples.sort()
+        print(f"Insert {edges:,} edges over {tasks:,} tasks: {total:.2f}s "
+              f"(median {statistics.median(samples):.0f} µs, p99 {samples[int(len(samples) * 0.99)]:.0f} µs per edge)")
+
+        # Arcs inverses : chacun fermerait un cycle et doit être refusé
+        refused, cycle_samples = 0, []
+        with manager.transaction() as cursor:
+            for task_id, depends_on in rng.sample(dag, 200):
+                edge_start = time.perf_counter()
+                try:
+                    add_dependency(cursor, depends_on, task_id)
+                except DependencyCycle:
+                    refused += 1
+                cycle_samples.append((time.perf_counter() - edge_start) * 1e6)
+        print(f"Reverse edges refused as cycles: {refused}/200 "
+              f"(median {statistics.median(cycle_samples):.0f} µs per check)")
+
+        start = time.perf_counter()
+        snapshot = manager.snapshot()
+        load = time.perf_counter() - start
+        plan = engine.plan("first-fit", snapshot)
+        print(f"Snapshot load with edges: {load * 1000:.0f} ms")
+        print(f"Dependency-aware plan: {plan.elapsed_ms:.0f} ms "
+              f"({len(plan.placements)} placed, {len(plan.unplaced)} unplaced, {len(plan.blocked)} blocked)")
+
+        # Vérification : chaque tâche placée commence après la fin de ses prérequis placés
+        ends = {p.task.id: (p.day, p.end_hour) for p in plan.placements}
+        starts = {p.task.id: (p.day, p.start_hour) for p in plan.placements}
+        violations = sum(
+            1 for task_id, prerequisites in snapshot.prerequisites.items() if task_id in starts
+            for prerequisite in prerequisites if prerequisite in ends and ends[prerequisite] > starts[task_id]
+        )
+        print(f"Order violations: {violations}")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
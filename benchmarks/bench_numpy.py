@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+NumPy backend benchmark: (day, hour) arrays vs the pure-Python planner path
+
+Fills the planning horizon with recurring, weekly and dated tasks, adds a
+backlog, then times both backends on the same snapshot:
+week grids over the horizon, hours per task, and full plans for every
+strategy. Results must be identical.
+
+Needs NumPy (pip install "planit-taskmanager[numpy]").
+
+Usage:
+    python benchmarks/bench_numpy.py                   # 2k scheduled, 1k backlog, 26 weeks
+    python benchmarks/bench_numpy.py 20000 5000 52     # custom sizes and horizon
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.core.database import TaskManager
+from planit.core.models import DAY_NAMES, DAYS_SHORT, WeekGrid, format_scheduled_time
+from planit.core.plan import STRATEGIES
+from planit.core.planner import PlanningEngine
+from planit.core.slotarray import HAS_NUMPY, SlotArray
+
+
+def timed(fn, repeat=3):
+    """Meilleur temps (ms) sur `repeat` exécutions, et le dernier résultat"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    if not HAS_NUMPY:
+        print('NumPy is not installed: pip install "planit-taskmanager[numpy]"')
+        sys.exit(1)
+    scheduled = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    backlog = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    weeks = int(sys.argv[3]) if len(sys.argv) > 3 else 26
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+        manager = TaskManager(os.path.join(tmp, "bench.db"))
+        sys.stdout = stdout
+        engine = PlanningEngine(manager)
+        engine.SCHEDULE_HORIZON_WEEKS = weeks
+        first_monday = engine.get_week_dates(0)[0]
+
+        # Tâches courtes dans les heures ouvrées (9h-18h par défaut) : le backlog remplit les trous
+        rows = []
+        for i in range(scheduled):
+            start = rng.randrange(9, 17)
+            end = start + 1
+            kind = i % 20
+            if kind == 0:
+                days = ",".join(rng.sample(DAYS_SHORT, rng.randint(1, 3)))
+                rows.append((f"ritual {i}", 1, 0, None, 1, days, f"{start}-{end}"))
+            elif kind == 1:
+                rows.append((f"weekly {i}", 1, 0, f"{DAY_NAMES[rng.randrange(7)]} {start}h-{end}h", 0, None, None))
+            else:
+                day = first_monday + timedelta(days=rng.randrange(7 * weeks))
+                rows.append((f"task {i}", 1, i % 9 == 0, format_scheduled_time(day, start, end), 0, None, None))
+        rows += [(f"backlog {i}", rng.randint(1, 4), 0, None, 0, None, None) for i in range(backlog)]
+        with manager.transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO tasks (title, duration, completed, scheduled_time, recurring, recurring_days, recurring_hours)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        snapshot = manager.snapshot()
+        print(f"Tasks: {scheduled:,} scheduled + {backlog:,} backlog, horizon {weeks} weeks")
+        print(f"{'step':26} {'python':>10} {'numpy':>10}  same")
+
+        def python_grids():
+            return [engine.build_week_grid(week, snapshot) for week in range(weeks)]
+
+        def numpy_grids():
+            slots = SlotArray(snapshot.tasks, first_monday, weeks)
+            return [WeekGrid(week, engine.get_week_dates(week), slots.week_cells(week)) for week in range(weeks)]
+
+        python_ms, python_result = timed(python_grids)
+        numpy_ms, numpy_result = timed(numpy_grids)
+        print(f"{'week grids (horizon)':26} {python_ms:8.1f}ms {numpy_ms:8.1f}ms  {python_result == numpy_result}")
+
+        def python_hours():
+            totals = {}
+            for grid in python_grids():
+                for title, hours in grid.hours_by_title().items():
+                    totals[title] = totals.get(title, 0) + hours
+            return totals
+
+        def numpy_hours():
+            hours = SlotArray(snapshot.tasks, first_monday, weeks).hours_per_task()
+            totals = {}
+            for rank in hours.nonzero()[0]:
+                title = snapshot.tasks[rank].title
+                totals[title] = totals.get(title, 0) + int(hours[rank])
+            return totals
+
+        python_ms, python_totals = timed(python_hours)
+        numpy_ms, numpy_totals = timed(numpy_hours)
+        print(f"{'hours per task':26} {python_ms:8.1f}ms {numpy_ms:8.1f}ms  {python_totals == numpy_totals}")
+
+        for strategy in STRATEGIES:
+            engine.set_backend("python")
+            python_ms, python_plan = timed(lambda: engine.plan(strategy, snapshot))
+            engine.set_backend("numpy")
+            numpy_ms, numpy_plan = timed(lambda: engine.plan(strategy, snapshot))
+            same = (
+                [(p.task.id, p.day, p.start_hour) for p in python_plan.placements]
+                == [(p.task.id, p.day, p.start_hour) for p in numpy_plan.placements]
+                and python_plan.booked_hours == numpy_plan.booked_hours
+            )
+            print(f"{'plan ' + strategy:26} {python_ms:8.1f}ms {numpy_ms:8.1f}ms  {same}"
+                  f"  ({len(numpy_plan.placements):,} placed)")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
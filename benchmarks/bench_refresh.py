@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Refresh benchmark: read model after a write from another session
+
+Fills a database, then lets a second connection (another CLI, a script)
+update a few tasks. Times what the TUI pays on its next tick: the idle
+poll (PRAGMA data_version only), the snapshot patched from change_log,
+and a full reload of every table.
+
+Usage:
+    python benchmarks/bench_refresh.py               # 100k tasks, 5 changed
+    python benchmarks/bench_refresh.py 500000 50     # custom sizes
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.core.database import TaskManager
+from planit.core.readmodel import ReadModel
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    changed = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+        manager = TaskManager(db_path)
+        sys.stdout = stdout
+        with manager.transaction() as cursor:
+            cursor.executemany(
+                "INSERT INTO tasks (title, duration, scheduled_time) VALUES (?, ?, ?)",
+                [(f"task {i}", 1 + i % 4, "Monday 9h-10h" if i % 2 else None) for i in range(tasks)],
+            )
+        manager.snapshot()
+
+        rounds = 1000
+        start = time.perf_counter()
+        for _ in range(rounds):
+            manager.read_model.data_version()
+        idle_ms = (time.perf_counter() - start) / rounds * 1000
+
+        # Écriture d'une autre session : visible par data_version et change_log
+        other = sqlite3.connect(db_path, isolation_level=None)
+        step = max(tasks // changed, 1)
+        other.execute("BEGIN IMMEDIATE")
+        for task_id in range(1, tasks + 1, step):
+            other.execute("UPDATE tasks SET completed = 1, version = version + 1 WHERE id = ?", (task_id,))
+        other.execute("COMMIT")
+        other.close()
+
+        start = time.perf_counter()
+        patched = manager.snapshot()
+        patch_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        full = ReadModel(manager.conn, threading.RLock()).snapshot()
+        full_ms = (time.perf_counter() - start) * 1000
+
+        same = [(t.id, t.completed, t.version) for t in patched.tasks] == [(t.id, t.completed, t.version) for t in full.tasks]
+        print(f"{tasks:,} tasks, {changed} changed by another connection")
+        print(f"idle poll      {idle_ms:8.3f} ms")
+        print(f"patched        {patch_ms:8.1f} ms")
+        print(f"full reload    {full_ms:8.1f} ms")
+        print(f"Same snapshot: {same}")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
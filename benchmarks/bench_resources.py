@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Pooled scheduling benchmark: heap of per-resource indexes vs scanning every resource
+
+Creates R resources with staggered weekly hours and a shared backlog, then
+places it twice on the same snapshot: with ResourcePool (what
+`schedule --pool` uses) and with a linear scan that asks every resource's
+interval index for its next free slot. Placements must be identical.
+
+It then chains the backlog (each task after the previous one, in chains of
+CHAIN tasks) and plans it again with the pool. A prerequisite pushes the
+search start past every resource's heap bound, so the pool falls back to
+querying each resource: the index queries per placement show it.
+
+Usage:
+    python benchmarks/bench_resources.py                 # 50 resources, 2k backlog
+    python benchmarks/bench_resources.py 500 20000 8     # resources, backlog, weeks
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.core import planner
+from planit.core.database import TaskManager
+from planit.core.dependencies import add_dependency
+from planit.core.intervals import to_slot
+from planit.core.planner import PlanningEngine
+from planit.core.resources import ResourcePool
+
+CHAIN = 5  # tâches par chaîne de prérequis (second passage)
+
+
+class CountingPool(ResourcePool):
+    """ResourcePool qui compte les recherches dans les index d'intervalles"""
+
+    queries = 0
+
+    def __init__(self, calendars, start):
+        def counted(next_free):
+            def query(earliest, duration):
+                CountingPool.queries += 1
+                return next_free(earliest, duration)
+            return query
+        super().__init__({resource_id: counted(next_free) for resource_id, next_free in calendars.items()}, start)
+
+
+def pooled_plan(engine, snapshot):
+    """(plan, ms, recherches d'index par tâche placée) avec le pot commun"""
+    CountingPool.queries = 0
+    start = time.perf_counter()
+    plan = engine.plan("first-fit", snapshot, pool=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    return plan, elapsed, CountingPool.queries / max(len(plan.placements), 1)
+
+
+def scan_plan(engine, snapshot):
+    """Référence : pour chaque tâche, next_free sur toutes les ressources, puis le minimum"""
+    search_start, first_monday = engine._horizon()
+    horizon_end = first_monday + timedelta(weeks=engine.SCHEDULE_HORIZON_WEEKS)
+    finders = {
+        resource.id: engine._free_slot_finder(snapshot, resource.id, search_start, first_monday, horizon_end)
+        for resource in snapshot.resources
+    }
+    first_slot = to_slot(search_start, 0)
+    placements = []
+    # Même raccourci que le planificateur : une durée qui a échoué échouera encore
+    min_failed = None
+    for task in engine._backlog(snapshot):
+        if min_failed is not None and task.duration >= min_failed:
+            continue
+        best = None
+        for resource_id, (next_free, _take, _booked, _available) in finders.items():
+            slot = next_free(first_slot, task.duration)
+            if slot is not None and (best is None or slot < best[0]):
+                best = (slot, resource_id)
+        if best is None:
+            min_failed = task.duration if min_failed is None else min(min_failed, task.duration)
+            continue
+        slot, resource_id = best
+        finders[resource_id][1](slot, slot + task.duration, task)
+        placements.append((task.id, slot, resource_id))
+    return placements
+
+
+def main():
+    resources = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    backlog = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    weeks = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+        manager = TaskManager(os.path.join(tmp, "bench.db"))
+        sys.stdout = stdout
+        engine = PlanningEngine(manager)
+        engine.SCHEDULE_HORIZON_WEEKS = weeks
+
+        with manager.transaction() as cursor:
+            cursor.executemany("INSERT INTO resources (name) VALUES (?)", [(f"member {i}",) for i in range(resources)])
+            # Horaires décalés : chaque ressource a ses propres fenêtres
+            cursor.executemany(
+                "INSERT INTO availability (day_of_week, start_hour, end_hour, resource_id) VALUES (?, ?, ?, ?)",
+                [
+                    (day, start, start + rng.randint(2, 6), resource_id)
+                    for resource_id in range(1, resources + 1)
+                    for day in range(5)
+                    for start in [rng.randrange(7, 12)]
+                ],
+            )
+            cursor.executemany(
+                "INSERT INTO tasks (title, duration) VALUES (?, ?)",
+                [(f"backlog {i}", rng.randint(1, 3)) for i in range(backlog)],
+            )
+        snapshot = manager.snapshot()
+        print(f"{resources} resources, {backlog:,} backlog tasks, horizon {weeks} weeks")
+
+        planner.ResourcePool = CountingPool
+        plan, pooled_ms, queries = pooled_plan(engine, snapshot)
+
+        start = time.perf_counter()
+        reference = scan_plan(engine, snapshot)
+        scan_ms = (time.perf_counter() - start) * 1000
+
+        pooled = [(p.task.id, to_slot(p.day, p.start_hour), p.resource_id) for p in plan.placements]
+        print(f"heap pool  {pooled_ms:9.1f} ms  ({len(pooled):,} placed, {queries:.1f} index queries per task)")
+        print(f"full scan  {scan_ms:9.1f} ms  ({len(reference):,} placed, {resources} index queries per task)")
+        print(f"Same placements: {pooled == reference}")
+
+        with manager.transaction() as cursor:
+            for task_id in range(1, backlog + 1):
+                if (task_id - 1) % CHAIN:
+                    add_dependency(cursor, task_id, task_id - 1)
+        plan, chained_ms, queries = pooled_plan(engine, manager.snapshot())
+        print(f"\nWith prerequisites (chains of {CHAIN}): linear scan inside the pool")
+        print(f"heap pool  {chained_ms:9.1f} ms  ({len(plan.placements):,} placed, {queries:.1f} index queries per task)")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: raw tuples vs dicts vs slotted Task records
+
+Usage:
+    python benchmarks/bench_rows.py            # 1M tasks
+    python benchmarks/bench_rows.py 200000     # custom size
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.core.models import Task
+
+COLUMNS = ("id", "title", "duration", "completed", "scheduled_time", "recurring", "recurring_days", "recurring_hours")
+
+
+def make_rows(count):
+    """Génère des lignes comme les renverrait fetchall() (titres partagés entre variantes)"""
+    titles = [f"Task {i % 1000}" for i in range(1000)]
+    rows = []
+    for i in range(count):
+        if i % 3 == 0:
+            rows.append((i, titles[i % 1000], 1, 0, None, 1, "mon,wed,fri", "9-10"))
+        elif i % 3 == 1:
+            rows.append((i, titles[i % 1000], 2, 0, "Tuesday 10h-12h", 0, None, None))
+        else:
+            rows.append((i, titles[i % 1000], 3, 1, None, 0, None, None))
+    return rows
+
+
+def measure(label, build, count):
+    """Mesure la mémoire retenue et le temps de construction d'une variante"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_row = current / count
+    print(f"{label:14} {current / 1024 / 1024:9.1f} MiB  {per_row:7.1f} B/row  {elapsed:6.2f}s")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    # dict et Task sont construits à partir de tuples déjà alloués :
+    # la mesure ne compte que leur propre coût, comme après un fetchall()
+    print(f"Rows: {count:,}")
+    print(f"{'variant':14} {'memory':>13}  {'per row':>11}  {'build':>7}")
+
+    measure("tuple", lambda: make_rows(count), count)
+    rows = make_rows(count)
+    measure("dict", lambda: [dict(zip(COLUMNS, row)) for row in rows], count)
+    measure("Task (slots)", lambda: [Task(*row) for row in rows], count)
+
+
+if __name__ == "__main__":
+    main()
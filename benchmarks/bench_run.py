@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Script benchmark: one process per command vs `planit run`
+
+Generates a weekly setup script (projects, tasks, schedule) and executes it
+three ways in fresh databases: one `main.py` invocation per line, one
+`main.py run` process, and `main.py run --atomic` (single transaction).
+
+Usage:
+    python benchmarks/bench_run.py         # 200 commands
+    python benchmarks/bench_run.py 1000    # custom size
+"""
+
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MAIN = str(ROOT / "main.py")
+
+
+def make_script(commands: int) -> list:
+    """
+    Lignes du script : un projet toutes les 20 commandes, des tâches dont
+    une sur deux déjà terminée (le reste tient dans l'horizon), puis schedule
+    """
+    lines = []
+    project = tasks = 0
+    while len(lines) < commands - 1:
+        if len(lines) % 20 == 0:
+            project += 1
+            lines.append(f'project "Project {project}" --start 01/01 --end 12/31')
+        elif tasks % 2 == 0 or lines[-1].startswith("done"):
+            tasks += 1
+            lines.append(f'add "Task {tasks}" -d {1 + tasks % 2} --project {project}')
+        else:
+            lines.append(f"done {tasks}")
+    lines.append("schedule")
+    return lines
+
+
+def timed(run, tmp):
+    os.chdir(tmp)
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def main():
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lines = make_script(commands)
+    quiet = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL, "check": True}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "setup.planit")
+        with open(script, "w") as out:
+            out.write("\n".join(lines) + "\n")
+
+        runs = {
+            "one process each": lambda: [subprocess.run([sys.executable, MAIN, *shlex.split(line)], **quiet) for line in lines],
+            "run": lambda: subprocess.run([sys.executable, MAIN, "run", script], **quiet),
+            "run --atomic": lambda: subprocess.run([sys.executable, MAIN, "run", script, "--atomic"], **quiet),
+        }
+        print(f"{len(lines)} commands")
+        for label, run in runs.items():
+            workdir = os.path.join(tmp, label.replace(" ", "_"))
+            os.makedirs(workdir)
+            elapsed = timed(run, workdir)
+            print(f"{label:18} {elapsed:7.2f} s  ({elapsed / len(lines) * 1000:6.1f} ms/command)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Search benchmark: FTS5 index vs LIKE scan over task titles
+
+Usage:
+    python benchmarks/bench_search.py            # 1M tasks
+    python benchmarks/bench_search.py 200000     # custom size
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.core.database import TaskManager
+
+WORDS = ["rapport", "réunion", "client", "facture", "design", "revue", "code", "sport",
+         "courses", "lecture", "budget", "planning", "relance", "devis", "backup", "audit"]
+
+
+def make_titles(count):
+    """Titres de 3 mots ; chaque 10 000e tâche contient un mot rare"""
+    for i in range(count):
+        title = f"{WORDS[i % 16]} {WORDS[(i // 16) % 16]} {WORDS[(i // 256) % 16]} {i}"
+        if i % 10_000 == 0:
+            title += " zephyr"
+        yield (title, 1 + i % 4)
+
+
+def timed(run, repeat=50):
+    """Médiane en millisecondes"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TaskManager(os.path.join(tmp, "bench.db"))
+
+        start = time.perf_counter()
+        with manager.transaction() as cursor:
+            cursor.executemany("INSERT INTO tasks (title, duration) VALUES (?, ?)", make_titles(count))
+        print(f"Rows: {count:,}  (insert + index via triggers: {time.perf_counter() - start:.1f}s)")
+
+        print(f"{'query':22} {'results':>8} {'FTS5':>10} {'LIKE (unranked)':>16}")
+        for query in ["zephyr", "devis audit", "rap", "budget"]:
+            results = manager.search(query)
+            like = " AND ".join("title LIKE ?" for _ in query.split())
+            params = [f"%{word}%" for word in query.split()]
+            fts_ms = timed(lambda: manager.search(query))
+            like_ms = timed(lambda: manager.conn.execute(
+                f"SELECT id, title FROM tasks WHERE {like} LIMIT 20", params).fetchall(), repeat=3)
+            print(f"{query:22} {len(results):8} {fts_ms:8.3f}ms {like_ms:14.1f}ms")
+
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
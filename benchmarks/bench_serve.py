@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+HTTP API benchmark: uncached vs cached vs conditional (304) requests
+
+Fills a database, starts `planit serve` in a thread on a free port and
+polls /week and /stats like a dashboard would: every request rebuilt
+(cache cleared each time), served from the response cache, and
+conditional GETs answered 304 from the ETag.
+
+Usage:
+    python benchmarks/bench_serve.py               # 20k tasks, 200 requests per mode
+    python benchmarks/bench_serve.py 100000 500    # custom sizes
+"""
+
+import http.client
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.api import PlanItAPI, PlanItServer
+from planit.core.database import TaskManager
+
+PATHS = ("/week", "/stats?weeks=4")
+
+
+def run(conn, api, requests, clear=False, conditional=False):
+    """Requêtes par seconde, et statuts rencontrés"""
+    etags = {}
+    statuses = set()
+    start = time.perf_counter()
+    for i in range(requests):
+        path = PATHS[i % len(PATHS)]
+        if clear:
+            api._cache.clear()
+        headers = {"If-None-Match": etags[path]} if conditional and path in etags else {}
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        etags[path] = response.getheader("ETag")
+        statuses.add(response.status)
+    return requests / (time.perf_counter() - start), statuses
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+        manager = TaskManager(os.path.join(tmp, "bench.db"))
+        sys.stdout = stdout
+        with manager.transaction() as cursor:
+            cursor.executemany(
+                "INSERT INTO tasks (title, duration, scheduled_time) VALUES (?, ?, ?)",
+                [(f"task {i}", 1 + i % 4, f"{('Monday', 'Wednesday', 'Friday')[i % 3]} {9 + i % 8}h-{10 + i % 8}h") for i in range(tasks)],
+            )
+
+        api = PlanItAPI(manager)
+        server = PlanItServer(("127.0.0.1", 0), api)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        conn = http.client.HTTPConnection(*server.server_address[:2])
+
+        print(f"{tasks:,} tasks, {requests} requests per mode on {' '.join(PATHS)}")
+        for label, options in (
+            ("uncached", {"clear": True}),
+            ("cached 200", {}),
+            ("conditional", {"conditional": True}),
+        ):
+            rate, statuses = run(conn, api, requests, **options)
+            print(f"{label:12} {rate:9.0f} req/s  (status {', '.join(map(str, sorted(statuses)))})")
+
+        conn.close()
+        server.shutdown()
+        server.server_close()
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Snapshot benchmark: dashboard-style loads from SQLite vs the columnar file
+
+Builds one plan (dated, weekly and recurring tasks, a few projects), writes
+it with `planit snapshot`, then loads it over and over the way a status
+dashboard would: task count, booked hours over the resolved schedule and
+the title of the next slot. Reported as plans loaded per second.
+
+Usage:
+    python benchmarks/bench_snapshot.py                # 500 tasks, 2000 loads
+    python benchmarks/bench_snapshot.py 20000 200      # custom sizes
+"""
+
+import bisect
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.core.columnar import ColumnarSnapshot
+from planit.core.database import TaskManager
+from planit.core.models import DAY_NAMES, task_row_factory
+from planit.core.planner import PlanningEngine
+
+
+def load_sqlite(db_path, engine):
+    """Chemin d'origine : ouvrir la base, matérialiser les tâches, résoudre les créneaux"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = task_row_factory
+    tasks = conn.execute('''
+        SELECT id, title, duration, completed, scheduled_time, recurring, recurring_days, recurring_hours, version, project_id
+        FROM tasks ORDER BY id
+    ''').fetchall()
+    conn.close()
+    booked, first = 0, None
+    week_dates = engine.get_week_dates(0)
+    for task in tasks:
+        if task.completed:
+            continue
+        for day in task.days_in_week(week_dates):
+            booked += task.end_hour - task.start_hour
+            if first is None or (day, task.start_hour) < first[0]:
+                first = ((day, task.start_hour), task.title)
+    return len(tasks), booked, first[1] if first else None
+
+
+def load_columnar(path):
+    """Même résultat depuis le snapshot : colonnes projetées, aucune ligne matérialisée"""
+    with ColumnarSnapshot(path) as snapshot:
+        day = snapshot.column("schedule.day")
+        week_end = snapshot.first_monday.toordinal() + 7
+        # Créneaux triés par date : ceux de la semaine sont en tête
+        count = bisect.bisect_left(day, week_end)
+        booked = sum(snapshot.column("schedule.end_hour")[:count]) - sum(snapshot.column("schedule.start_hour")[:count])
+        title = snapshot.text("tasks.title", snapshot.column("schedule.task")[0]) if count else None
+        return snapshot.task_count, booked, title
+
+
+def timed(label, load, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = load()
+    elapsed = time.perf_counter() - start
+    print(f"{label:10} {rounds / elapsed:9,.0f} plans/s  ({elapsed / rounds * 1000:.2f} ms per load)")
+    return result
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        snap_path = os.path.join(tmp, "bench.snap")
+        sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+        manager = TaskManager(db_path)
+        sys.stdout = stdout
+        engine = PlanningEngine(manager)
+        week_dates = engine.get_week_dates(0)
+
+        rows = []
+        for i in range(tasks):
+            hour = 8 + i % 10
+            if i % 10 == 0:
+                rows.append((f"ritual {i}", 1, 0, None, 1, "mon,wed,fri", f"{hour}-{hour + 1}"))
+            elif i % 3 == 0:
+                rows.append((f"weekly {i}", 1, 0, f"{DAY_NAMES[i % 7]} {hour}h-{hour + 1}h", 0, None, None))
+            else:
+                day = week_dates[i % 7] if i % 2 else week_dates[i % 7].replace(day=1)
+                rows.append((f"task {i}", 2, i % 5 == 0, f"{DAY_NAMES[day.weekday()]} {day.strftime('%d/%m')} {hour}h-{hour + 2}h", 0, None, None))
+        with manager.transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO tasks (title, duration, completed, scheduled_time, recurring, recurring_days, recurring_hours)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            cursor.executemany(
+                "INSERT INTO projects (name, start_date, end_date, description) VALUES (?, ?, ?, ?)",
+                [(f"project {i}", "01/10", "12/20", "") for i in range(20)],
+            )
+
+        start = time.perf_counter()
+        _tasks, _projects, slots, size = manager.export_snapshot(snap_path, weeks=4)
+        print(f"Snapshot of {tasks:,} tasks: {slots:,} slots, {size / 1024:.0f} KiB, "
+              f"written in {(time.perf_counter() - start) * 1000:.0f} ms")
+        manager.close()
+
+        reference = timed("sqlite", lambda: load_sqlite(db_path, engine), rounds)
+        result = timed("columnar", lambda: load_columnar(snap_path), rounds)
+        print(f"Same result: {reference == result}  (tasks, booked hours this week, first slot)")
+
+
+if __name__ == "__main__":
+    main()
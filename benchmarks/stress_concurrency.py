@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Multi-process stress test: several PlanIt sessions writing to one database
+
+Each process opens its own TaskManager on the same file and runs for a
+fixed duration:
+- "increment" workers do optimistic read-modify-write cycles on one shared
+  task (read duration + version, update_task(..., expected_version));
+- "add" workers insert tasks;
+- "schedule" workers run auto_schedule (BEGIN IMMEDIATE read-modify-write).
+
+At the end the shared counter must equal the number of successful
+increments (no lost update), no two scheduled tasks may share an hour,
+and no worker may have seen "database is locked".
+
+Usage:
+    python benchmarks/stress_concurrency.py              # 6 processes, 5 s
+    python benchmarks/stress_concurrency.py 8 10         # 8 processes, 10 s
+"""
+
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.core.database import TaskManager
+from planit.core.planner import PlanningEngine
+
+BUCKET = 0.5  # secondes par mesure de débit
+# Pause entre deux opérations d'un même processus (une session réelle ne
+# boucle pas sans pause : sans elle, le processus qui vient de commiter
+# reprend le verrou avant ceux qui attendent dans le busy handler)
+# `schedule` replanifie tout le backlog : lancé comme depuis la TUI, pas en boucle
+THINK_TIME = {"increment": 0.002, "add": 0.002, "schedule": 0.1}
+ROLES = ["increment", "add", "increment", "schedule", "add", "increment", "add", "increment"]
+
+
+def worker(db_path, role, duration, counter_id, results):
+    """Boucle d'un processus ; renvoie (rôle, horodatages des opérations, conflits, erreurs)"""
+    sys.stdout = open(os.devnull, "w")
+    manager = TaskManager(db_path)
+    engine = PlanningEngine(manager)
+    stamps, conflicts, errors = [], 0, []
+    deadline = time.perf_counter() + duration
+    n = 0
+
+    while time.perf_counter() < deadline:
+        try:
+            if role == "increment":
+                while True:
+                    value, version = manager.conn.execute(
+                        "SELECT duration, version FROM tasks WHERE id = ?", (counter_id,)
+                    ).fetchone()
+                    if manager.update_task(counter_id, version, duration=value + 1):
+                        break
+                    conflicts += 1
+            elif role == "add":
+                manager.add_task(f"{role} {os.getpid()} {n}", 1 + n % 3)
+            else:
+                engine.auto_schedule()
+            stamps.append(time.perf_counter())
+            n += 1
+        except Exception as e:
+            errors.append(str(e))
+        time.sleep(random.uniform(0, 2 * THINK_TIME[role]))
+
+    manager.close()
+    results.put((role, stamps, conflicts, errors))
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "stress.db")
+        sys.stdout, stdout = open(os.devnull, "w"), sys.stdout
+        setup = TaskManager(db_path)
+        setup.add_task("shared counter", 0, recurring=True, recurring_days="sun", recurring_hours="0-0")
+        sys.stdout = stdout
+        counter_id = setup.conn.execute("SELECT MAX(id) FROM tasks").fetchone()[0]
+        setup.close()
+
+        results = multiprocessing.Queue()
+        roles = [ROLES[i % len(ROLES)] for i in range(processes)]
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=worker, args=(db_path, role, duration, counter_id, results))
+            for role in roles
+        ]
+        for process in workers:
+            process.start()
+        outcomes = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+
+        check = TaskManager(db_path)
+        counter = check.conn.execute("SELECT duration FROM tasks WHERE id = ?", (counter_id,)).fetchone()[0]
+        tasks = check.get_tasks()
+        check.close()
+
+    increments = sum(len(stamps) for role, stamps, _, _ in outcomes if role == "increment")
+    adds = sum(len(stamps) for role, stamps, _, _ in outcomes if role == "add")
+    schedules = sum(len(stamps) for role, stamps, _, _ in outcomes if role == "schedule")
+    conflicts = sum(conflict for _, _, conflict, _ in outcomes)
+    errors = [error for _, _, _, worker_errors in outcomes for error in worker_errors]
+
+    # Aucune heure occupée deux fois par des tâches planifiées automatiquement
+    hours = Counter()
+    for task in tasks:
+        if not task.recurring and task.scheduled_date and task.start_hour is not None:
+            for hour in range(task.start_hour, task.end_hour):
+                hours[(task.scheduled_date, hour)] += 1
+    overlaps = sum(1 for count in hours.values() if count > 1)
+
+    # Débit par rôle, par tranche de BUCKET secondes (hors dernière tranche incomplète)
+    rates = {}
+    for role in dict.fromkeys(roles):
+        buckets = Counter(
+            int((stamp - start) / BUCKET)
+            for worker_role, stamps, _, _ in outcomes if worker_role == role
+            for stamp in stamps
+        )
+        rates[role] = [buckets[i] / BUCKET for i in range(int(duration / BUCKET))]
+
+    print(f"Processes: {processes} ({', '.join(f'{count} {role}' for role, count in Counter(roles).items())}), {duration:.0f}s")
+    print(f"Operations: {increments} increments, {adds} adds, {schedules} schedule runs")
+    print(f"Optimistic retries: {conflicts}")
+    print(f"Lost updates: {increments - counter} (counter {counter}, expected {increments})")
+    print(f"Overlapping scheduled hours: {overlaps}")
+    print(f"Errors: {len(errors)}" + (f" (first: {errors[0]})" if errors else ""))
+    for role, role_rates in rates.items():
+        if not role_rates:
+            continue
+        mean = statistics.mean(role_rates)
+        spread = statistics.pstdev(role_rates) / mean if mean else 0.0
+        print(f"Throughput {role:9}: {mean:6.0f} ops/s (min {min(role_rates):.0f}, max {max(role_rates):.0f}, cv {spread:.0%})")
+
+    ok = counter == increments and overlaps == 0 and not errors
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
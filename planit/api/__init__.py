@@ -0,0 +1,7 @@
+"""
+Local HTTP/JSON API for PlanIt
+"""
+
+from .server import PlanItAPI, PlanItServer
+
+__all__ = ["PlanItAPI", "PlanItServer"]
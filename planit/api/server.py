@@ -0,0 +1,223 @@
+"""
+Local HTTP/JSON API for PlanIt dashboards
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from rich.console import Console
+
+from planit.core.models import DAY_NAMES
+from planit.core.planner import ANY_RESOURCE, PlanningEngine
+from planit.core.rendercache import change_count
+from planit.core.stats import NO_PROGRESS
+
+console = Console()
+
+
+class BadRequest(ValueError):
+    """Paramètre de requête invalide (réponse 400)"""
+
+
+def _int_param(params: Dict[str, str], name: str, default: int) -> int:
+    try:
+        return int(params.get(name, default))
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an integer")
+
+
+def _tasks(api: "PlanItAPI", params: Dict[str, str]):
+    return [
+        {
+            "id": task.id, "title": task.title, "duration": task.duration, "completed": task.completed,
+            "scheduled_time": task.scheduled_time, "recurring": task.recurring,
+            "recurring_days": task.recurring_days, "recurring_hours": task.recurring_hours,
+            "project_id": task.project_id, "resource_id": task.resource_id, "pinned": task.pinned, "version": task.version,
+        }
+        for task in api.task_manager.get_tasks()
+    ]
+
+
+def _week(api: "PlanItAPI", params: Dict[str, str]):
+    offset = _int_param(params, "offset", 0)
+    resource_id = ANY_RESOURCE
+    if "resource" in params:
+        resource = api.task_manager.find_resource(params["resource"])
+        if resource is None:
+            raise BadRequest(f"unknown resource '{params['resource']}'")
+        resource_id = resource.id
+    # Ressource explicite : l'état d'affichage du moteur partagé n'est pas touché
+    grid = api.engine.week_grid(offset, resource_id)
+    free_time = api.task_manager.snapshot().free_time_of(None if resource_id is ANY_RESOURCE else resource_id)
+    days = []
+    for day, day_date in enumerate(grid.week_dates):
+        windows = free_time.windows(day_date)
+        hours = sorted(hour for (cell_day, hour) in grid.cells if cell_day == day)
+        days.append({
+            "date": day_date.isoformat(), "day": DAY_NAMES[day],
+            "slots": [{"hour": hour, "title": grid.cells[(day, hour)]} for hour in hours],
+            "available_hours": windows.total_hours,
+            "free_hours": windows.total_hours - sum(1 for hour in hours if windows.covering(hour) is not None),
+        })
+    return {
+        "offset": offset, "resource": api.engine.resource_label(resource_id),
+        "days": days, "hours_by_title": grid.hours_by_title(),
+    }
+
+
+def _timeline(api: "PlanItAPI", params: Dict[str, str]):
+    progress = api.task_manager.project_progress()
+    projects = []
+    for project in api.task_manager.get_projects():
+        project_progress = progress.get(project.id, NO_PROGRESS)
+        projects.append({
+            "id": project.id, "name": project.name, "description": project.description,
+            "start_date": project.start_date, "end_date": project.end_date,
+            "tasks": project_progress.task_count, "done_tasks": project_progress.done_count,
+            "planned_hours": project_progress.planned_hours, "done_hours": project_progress.done_hours,
+            "completion_rate": round(project_progress.completion_rate, 4),
+        })
+    return projects
+
+
+def _stats(api: "PlanItAPI", params: Dict[str, str]):
+    weeks = _int_param(params, "weeks", 1)
+    if not 1 <= weeks <= 52:
+        raise BadRequest("'weeks' must be between 1 and 52")
+    summary = api.task_manager.task_summary()
+    load = []
+    for offset in range(weeks):
+        for day, booked, available in api.engine.week_load(api.engine.get_week_dates(offset)):
+            load.append({"date": day.isoformat(), "booked_hours": booked, "available_hours": available})
+    return {
+        "tasks": summary.task_count, "done": summary.done_count,
+        "total_hours": summary.total_hours, "done_hours": summary.done_hours,
+        "backlog_tasks": summary.backlog_count, "backlog_hours": summary.backlog_hours,
+        "completion_rate": round(summary.completion_rate, 4), "load": load,
+    }
+
+
+def _resources(api: "PlanItAPI", params: Dict[str, str]):
+    return [{"id": resource.id, "name": resource.name} for resource in api.task_manager.get_resources()]
+
+
+# Chemin -> (construction de la réponse, paramètres de requête acceptés)
+ROUTES: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {
+    "/tasks": (_tasks, ()),
+    "/week": (_week, ("offset", "resource")),
+    "/timeline": (_timeline, ()),
+    "/stats": (_stats, ("weeks",)),
+    "/resources": (_resources, ()),
+}
+
+
+class PlanItAPI:
+    """
+    Réponses JSON de l'API, mises en cache avec leur ETag
+
+    Les données viennent de TaskManager / PlanningEngine, sur leur
+    connexion partagée. Jeton de validité : compteur d'écritures
+    persistant (change_counter) et date du jour (la semaine 0 en dépend).
+    Le compteur n'est relu que si PRAGMA data_version a bougé : tant que
+    personne n'écrit, une requête déjà servie coûte une pragma et une
+    recherche dans le cache, et une requête conditionnelle répond 304
+    sans corps. L'ETag est une empreinte du corps : une écriture qui ne
+    change pas la réponse garde le même ETag.
+    """
+
+    # Réponses gardées (LRU), une par chemin et jeu de paramètres
+    CACHE_SIZE = 64
+
+    def __init__(self, task_manager, engine: Optional[PlanningEngine] = None):
+        self.task_manager = task_manager
+        self.engine = engine or PlanningEngine(task_manager, prefetch=True)
+        # Un seul calcul à la fois : cache des réponses et connexion partagés
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[tuple, Tuple[str, str, bytes]]" = OrderedDict()
+        self._data_version = None
+        self._token = None
+
+    def token(self) -> str:
+        """Jeton de validité des réponses en cache (à appeler sous verrou)"""
+        version = self.task_manager.read_model.data_version()
+        today = date.today().isoformat()
+        if version != self._data_version or self._token is None or not self._token.endswith(today):
+            self._data_version = version
+            with self.task_manager._lock:
+                writes = change_count(self.task_manager.conn)
+            self._token = f"{writes}:{today}"
+        return self._token
+
+    def get(self, path: str, query: str) -> Tuple[int, str, bytes]:
+        """(statut, ETag, corps JSON) pour une requête GET"""
+        if path == "/":
+            body = {"endpoints": {route: list(params) for route, (_, params) in ROUTES.items()}}
+            return 200, "", json.dumps(body).encode()
+        if path not in ROUTES:
+            return 404, "", json.dumps({"error": f"unknown endpoint '{path}'"}).encode()
+        build, accepted = ROUTES[path]
+        params = {name: values[-1] for name, values in parse_qs(query).items() if name in accepted}
+        key = (path, tuple(sorted(params.items())))
+        with self._lock:
+            token = self.token()
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == token:
+                self._cache.move_to_end(key)
+                return 200, cached[1], cached[2]
+            try:
+                body = json.dumps(build(self, params), ensure_ascii=False).encode()
+            except BadRequest as e:
+                return 400, "", json.dumps({"error": str(e)}).encode()
+            etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+            self._cache[key] = (token, etag, body)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return 200, etag, body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "PlanIt"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            status, etag, body = self.server.api.get(url.path.rstrip("/") or "/", url.query)
+        except Exception as e:
+            status, etag, body = 500, "", json.dumps({"error": str(e)}).encode()
+        if etag and etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            # Requête conditionnelle : la version du client est à jour
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            # Le client peut garder la réponse, mais doit la revalider (304) à chaque usage
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            console.print(f"[dim]{self.address_string()} {format % args}[/dim]")
+
+
+class PlanItServer(ThreadingHTTPServer):
+    """Serveur HTTP (un thread par connexion) autour d'un PlanItAPI"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], api: PlanItAPI, verbose: bool = False):
+        super().__init__(address, _Handler)
+        self.api = api
+        self.verbose = verbose
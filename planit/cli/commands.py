@@ -2,19 +2,43 @@
 Typer CLI commands for PlanIt
 """
 
+import sys
+import time
 import typer
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 
 from rich.console import Console
+from rich.markup import escape
 from planit.core.database import TaskManager
+from planit.core.models import DAYS_SHORT
+from planit.core.plan import STRATEGIES
+from planit.core.planner import PlanningEngine
+from planit.core.slotarray import BACKENDS
 from planit.cli.interactive import start_interactive
+from planit.cli.script import ScriptError, parse_script, run_script, show_timings
 
 console = Console()
 app = typer.Typer(help="PlanIt - Simple Task Manager")
 
 # Instance globale du gestionnaire
 planner = TaskManager()
+engine = PlanningEngine(planner)
+
+def _check(ok: bool):
+    """Code de sortie 1 quand la commande a échoué (scripts shell, `run`)"""
+    if not ok:
+        raise typer.Exit(1)
+
+def _resource_id(key: Optional[str]) -> Optional[int]:
+    """Id d'une ressource donnée par nom ou par id (None = calendrier par défaut)"""
+    if key is None:
+        return None
+    resource = planner.find_resource(key)
+    if resource is None:
+        console.print(f"[red]Error: Unknown resource '{key}' (see 'resource')[/red]")
+        raise typer.Exit(1)
+    return resource.id
 
 @app.command()
 def tui():
@@ -32,9 +56,18 @@ def add(
     days: str = typer.Option("daily", "--days", help="Which days? (mon,tue,wed,thu,fri,sat,sun or daily)"),
     start_hour: Optional[int] = typer.Option(None, "--start", "-s", help="Start hour (0-23)"),
     manual: bool = typer.Option(False, "--manual", "-m", help="Schedule manually?"),
-    date: Optional[str] = typer.Option(None, "--date", help="Date for manual scheduling (MM/DD)")
+    date: Optional[str] = typer.Option(None, "--date", help="Date for manual scheduling (MM/DD)"),
+    force: bool = typer.Option(False, "--force", "-f", help="Schedule manually even if the slot is taken"),
+    after: Optional[List[int]] = typer.Option(None, "--after", "-a", help="Schedule after this task ID (repeatable)"),
+    project: Optional[int] = typer.Option(None, "--project", "-p", help="Project ID this task belongs to"),
+    resource: Optional[str] = typer.Option(None, "--resource", "-R", help="Assign to this resource (name or ID)")
 ):
     """Add a new task"""
+    if recurring and after:
+        console.print("[red]Error: --after only applies to non-recurring tasks[/red]")
+        raise typer.Exit(1)
+    resource_id = _resource_id(resource)
+    
     if recurring:
         if start_hour is None:
             start_hour = typer.prompt("Start hour (0-23)", type=int)
@@ -54,7 +87,7 @@ def add(
             raise typer.Exit(1)
         
         recurring_hours = f"{start_hour}-{end_hour}"
-        planner.add_task(title, duration, recurring=True, recurring_days=days, recurring_hours=recurring_hours)
+        _check(planner.add_task(title, duration, recurring=True, recurring_days=days, recurring_hours=recurring_hours, project_id=project, resource_id=resource_id))
     
     elif manual:
         if date is None:
@@ -87,64 +120,153 @@ def add(
             console.print(f"[red]Error: Task would end at {end_hour}h (after midnight)[/red]")
             raise typer.Exit(1)
         
+        # Vérifie le créneau contre les tâches déjà placées dans le même calendrier
+        conflicts = engine.find_conflicts(date_obj.date(), start_hour, end_hour, resource_id)
+        if conflicts:
+            engine.print_conflicts(conflicts, engine.suggest_slot(date_obj.date(), start_hour, duration, resource_id), duration)
+            if not force:
+                console.print("[dim]Pick another slot or use --force to schedule anyway[/dim]")
+                raise typer.Exit(1)
+        
         manual_schedule = f"{start_hour}h-{end_hour}h"
-        planner.add_task(title, duration, manual_schedule=manual_schedule, manual_date=f"{day_name} {date_str}")
+        _check(planner.add_task(title, duration, manual_schedule=manual_schedule, manual_date=f"{day_name} {date_str}", after=after, project_id=project, resource_id=resource_id))
     
     else:
-        planner.add_task(title, duration)
+        _check(planner.add_task(title, duration, after=after, project_id=project, resource_id=resource_id))
+
+@app.command()
+def depend(
+    task_id: int = typer.Argument(..., help="Task that must wait"),
+    after: List[int] = typer.Option(..., "--after", "-a", help="Task ID that must finish first (repeatable)"),
+):
+    """Schedule a task after other tasks"""
+    _check(planner.add_dependency(task_id, after))
 
 @app.command()
-def list():
+def list(archived: bool = typer.Option(False, "--archived", help="Show archived tasks instead")):
     """Show all tasks"""
-    planner.list_tasks()
+    if archived:
+        _check(planner.list_archived())
+    else:
+        _check(planner.list_tasks())
+
+@app.command()
+def search(
+    query: str = typer.Argument(..., help="Words to search in task titles and projects"),
+    limit: int = typer.Option(20, "--limit", "-n", help="Maximum number of results"),
+):
+    """Search tasks and projects (ranked, prefix matching)"""
+    _check(planner.show_search(query, limit))
 
 @app.command()
 def delete(task_id: int = typer.Argument(..., help="Task ID to delete")):
     """Delete a task"""
-    planner.delete_task(task_id)
+    _check(planner.delete_task(task_id))
 
 @app.command()
 def done(task_id: int = typer.Argument(..., help="Task ID to mark as completed")):
     """Mark task as completed"""
-    planner.complete_task(task_id)
+    _check(planner.complete_task(task_id))
 
 @app.command()
-def schedule():
+def schedule(
+    dry_run: bool = typer.Option(False, "--dry-run", help="Preview the plan without writing it"),
+    strategy: str = typer.Option("first-fit", "--strategy", "-s", help=f"Placement order: {', '.join(STRATEGIES)}"),
+    compare: bool = typer.Option(False, "--compare", help="Compare all strategies without writing"),
+    backend: str = typer.Option("python", "--backend", help=f"Occupancy engine: {', '.join(BACKENDS)} (numpy is optional)"),
+    pool: bool = typer.Option(False, "--pool", help="Give each unassigned task to the resource with the earliest free slot"),
+    confirm: bool = typer.Option(False, "--confirm", help="Preview (or compare), then write exactly the plan shown once confirmed"),
+):
     """Auto-schedule unscheduled tasks"""
-    planner.auto_schedule()
+    if strategy not in STRATEGIES:
+        console.print(f"[red]✗[/red] Unknown strategy '{strategy}' (choose from {', '.join(STRATEGIES)})")
+        raise typer.Exit(1)
+    try:
+        engine.set_backend(backend)
+    except (ValueError, RuntimeError) as e:
+        # escape : le message contient "[numpy]", à ne pas lire comme une balise Rich
+        console.print(f"[red]✗[/red] {escape(str(e))}")
+        raise typer.Exit(1)
+    if compare:
+        plans = engine.compare_strategies(pool)
+        if not confirm or not any(plan.placements for plan in plans.values()):
+            return
+        choice = typer.prompt(f"Apply which strategy? ({', '.join(plans)}, empty = none)", default="", show_default=False).strip()
+        if not choice:
+            console.print("[dim]Nothing was written.[/dim]")
+        elif choice not in plans:
+            console.print(f"[red]✗[/red] Unknown strategy '{escape(choice)}', nothing was written")
+            raise typer.Exit(1)
+        else:
+            _check(engine.apply_plan(plans[choice]))
+    elif confirm:
+        # Le plan écrit est celui affiché ; apply_plan écarte ce qui a changé depuis
+        plan = engine.preview_plan(strategy, pool)
+        if plan is None or not plan.placements:
+            return
+        if typer.confirm("Apply this plan?"):
+            _check(engine.apply_plan(plan))
+        else:
+            console.print("[dim]Nothing was written.[/dim]")
+    else:
+        _check(engine.auto_schedule(strategy, dry_run, pool))
+
+@app.command()
+def rebalance(
+    seconds: float = typer.Option(1.0, "--seconds", "-t", help="Search time budget in seconds"),
+    seed: int = typer.Option(None, "--seed", help="Random seed (reproducible result)"),
+):
+    """Spread scheduled tasks to even out the daily load"""
+    _check(engine.rebalance(seconds, seed))
 
 @app.command()
 def planning(
     next_week: bool = typer.Option(False, "--next", "-n", help="Show next week"),
     prev_week: bool = typer.Option(False, "--prev", "-p", help="Show previous week"),
-    current: bool = typer.Option(False, "--current", "-c", help="Show current week")
+    current: bool = typer.Option(False, "--current", "-c", help="Show current week"),
+    resource: Optional[str] = typer.Option(None, "--resource", "-R", help="Only this resource's tasks and free hours")
 ):
     """Show weekly schedule"""
+    if resource is not None:
+        engine.set_resource(_resource_id(resource))
     if next_week:
-        planner.current_week_offset += 1
+        engine.next_week()
     elif prev_week:
-        planner.current_week_offset -= 1
+        engine.prev_week()
     elif current:
-        planner.current_week_offset = 0
+        engine.current_week()
     
-    planner.show_schedule()
+    engine.show_schedule()
 
 @app.command()
 def next():
     """Show next week"""
-    planner.current_week_offset += 1
-    planner.show_schedule()
+    engine.next_week()
+    engine.show_schedule()
 
 @app.command()
 def prev():
     """Show previous week"""
-    planner.current_week_offset -= 1
-    planner.show_schedule()
+    engine.prev_week()
+    engine.show_schedule()
+
+@app.command()
+def stats(weeks: int = typer.Option(4, "--weeks", "-w", help="Number of weeks in the load overview")):
+    """Show workload statistics (hours booked, free capacity, completion)"""
+    engine.show_stats(weeks)
 
 @app.command()
 def reset():
     """Reset schedule"""
-    planner.reset_schedule()
+    _check(planner.reset_schedule())
+
+@app.command()
+def maintain(
+    days: int = typer.Option(30, "--days", help="Archive tasks completed more than DAYS days ago"),
+    vacuum: bool = typer.Option(False, "--vacuum", help="Also release free space to the file system"),
+):
+    """Archive old completed tasks and optimize the database"""
+    _check(planner.maintain(days, vacuum))
 
 @app.command()
 def project(
@@ -166,17 +288,223 @@ def project(
             console.print(f"[red]Error: Invalid {label} date format. Use MM/DD[/red]")
             raise typer.Exit(1)
     
-    planner.add_project(name, start_date, end_date, description)
+    _check(planner.add_project(name, start_date, end_date, description))
 
 @app.command()
 def delproject(project_id: int = typer.Argument(..., help="Project ID to delete")):
     """Delete a project"""
-    planner.delete_project(project_id)
+    _check(planner.delete_project(project_id))
 
 @app.command()
 def timeline():
     """Show project timeline (4 months view)"""
-    planner.show_timeline()
+    _check(planner.show_timeline())
+
+@app.command()
+def export(
+    ics: bool = typer.Option(False, "--ics", help="Export scheduled and recurring tasks as iCalendar"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="File to write (default: standard output)"),
+    archive: bool = typer.Option(True, "--archive/--no-archive", help="Include archived tasks"),
+):
+    """Export the schedule (iCalendar)"""
+    if not ics:
+        console.print("[red]Error: choose an export format (--ics)[/red]")
+        raise typer.Exit(1)
+    try:
+        events = planner.export_ics(output, archive)
+    except OSError as e:
+        console.print(f"[red]✗[/red] Cannot write {output}: {e}")
+        raise typer.Exit(1)
+    if output:
+        console.print(f"[green]✓[/green] {events} event(s) exported to [bold]{output}[/bold]")
+
+@app.command()
+def snapshot(
+    output: str = typer.Option("planit.snap", "--output", "-o", help="File to write"),
+    weeks: int = typer.Option(4, "--weeks", "-w", help="Weeks of resolved schedule, from the current week"),
+):
+    """Write a compact read-only columnar snapshot (tasks, projects, resolved schedule)"""
+    if weeks < 0:
+        console.print("[red]Error: --weeks must be positive or zero[/red]")
+        raise typer.Exit(1)
+    started = time.perf_counter()
+    try:
+        tasks, projects, slots, size = planner.export_snapshot(output, weeks)
+    except OSError as e:
+        console.print(f"[red]✗[/red] Cannot write {output}: {e}")
+        raise typer.Exit(1)
+    elapsed = (time.perf_counter() - started) * 1000
+    console.print(
+        f"[green]✓[/green] Snapshot written to [bold]{output}[/bold]: {tasks} task(s), {projects} project(s), "
+        f"{slots} slot(s) over {weeks} week(s), {size / 1024:.0f} KiB in {elapsed:.0f} ms"
+    )
+
+@app.command("import")
+def import_(
+    ics: str = typer.Option(..., "--ics", help="iCalendar file to import"),
+):
+    """Import events from an iCalendar file (re-importing skips known UIDs)"""
+    _check(planner.import_ics(ics))
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", "--host", help="Address to listen on"),
+    port: int = typer.Option(8765, "--port", "-p", help="Port to listen on (0 = any free port)"),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Log every request"),
+):
+    """Serve tasks, week grid, timeline and stats as JSON over HTTP (ETag / conditional GET)"""
+    from planit.api import PlanItAPI, PlanItServer
+    try:
+        server = PlanItServer((host, port), PlanItAPI(planner, engine), verbose)
+    except OSError as e:
+        console.print(f"[red]✗[/red] Cannot listen on {host}:{port}: {e}")
+        raise typer.Exit(1)
+    host, port = server.server_address[:2]
+    # Session longue : les semaines voisines de /week sont précalculées
+    engine.prefetch = True
+    console.print(f"[green]✓[/green] Serving PlanIt on [bold]http://{host}:{port}/[/bold] (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        engine.close()
+    console.print("[yellow]Server stopped[/yellow]")
+
+availability_app = typer.Typer(help="Manage availability windows and date exceptions")
+app.add_typer(availability_app, name="availability")
+
+def _parse_day(day: str) -> int:
+    """Convertit mon..sun en index de jour (0 = lundi)"""
+    day = day.strip().lower()[:3]
+    if day not in DAYS_SHORT:
+        console.print("[red]Error: Invalid day. Use mon,tue,wed,thu,fri,sat,sun[/red]")
+        raise typer.Exit(1)
+    return DAYS_SHORT.index(day)
+
+def _parse_date(date_str: str) -> str:
+    """Convertit MM/DD (année courante) en date ISO"""
+    try:
+        month, day = date_str.split('/')
+        return datetime(datetime.now().year, int(month), int(day)).date().isoformat()
+    except (ValueError, IndexError):
+        console.print("[red]Error: Invalid date format. Use MM/DD[/red]")
+        raise typer.Exit(1)
+
+def _parse_window(window: str) -> tuple:
+    """Convertit '9-12' en (9, 12)"""
+    try:
+        start_hour, end_hour = map(int, window.replace('h', '').split('-'))
+    except ValueError:
+        console.print(f"[red]Error: Invalid window '{window}'. Use START-END (e.g. 9-12)[/red]")
+        raise typer.Exit(1)
+    if not 0 <= start_hour < end_hour <= 24:
+        console.print(f"[red]Error: Invalid window '{window}'. Hours must satisfy 0 <= start < end <= 24[/red]")
+        raise typer.Exit(1)
+    return start_hour, end_hour
+
+@availability_app.callback(invoke_without_command=True)
+def availability_main(
+    ctx: typer.Context,
+    resource: Optional[str] = typer.Option(None, "--resource", "-R", help="Resource name or ID (default: your own calendar)")
+):
+    """Show weekly availability and date exceptions"""
+    if ctx.invoked_subcommand is None:
+        planner.show_availability(_resource_id(resource))
+
+@availability_app.command("add")
+def availability_add(
+    day: str = typer.Argument(..., help="Day (mon,tue,wed,thu,fri,sat,sun)"),
+    window: str = typer.Argument(..., help="Window START-END, e.g. 9-12"),
+    resource: Optional[str] = typer.Option(None, "--resource", "-R", help="Resource name or ID (default: your own calendar)")
+):
+    """Add a weekly availability window (several per day allowed)"""
+    start_hour, end_hour = _parse_window(window)
+    _check(planner.add_availability(_parse_day(day), start_hour, end_hour, _resource_id(resource)))
+
+@availability_app.command("remove")
+def availability_remove(
+    day: str = typer.Argument(..., help="Day (mon,tue,wed,thu,fri,sat,sun)"),
+    start_hour: Optional[int] = typer.Option(None, "--start", "-s", help="Only remove the window starting at this hour"),
+    resource: Optional[str] = typer.Option(None, "--resource", "-R", help="Resource name or ID (default: your own calendar)")
+):
+    """Remove weekly availability windows for a day"""
+    _check(planner.remove_availability(_parse_day(day), start_hour, _resource_id(resource)))
+
+@availability_app.command("off")
+def availability_off(
+    date: str = typer.Argument(..., help="Date (MM/DD)"),
+    resource: Optional[str] = typer.Option(None, "--resource", "-R", help="Resource name or ID (default: your own calendar)")
+):
+    """Mark a date as a day off"""
+    _check(planner.set_date_exception(_parse_date(date), [], _resource_id(resource)))
+
+@availability_app.command("set")
+def availability_set(
+    date: str = typer.Argument(..., help="Date (MM/DD)"),
+    windows: List[str] = typer.Argument(..., help="Windows START-END, e.g. 9-12 14-18"),
+    resource: Optional[str] = typer.Option(None, "--resource", "-R", help="Resource name or ID (default: your own calendar)")
+):
+    """Override availability for a specific date"""
+    _check(planner.set_date_exception(_parse_date(date), [_parse_window(window) for window in windows], _resource_id(resource)))
+
+@availability_app.command("clear")
+def availability_clear(
+    date: str = typer.Argument(..., help="Date (MM/DD)"),
+    resource: Optional[str] = typer.Option(None, "--resource", "-R", help="Resource name or ID (default: your own calendar)")
+):
+    """Remove a date exception (back to the weekly windows)"""
+    _check(planner.clear_date_exception(_parse_date(date), _resource_id(resource)))
+
+resource_app = typer.Typer(help="Manage team resources (people with their own availability)")
+app.add_typer(resource_app, name="resource")
+
+@resource_app.callback(invoke_without_command=True)
+def resource_main(ctx: typer.Context):
+    """Show resources, their weekly hours and open tasks"""
+    if ctx.invoked_subcommand is None:
+        planner.show_resources()
+
+@resource_app.command("add")
+def resource_add(name: str = typer.Argument(..., help="Resource name (unique)")):
+    """Add a resource with an empty calendar"""
+    _check(planner.add_resource(name))
+
+@resource_app.command("delete")
+def resource_delete(resource: str = typer.Argument(..., help="Resource name or ID")):
+    """Delete a resource and its availability (its tasks become unassigned)"""
+    _check(planner.delete_resource(_resource_id(resource)))
+
+@app.command()
+def run(
+    script: str = typer.Argument("-", help="File with one PlanIt command per line ('-' = stdin)"),
+    atomic: bool = typer.Option(False, "--atomic", help="All commands in one transaction: everything is written, or nothing"),
+    keep_going: bool = typer.Option(False, "--keep-going", "-k", help="Run the next commands after a failure (ignored with --atomic)"),
+):
+    """Run a script of PlanIt commands in one process, with per-command timing"""
+    try:
+        if script == "-":
+            text = sys.stdin.read()
+        else:
+            with open(script, encoding="utf-8") as source:
+                text = source.read()
+        steps = parse_script(text)
+    except OSError as e:
+        console.print(f"[red]✗[/red] Cannot read {script}: {e}")
+        raise typer.Exit(1)
+    except ScriptError as e:
+        console.print(f"[red]✗[/red] {escape(str(e))}")
+        raise typer.Exit(1)
+    started = time.perf_counter()
+    try:
+        results = run_script(app, planner, engine, steps, atomic, keep_going)
+    except ScriptError as e:
+        console.print(f"[red]✗[/red] {escape(str(e))}")
+        raise typer.Exit(1)
+    show_timings(results, len(steps), atomic, (time.perf_counter() - started) * 1000)
+    if len(results) < len(steps) or not all(result.ok for result in results):
+        raise typer.Exit(1)
 
 @app.command()
 def interactive():
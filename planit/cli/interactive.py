@@ -8,6 +8,7 @@ from rich.panel import Panel
 from rich.table import Table
 
 from planit.core.database import TaskManager
+from planit.core.planner import PlanningEngine
 
 console = Console()
 
@@ -15,6 +16,9 @@ def start_interactive():
     """Mode interactif original de PlanIt"""
     
     planner = TaskManager()
+    engine = PlanningEngine(planner)
+    # Écritures groupées dans une transaction, journalisées jusqu'au commit
+    planner.begin_batch()
     
     welcome_panel = Panel.fit(
         "[bold blue]PLANIT[/bold blue] - Simple Task Manager\n"
@@ -36,17 +40,23 @@ def start_interactive():
                 commands = [
                     ("add", "Add a new task (recurring, manual schedule, or auto)"),
                     ("list", "Show all tasks"),
+                    ("search", "Search tasks and projects"),
                     ("del", "Delete a task"),
                     ("done", "Mark task as completed"),
                     ("schedule", "Auto-schedule unscheduled tasks"),
+                    ("preview", "Preview auto-scheduling, then apply it if confirmed"),
+                    ("rebalance", "Spread scheduled tasks to even out the daily load"),
                     ("planning", "Show current week schedule"),
                     ("next", "Show next week"),
                     ("prev", "Show previous week"),
+                    ("stats", "Show workload statistics"),
                     ("reset", "Reset schedule"),
                     ("project", "Add a new project"),
                     ("delproject", "Delete a project"),
                     ("timeline", "Show project timeline (4 months view)"),
-                    ("quit", "Exit application")
+                    ("availability", "Show availability windows and date exceptions"),
+                    ("save", "Commit pending changes to the database"),
+                    ("quit", "Save and exit application")
                 ]
                 
                 for cmd, desc in commands:
@@ -122,6 +132,19 @@ def start_interactive():
                             console.print("[red]Error: Start hour must be a number between 0 and 23[/red]")
                             continue
                         
+                        # Vérifie le créneau contre les tâches déjà placées
+                        conflicts = engine.find_conflicts(date_obj.date(), start_hour, end_hour)
+                        if conflicts:
+                            suggestion = engine.suggest_slot(date_obj.date(), start_hour, duration)
+                            engine.print_conflicts(conflicts, suggestion, duration)
+                            if suggestion is not None and input("Use the suggested slot? (y/n): ").strip().lower() == 'y':
+                                suggested_date, start_hour = suggestion
+                                end_hour = start_hour + duration
+                                day_name = suggested_date.strftime("%A")
+                                date_str = suggested_date.strftime("%d/%m")
+                            elif input("Schedule anyway? (y/n): ").strip().lower() != 'y':
+                                continue
+                        
                         manual_schedule = f"{start_hour}h-{end_hour}h"
                         planner.add_task(title, duration, manual_schedule=manual_schedule, manual_date=f"{day_name} {date_str}")
                     else:
@@ -139,26 +162,35 @@ def start_interactive():
                 planner.complete_task(task_id)
             
             elif command in ['schedule', 'auto']:
-                planner.auto_schedule()
+                engine.auto_schedule()
+            
+            elif command == 'preview':
+                plan = engine.preview_plan()
+                if plan is not None and plan.placements:
+                    if input("Apply this plan? (y/N): ").strip().lower() in ('y', 'yes'):
+                        engine.apply_plan(plan)
+            
+            elif command == 'rebalance':
+                engine.rebalance()
             
             elif command in ['next', 'prev', 'previous']:
                 if command in ['next', 'n']:
-                    planner.current_week_offset += 1
+                    engine.next_week()
                 elif command in ['prev', 'previous', 'p']:
-                    planner.current_week_offset -= 1
-                planner.show_schedule()
+                    engine.prev_week()
+                engine.show_schedule()
             
             elif command == 'planning':
                 if len(user_input.split()) > 1:
                     arg = user_input.split()[1].lower()
                     if arg in ['next', 'n']:
-                        planner.current_week_offset += 1
+                        engine.next_week()
                     elif arg in ['prev', 'previous', 'p']:
-                        planner.current_week_offset -= 1
+                        engine.prev_week()
                     elif arg == 'current':
-                        planner.current_week_offset = 0
+                        engine.current_week()
                 
-                planner.show_schedule()
+                engine.show_schedule()
             
             elif command == 'reset':
                 planner.reset_schedule()
@@ -208,6 +240,21 @@ def start_interactive():
             elif command in ['timeline', 'view']:
                 planner.show_timeline()
             
+            elif command == 'stats':
+                engine.show_stats()
+            
+            elif command == 'search':
+                query = user_input[len(command):].strip() or input("Search: ").strip()
+                if query:
+                    planner.show_search(query)
+            
+            elif command in ['availability', 'avail']:
+                planner.show_availability()
+            
+            elif command == 'save':
+                planner.flush()
+                console.print("[green]✓[/green] Changes saved")
+            
             elif command in ['quit', 'exit', 'q']:
                 print("Goodbye!")
                 break
@@ -215,8 +262,10 @@ def start_interactive():
             else:
                 print("Unknown command. Type 'help' for commands.")
         
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             print("\nGoodbye!")
             break
         except Exception as e:
-            print(f"Error: {e}")
\ No newline at end of file
+            print(f"Error: {e}")
+    
+    planner.close()
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Batch execution of PlanIt command scripts in one process
+"""
+
+import shlex
+import time
+from typing import Iterable, List, NamedTuple, Tuple
+
+import typer
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+console = Console()
+
+# Commandes qui ne rendent pas la main (ou relancent un script) : refusées dans un script
+NOT_SCRIPTABLE = {"run", "tui", "interactive", "serve"}
+# Commandes qui doivent commiter elles-mêmes (VACUUM hors transaction) : refusées avec --atomic
+NOT_ATOMIC = {"maintain"}
+
+
+class ScriptError(Exception):
+    """Ligne de script invalide (syntaxe ou commande refusée)"""
+
+
+class ScriptAborted(Exception):
+    """Arrêt du script au premier échec (avec --atomic : annule la transaction englobante)"""
+
+
+class StepResult(NamedTuple):
+    line: int
+    command: str
+    ok: bool
+    elapsed_ms: float
+
+
+def parse_script(text: str) -> List[Tuple[int, List[str]]]:
+    """
+    (numéro de ligne, arguments) pour chaque commande du script
+    Une commande par ligne, syntaxe du shell (guillemets), # pour les commentaires ;
+    le préfixe 'planit' ou 'python main.py' est accepté et ignoré.
+    """
+    steps = []
+    for number, line in enumerate(text.splitlines(), 1):
+        try:
+            args = shlex.split(line, comments=True)
+        except ValueError as e:
+            raise ScriptError(f"line {number}: {e}")
+        if args[:2] == ["python", "main.py"]:
+            args = args[2:]
+        elif args[:1] == ["planit"]:
+            args = args[1:]
+        if not args:
+            continue
+        if args[0] in NOT_SCRIPTABLE:
+            raise ScriptError(f"line {number}: '{args[0]}' cannot be used in a script")
+        steps.append((number, args))
+    return steps
+
+
+def _invoke(command, args: List[str]) -> bool:
+    """
+    Exécute une commande comme depuis la ligne de commande ; True si elle a réussi
+    Même règle qu'en shell : une commande qui échoue termine avec un code non nul.
+    """
+    try:
+        # Mode standalone : Typer affiche ses erreurs d'usage et termine par SystemExit
+        command.main(args, prog_name="planit")
+        code = 0
+    except SystemExit as e:
+        code = e.code
+    except Exception as e:
+        console.print(f"[red]Error: {escape(str(e))}[/red]")
+        return False
+    if code == 130:
+        raise KeyboardInterrupt
+    return code in (0, None)
+
+
+def run_script(app: typer.Typer, planner, engine, steps: Iterable[Tuple[int, List[str]]],
+               atomic: bool = False, keep_going: bool = False) -> List[StepResult]:
+    """
+    Exécute les commandes dans ce processus, sur la connexion de `planner`
+
+    Chaque commande part d'un moteur `engine` remis dans l'état d'un
+    nouveau processus (semaine courante, tous les calendriers) : `next`
+    puis `planning` affiche la même semaine qu'en deux invocations.
+
+    atomic : toutes les commandes dans une seule transaction, commitée
+    seulement si toutes réussissent (sinon ROLLBACK, rien n'est écrit).
+    Sinon chaque commande commite comme en ligne de commande ; le script
+    s'arrête au premier échec, sauf avec keep_going.
+    """
+    steps = list(steps)
+    if atomic:
+        refused = [(number, args[0]) for number, args in steps if args[0] in NOT_ATOMIC]
+        if refused:
+            number, command = refused[0]
+            raise ScriptError(f"line {number}: '{command}' cannot run inside --atomic")
+
+    # Construit une seule fois : Typer relit sinon la signature de chaque commande à chaque appel
+    command_group = typer.main.get_command(app)
+    results: List[StepResult] = []
+
+    def execute():
+        for number, args in steps:
+            command = shlex.join(args)
+            console.print(f"[dim]{number}[/dim] [bold cyan]$ {escape(command)}[/bold cyan]")
+            started = time.perf_counter()
+            engine.reset_view()
+            ok = _invoke(command_group, args)
+            results.append(StepResult(number, command, ok, (time.perf_counter() - started) * 1000))
+            if not ok and (atomic or not keep_going):
+                raise ScriptAborted(f"line {number} failed")
+
+    try:
+        if atomic:
+            with planner.transaction():
+                execute()
+        else:
+            execute()
+    except ScriptAborted:
+        pass
+    return results
+
+
+def show_timings(results: List[StepResult], total: int, atomic: bool, elapsed_ms: float):
+    """Tableau du temps passé par commande et bilan du script"""
+    table = Table(title="⏱️ Script")
+    table.add_column("Line", style="dim", justify="right")
+    table.add_column("Command", style="cyan", max_width=50)
+    table.add_column("Status", justify="center")
+    table.add_column("Time", justify="right")
+    for result in results:
+        status = "[green]✓[/green]" if result.ok else "[red]✗[/red]"
+        table.add_row(str(result.line), escape(result.command), status, f"{result.elapsed_ms:.1f} ms")
+    console.print(table)
+
+    failed = sum(not result.ok for result in results)
+    skipped = total - len(results)
+    if not failed:
+        console.print(f"[green]✓[/green] {total} command(s) in {elapsed_ms:.0f} ms")
+    elif atomic:
+        console.print(f"[red]✗[/red] Script rolled back: nothing was written ({skipped} command(s) not run)")
+    else:
+        console.print(f"[yellow]⚠[/yellow] {failed} command(s) failed, {skipped} not run, in {elapsed_ms:.0f} ms")
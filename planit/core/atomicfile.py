@@ -0,0 +1,22 @@
+"""
+Atomic file replacement shared by PlanIt's on-disk caches
+"""
+
+import os
+
+# Lu une fois au chargement : os.umask() ne sait que remplacer le masque du processus
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Mode d'un fichier créé par open() : mkstemp() crée toujours en 0600
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def replace_file(temporary: str, path: str):
+    """
+    Remplace path par le fichier temporaire (issu de tempfile.mkstemp)
+    Le fichier reçoit d'abord les droits d'un fichier ordinaire, pour
+    rester lisible par les autres utilisateurs comme avant le remplacement.
+    """
+    os.chmod(temporary, FILE_MODE)
+    os.replace(temporary, path)
@@ -0,0 +1,112 @@
+"""
+Effective free time per date for PlanIt
+"""
+
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Interval = Tuple[int, int]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Fusionne des intervalles [début, fin) en une liste triée et disjointe"""
+    merged = []
+    for start, end in sorted(intervals):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class DayWindows:
+    """Fenêtres libres d'une journée, triées, avec les débuts indexés pour bisect"""
+
+    __slots__ = ("intervals", "starts", "total_hours")
+
+    def __init__(self, intervals: List[Interval]):
+        self.intervals = intervals
+        self.starts = [start for start, _ in intervals]
+        self.total_hours = sum(end - start for start, end in intervals)
+
+    def covering(self, hour: int) -> Optional[Interval]:
+        """Retourne la fenêtre qui contient l'heure donnée, en O(log n)"""
+        index = bisect_right(self.starts, hour) - 1
+        if index >= 0 and hour < self.intervals[index][1]:
+            return self.intervals[index]
+        return None
+
+    def next_window(self, hour: int) -> Optional[Interval]:
+        """Fenêtre qui contient l'heure, sinon la suivante dans la journée"""
+        index = bisect_right(self.starts, hour) - 1
+        if index >= 0 and hour < self.intervals[index][1]:
+            return self.intervals[index]
+        if index + 1 < len(self.intervals):
+            return self.intervals[index + 1]
+        return None
+
+    def contains(self, start: int, end: int) -> bool:
+        """Vrai si [start, end) tient entièrement dans une fenêtre"""
+        window = self.covering(start)
+        return window is not None and end <= window[1]
+
+
+class FreeTimeCache:
+    """
+    Disponibilités effectives par date
+
+    Les fenêtres hebdomadaires (plusieurs par jour possibles) sont fusionnées
+    une seule fois par jour de semaine. Une date présente dans les exceptions
+    remplace entièrement la semaine type : sans fenêtre, c'est un jour off.
+    """
+
+    def __init__(self, availability: Iterable[Tuple[int, int, int]], exceptions: Iterable[Tuple[str, Optional[int], Optional[int]]]):
+        weekly: List[List[Interval]] = [[] for _ in range(7)]
+        for day_of_week, start_hour, end_hour in availability:
+            if 0 <= day_of_week < 7:
+                weekly[day_of_week].append((start_hour, end_hour))
+        self._weekly = [DayWindows(merge_intervals(windows)) for windows in weekly]
+
+        overrides: Dict[date, List[Interval]] = {}
+        for date_str, start_hour, end_hour in exceptions:
+            try:
+                day = date.fromisoformat(date_str)
+            except (TypeError, ValueError):
+                continue
+            windows = overrides.setdefault(day, [])
+            if start_hour is not None and end_hour is not None:
+                windows.append((start_hour, end_hour))
+        self._overrides = {day: DayWindows(merge_intervals(windows)) for day, windows in overrides.items()}
+
+    def windows(self, day: date) -> DayWindows:
+        """Fenêtres libres effectives pour une date"""
+        override = self._overrides.get(day)
+        if override is not None:
+            return override
+        return self._weekly[day.weekday()]
+
+    def weekly(self, day_of_week: int) -> DayWindows:
+        """Fenêtres de la semaine type pour un jour (0 = lundi)"""
+        return self._weekly[day_of_week]
+
+    def is_override(self, day: date) -> bool:
+        """Vrai si la date a une exception (jour off ou horaires spécifiques)"""
+        return day in self._overrides
+
+    def is_available(self, day: date, start: int, end: int) -> bool:
+        """Vrai si [start, end) est couvert par les disponibilités de la date"""
+        return self.windows(day).contains(start, end)
+
+    def free_hours(self, day: date) -> int:
+        """Nombre d'heures disponibles pour la date"""
+        return self.windows(day).total_hours
+
+    def has_any(self) -> bool:
+        """Vrai si au moins une fenêtre est définie"""
+        return any(windows.intervals for windows in self._weekly) or any(
+            windows.intervals for windows in self._overrides.values()
+        )
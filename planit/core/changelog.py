@@ -0,0 +1,88 @@
+"""
+Change log of modified rows for PlanIt (incremental refresh of readers)
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Set
+
+# (table, colonne qui identifie la ligne) : availability et ses exceptions n'ont pas de clé, on garde le rowid
+LOGGED_TABLES = (
+    ("tasks", "id"),
+    ("projects", "id"),
+    ("resources", "id"),
+    ("availability", "rowid"),
+    ("availability_exceptions", "rowid"),
+    ("task_dependencies", "task_id"),
+)
+
+# Lignes gardées : au-delà, un lecteur trop en retard recharge tout
+CHANGE_LOG_KEEP = 10_000
+
+
+def _log_triggers() -> List[str]:
+    triggers = []
+    for table, key in LOGGED_TABLES:
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            triggers.append(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_change_log_{event.lower()} AFTER {event} ON {table} BEGIN
+                INSERT INTO change_log (tbl, row_id) VALUES ('{table}', {row}.{key});
+            END
+            ''')
+    return triggers
+
+
+# Une ligne par ligne modifiée, numérotée dans l'ordre des commits (seq ne
+# revient jamais en arrière). Le trigger de purge ne passe qu'une fois
+# toutes les 1000 écritures.
+CHANGE_LOG_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tbl TEXT NOT NULL,
+        row_id INTEGER
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS change_log_prune AFTER INSERT ON change_log
+    WHEN NEW.seq % 1000 = 0 BEGIN
+        DELETE FROM change_log WHERE seq <= NEW.seq - {CHANGE_LOG_KEEP};
+    END
+    ''',
+] + _log_triggers()
+
+
+def create_change_log(cursor):
+    for statement in CHANGE_LOG_SCHEMA:
+        cursor.execute(statement)
+
+
+class Changes(NamedTuple):
+    """Lignes modifiées depuis un numéro de séquence ; full = trop ancien ou trop gros, tout relire"""
+    seq: int
+    rows: Dict[str, Set[int]]
+    full: bool = False
+
+    def touches(self, *tables: str) -> bool:
+        """Vrai si l'une des tables a changé (toujours vrai pour un rechargement complet)"""
+        return self.full or any(table in self.rows for table in tables)
+
+
+def last_change(conn) -> int:
+    """Numéro de la dernière écriture enregistrée (0 pour une base neuve)"""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+def changes_since(conn, seq: int, limit: Optional[int] = None) -> Changes:
+    """
+    Lignes modifiées après `seq`, regroupées par table
+    Si des entrées ont été purgées, ou s'il y en a plus que `limit`, full = True.
+    """
+    last = last_change(conn)
+    if last == seq:
+        return Changes(seq, {})
+    first = conn.execute("SELECT MIN(seq) FROM change_log WHERE seq > ?", (seq,)).fetchone()[0]
+    if first is None or first > seq + 1 or (limit is not None and last - seq > limit):
+        return Changes(last, {}, full=True)
+    rows: Dict[str, Set[int]] = {}
+    for table, row_id in conn.execute("SELECT tbl, row_id FROM change_log WHERE seq > ? AND seq <= ?", (seq, last)):
+        rows.setdefault(table, set()).add(row_id)
+    return Changes(last, rows)
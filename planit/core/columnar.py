@@ -0,0 +1,234 @@
+"""
+Compact read-only columnar snapshots of a PlanIt database
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from datetime import date, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+from planit.core.atomicfile import replace_file
+from planit.core.models import Task, days_from_mask
+
+# Fichier : en-tête, répertoire des colonnes, puis les colonnes alignées sur
+# 8 octets. Chaque colonne est un tableau de largeur fixe en petit-boutiste
+# (codes du module array) ; les textes sont des index dans une table de
+# chaînes (offsets + octets UTF-8), l'index 0 étant la chaîne vide (NULL).
+MAGIC = b"PLANSNAP"
+FORMAT_VERSION = 1
+# magic, version, nombre de colonnes, création (epoch), compteur d'écritures,
+# lundi de départ du planning résolu (ordinal), nombre de semaines
+HEADER = struct.Struct("<8sIIqqiI")
+# nom, code array, offset, nombre d'éléments
+ENTRY = struct.Struct("<24s2s6xQQ")
+ALIGN = 8
+NO_VALUE = -1
+
+FLAG_COMPLETED = 1
+FLAG_RECURRING = 2
+
+
+class StringTable:
+    """Chaînes dédoublonnées : texte -> index"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {"": 0}
+        self.offsets = array("I", [0, 0])
+        self.data = bytearray()
+
+    def add(self, text) -> int:
+        text = text or ""
+        position = self.index.get(text)
+        if position is None:
+            position = self.index[text] = len(self.offsets) - 1
+            self.data += text.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return position
+
+
+def resolve_schedule(tasks: Sequence[Task], first_monday: date, weeks: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Créneaux concrets des tâches non terminées sur `weeks` semaines :
+    (rang de la tâche, date ordinale, heure de début, heure de fin), triés
+    par date puis heure. Même règle que le planning affiché (Task.days_in_week).
+    """
+    dates = [first_monday + timedelta(days=i) for i in range(7 * weeks)]
+    # Une date 'dd/mm' revient une fois par an : plusieurs positions possibles
+    positions: Dict[str, List[int]] = {}
+    for i, day in enumerate(dates):
+        positions.setdefault(day.strftime("%d/%m"), []).append(i)
+
+    slots = []
+    for row, task in enumerate(tasks):
+        if task.completed or not task.is_placed:
+            continue
+        if task.scheduled_date is not None:
+            days = [i for i in positions.get(task.scheduled_date, ()) if task.weekday_mask & (1 << (i % 7))]
+        else:
+            days = [week * 7 + day for week in range(weeks) for day in days_from_mask(task.weekday_mask)]
+        for i in days:
+            slots.append((row, dates[i].toordinal(), task.start_hour, task.end_hour))
+    slots.sort(key=lambda slot: (slot[1], slot[2], slot[0]))
+    return slots
+
+
+def _column(typecode: str, values) -> array:
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def write_snapshot(path: str, snapshot, writes: int, weeks: int = 4, today: date = None) -> Tuple[int, int]:
+    """
+    Écrit tâches, projets et planning résolu (à partir du lundi de la semaine
+    courante) ; le fichier est remplacé d'un coup, un lecteur ne voit jamais
+    un fichier à moitié écrit. Retourne (créneaux résolus, taille en octets).
+    """
+    today = today or date.today()
+    first_monday = today - timedelta(days=today.weekday())
+    strings = StringTable()
+    tasks, projects = snapshot.tasks, snapshot.projects
+    slots = resolve_schedule(tasks, first_monday, weeks)
+
+    def optional(value):
+        return NO_VALUE if value is None else value
+
+    columns = [
+        ("tasks.id", _column("i", (task.id for task in tasks))),
+        ("tasks.title", _column("I", (strings.add(task.title) for task in tasks))),
+        ("tasks.duration", _column("i", (task.duration for task in tasks))),
+        ("tasks.flags", _column("B", (task.completed * FLAG_COMPLETED | task.recurring * FLAG_RECURRING for task in tasks))),
+        ("tasks.project_id", _column("i", (optional(task.project_id) for task in tasks))),
+        ("tasks.version", _column("i", (task.version for task in tasks))),
+        ("tasks.scheduled_time", _column("I", (strings.add(task.scheduled_time) for task in tasks))),
+        ("tasks.recurring_days", _column("I", (strings.add(task.recurring_days) for task in tasks))),
+        ("tasks.weekday_mask", _column("B", (task.weekday_mask for task in tasks))),
+        ("tasks.start_hour", _column("b", (optional(task.start_hour) for task in tasks))),
+        ("tasks.end_hour", _column("b", (optional(task.end_hour) for task in tasks))),
+        ("projects.id", _column("i", (project.id for project in projects))),
+        ("projects.name", _column("I", (strings.add(project.name) for project in projects))),
+        ("projects.start_date", _column("I", (strings.add(project.start_date) for project in projects))),
+        ("projects.end_date", _column("I", (strings.add(project.end_date) for project in projects))),
+        ("projects.description", _column("I", (strings.add(project.description) for project in projects))),
+        ("schedule.task", _column("I", (slot[0] for slot in slots))),
+        ("schedule.day", _column("i", (slot[1] for slot in slots))),
+        ("schedule.start_hour", _column("b", (slot[2] for slot in slots))),
+        ("schedule.end_hour", _column("b", (slot[3] for slot in slots))),
+        ("strings.offsets", _column("I", strings.offsets)),
+        ("strings.data", array("B", strings.data)),
+    ]
+
+    directory, offset = [], HEADER.size + ENTRY.size * len(columns)
+    for name, column in columns:
+        offset += -offset % ALIGN
+        directory.append(ENTRY.pack(name.encode("ascii"), column.typecode.encode("ascii"), offset, len(column)))
+        offset += len(column) * column.itemsize
+
+    target_dir = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(dir=target_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(columns), int(time.time()), writes, first_monday.toordinal(), weeks))
+            out.write(b"".join(directory))
+            for name, column in columns:
+                out.write(b"\0" * (-out.tell() % ALIGN))
+                column.tofile(out)
+            size = out.tell()
+        replace_file(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return len(slots), size
+
+
+class ColumnarSnapshot:
+    """
+    Lecteur d'un snapshot colonnaire, par mmap en lecture seule
+
+    column() renvoie une memoryview typée sur le fichier projeté : aucune
+    copie ni objet Python par ligne, les pages sont lues à la demande.
+    Les vues restent valides jusqu'à close() (ou la sortie du `with`).
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as source:
+            self._mmap = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        try:
+            magic, version, count, created, writes, first_monday, weeks = HEADER.unpack_from(self._buffer)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a PlanIt snapshot")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported snapshot format v{version}")
+            self._columns = {}
+            for i in range(count):
+                name, typecode, offset, length = ENTRY.unpack_from(self._buffer, HEADER.size + i * ENTRY.size)
+                self._columns[name.rstrip(b"\0").decode("ascii")] = (typecode.rstrip(b"\0").decode("ascii"), offset, length)
+        except struct.error as error:
+            self.close()
+            raise ValueError(f"{path} is not a PlanIt snapshot (truncated)") from error
+        except ValueError:
+            self.close()
+            raise
+        self.created = created
+        # Compteur d'écritures de la base au moment de l'écriture : inchangé = même contenu
+        self.writes = writes
+        self.first_monday = date.fromordinal(first_monday)
+        self.weeks = weeks
+        self._views: Dict[str, memoryview] = {}
+
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> memoryview:
+        """Colonne typée, sans copie (copie retournée seulement sur machine gros-boutiste)"""
+        view = self._views.get(name)
+        if view is None:
+            typecode, offset, length = self._columns[name]
+            size = array(typecode).itemsize
+            view = self._buffer[offset:offset + length * size].cast(typecode)
+            if sys.byteorder == "big" and size > 1:
+                swapped = array(typecode, view)
+                swapped.byteswap()
+                view = memoryview(swapped)
+            self._views[name] = view
+        return view
+
+    def string(self, index: int) -> str:
+        offsets = self.column("strings.offsets")
+        return str(self.column("strings.data")[offsets[index]:offsets[index + 1]], "utf-8")
+
+    def text(self, name: str, row: int) -> str:
+        """Valeur d'une colonne texte ('tasks.title'...) pour une ligne"""
+        return self.string(self.column(name)[row])
+
+    @property
+    def task_count(self) -> int:
+        return self._columns["tasks.id"][2]
+
+    @property
+    def project_count(self) -> int:
+        return self._columns["projects.id"][2]
+
+    @property
+    def slot_count(self) -> int:
+        return self._columns["schedule.task"][2]
+
+    def close(self):
+        for view in getattr(self, "_views", {}).values():
+            view.release()
+        self._views = {}
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
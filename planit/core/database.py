@@ -2,131 +2,164 @@
 Database management and task operations for PlanIt
 """
 
+import random
 import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
 
 from rich.console import Console
 from rich.table import Table
 
+from planit.core import dependencies, maintenance, stats
+from planit.core.availability import FreeTimeCache
+from planit.core.changelog import Changes, changes_since, last_change
+from planit.core.columnar import write_snapshot
+from planit.core.dependencies import DependencyCycle
+from planit.core.icalendar import IMPORT_INSERT, batches, calendar_lines, calendar_tag, import_rows
+from planit.core.journal import JournalingCursor, ReplayConflict, WriteJournal, orphan_journals, replay, session_journal_path
+from planit.core.models import DAY_NAMES, Task, Project, Resource
+from planit.core.migrations import migrate
+from planit.core.readmodel import ReadModel, Snapshot
+from planit.core.rendercache import RenderCache, change_count
+from planit.core.search import SearchResult, search as full_text_search
+from planit.core.stats import NO_PROGRESS, ProjectProgress, TaskSummary
+
 console = Console()
 
+# Attente d'un verrou par SQLite (secondes), puis nouvelles tentatives de
+# BEGIN IMMEDIATE avec un délai exponentiel à partir de BUSY_BACKOFF
+BUSY_TIMEOUT = 5.0
+BUSY_RETRIES = 4
+BUSY_BACKOFF = 0.05
+
+# Colonnes modifiables par update_task()
+TASK_UPDATABLE = ("title", "duration", "completed", "scheduled_time", "recurring_days", "recurring_hours", "pinned")
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    """Vrai pour SQLITE_BUSY / SQLITE_LOCKED (base verrouillée par une autre connexion)"""
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(error) or "busy" in str(error)
+
 class TaskManager:
     """
     Gestionnaire de base de données pour les tâches et projets
     Anciennement classe PlanIt
+
+    Les commandes (add_task, delete_task, show_timeline...) affichent leur
+    résultat et retournent True si elles ont réussi, False sinon.
     """
     
     def __init__(self, db_path="planit.db"):
         self.db_path = db_path
         self.current_week_offset = 0  # 0 = semaine actuelle, 1 = suivante, -1 = précédente
-        self.init_database()
-        self.init_default_availability()
-    
-    def init_database(self):
-        """Initialise la base de données SQLite"""
-        console.print(f"[blue]Initializing database at:[/blue] {self.db_path}")
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Debug: vérifie si les tables existent déjà
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        existing_tables = cursor.fetchall()
-        console.print(f"[dim]Existing tables:[/dim] {existing_tables}")
         
-        # Ne plus supprimer les tables - juste les créer si elles n'existent pas
-        # Table des tâches
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                duration INTEGER NOT NULL,
-                completed BOOLEAN DEFAULT FALSE,
-                scheduled_time TEXT,
-                recurring BOOLEAN DEFAULT FALSE,
-                recurring_days TEXT,
-                recurring_hours TEXT
-            )
-        ''')
+        # Connexion partagée par les lectures et les écritures ; les transactions
+        # sont gérées explicitement (voir transaction()). Le timer de flush
+        # du mode batch l'utilise depuis un autre thread, sous self._lock.
+        # timeout = busy_timeout : attend un autre processus au lieu d'échouer.
+        self.conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        # tasks.project_id : un projet supprimé détache ses tâches (ON DELETE SET NULL)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        self._current_cursor = None
+        self._batch = None
         
-        # Table des projets
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS projects (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                start_date TEXT NOT NULL,
-                end_date TEXT NOT NULL,
-                description TEXT
-            )
-        ''')
+        # Schéma : une lecture de PRAGMA user_version si la base est à jour
+        migrate(self.conn)
         
-        # Table des disponibilités
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS availability (
-                day_of_week INTEGER,
-                start_hour INTEGER,
-                end_hour INTEGER
-            )
-        ''')
+        # Read model en mémoire, revalidé par PRAGMA data_version
+        self.read_model = ReadModel(self.conn, self._lock)
         
-        # Debug: vérifie le contenu des tables après création
-        cursor.execute("SELECT COUNT(*) FROM tasks")
-        task_count = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM availability")
-        avail_count = cursor.fetchone()[0]
-        console.print(f"[dim]Tasks count:[/dim] {task_count}, [dim]Availability count:[/dim] {avail_count}")
+        # Vues CLI déjà rendues, revalidées par le compteur d'écritures
+        self.render_cache = RenderCache(self.conn, self._lock, f"{db_path}.planit-render", console)
         
-        conn.commit()
-        conn.close()
+        # Journal des écritures groupées (mode interactif), propre à cette session
+        self.journal = WriteJournal(session_journal_path(db_path))
+        self._journal_seq = 0
+        self.recover_journal()
     
-    def init_default_availability(self):
-        """Initialise une disponibilité par défaut (9h-18h du lundi au vendredi) SEULEMENT si aucune n'existe"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Vérifie si des disponibilités existent déjà
-        cursor.execute('SELECT COUNT(*) FROM availability')
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            # Ajoute une dispo par défaut : 9h-18h du lundi au vendredi
-            default_schedule = [
-                (0, 9, 18),   # Lundi
-                (1, 9, 18),   # Mardi
-                (2, 9, 18),   # Mercredi
-                (3, 9, 18),   # Jeudi
-                (4, 9, 18),   # Vendredi
-            ]
-            
-            for day, start, end in default_schedule:
-                cursor.execute('''
-                    INSERT INTO availability (day_of_week, start_hour, end_hour)
-                    VALUES (?, ?, ?)
-                ''', (day, start, end))
-            
-            console.print("[green]✓[/green] Default availability created: 9h-18h Monday to Friday")
-        # Si des disponibilités existent déjà, ne rien faire (pas de message)
-        
-        conn.commit()
-        conn.close()
+    def snapshot(self) -> Snapshot:
+        """Retourne le snapshot en mémoire (aucune requête si la base n'a pas changé)"""
+        return self.read_model.snapshot()
     
-    def add_task(self, title: str, duration: int, recurring: bool = False, recurring_days: str = None, recurring_hours: str = None, manual_schedule: str = None, manual_date: str = None):
-        """Ajoute une nouvelle tâche"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+    def last_change(self) -> int:
+        """Numéro de la dernière écriture notée dans change_log"""
+        with self._lock:
+            return last_change(self.conn)
+    
+    def changes_since(self, seq: int, limit: Optional[int] = None) -> Changes:
+        """Lignes modifiées (par cette session ou une autre) depuis le numéro `seq`"""
+        with self._lock:
+            return changes_since(self.conn, seq, limit)
+    
+    def get_tasks(self) -> List[Task]:
+        """Toutes les tâches, triées par id"""
+        return self.snapshot().tasks
+    
+    def get_projects(self) -> List[Project]:
+        """Tous les projets triés par date de début"""
+        return self.snapshot().projects
+    
+    def get_availability(self) -> List[Tuple]:
+        """Disponibilités triées par jour : (day_of_week, start_hour, end_hour)"""
+        return self.snapshot().availability
+    
+    def free_time(self) -> FreeTimeCache:
+        """Disponibilités effectives par date (fenêtres fusionnées, exceptions appliquées)"""
+        return self.snapshot().free_time
+    
+    def get_resources(self) -> List[Resource]:
+        """Toutes les ressources, triées par nom"""
+        return self.snapshot().resources
+    
+    def find_resource(self, key: str) -> Optional[Resource]:
+        """Ressource par id ou par nom (sans tenir compte de la casse)"""
+        for resource in self.get_resources():
+            if str(resource.id) == key or resource.name.lower() == key.lower():
+                return resource
+        return None
+    
+    def _resource_name(self, resource_id: int) -> str:
+        for resource in self.get_resources():
+            if resource.id == resource_id:
+                return resource.name
+        return f"#{resource_id}"
+    
+    def _calendar_label(self, resource_id: Optional[int]) -> str:
+        """' for <nom>' pour les messages sur le calendrier d'une ressource"""
+        return "" if resource_id is None else f" for {self._resource_name(resource_id)}"
+    
+    def add_task(self, title: str, duration: int, recurring: bool = False, recurring_days: str = None, recurring_hours: str = None, manual_schedule: str = None, manual_date: str = None, after: List[int] = None, project_id: int = None, resource_id: int = None) -> bool:
+        """Ajoute une nouvelle tâche, planifiée après les tâches `after` si données"""
         # Si c'est une tâche manuelle avec date, formater le scheduled_time
         if manual_schedule and manual_date:
             manual_schedule = f"{manual_date} {manual_schedule}"
         
         try:
-            cursor.execute('''
-                INSERT INTO tasks (title, duration, recurring, recurring_days, recurring_hours, scheduled_time)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (title, duration, recurring, recurring_days, recurring_hours, manual_schedule))
-            
-            conn.commit()
+            with self.transaction() as cursor:
+                if project_id is not None:
+                    cursor.execute('SELECT 1 FROM projects WHERE id = ?', (project_id,))
+                    if cursor.fetchone() is None:
+                        raise ValueError(f"project {project_id} not found")
+                if resource_id is not None:
+                    cursor.execute('SELECT 1 FROM resources WHERE id = ?', (resource_id,))
+                    if cursor.fetchone() is None:
+                        raise ValueError(f"resource {resource_id} not found")
+                cursor.execute('''
+                    INSERT INTO tasks (title, duration, recurring, recurring_days, recurring_hours, scheduled_time, project_id, resource_id, pinned)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (title, duration, recurring, recurring_days, recurring_hours, manual_schedule, project_id, resource_id, bool(manual_schedule) and not recurring))
+                task_id = cursor.lastrowid
+                for depends_on in after or []:
+                    self._add_dependency(cursor, task_id, depends_on)
             
             if recurring:
                 console.print(f"[green]✓[/green] Recurring task added: [bold]{title}[/bold] ({recurring_days} at {recurring_hours})")
@@ -134,253 +167,831 @@ class TaskManager:
                 console.print(f"[green]✓[/green] Task manually scheduled: [bold]{title}[/bold] at {manual_schedule}")
             else:
                 console.print(f"[green]✓[/green] Task added: [bold]{title}[/bold]")
-                
+            if after:
+                console.print(f"  [dim]after {', '.join(f'#{depends_on}' for depends_on in after)}[/dim]")
+            if resource_id is not None:
+                console.print(f"  [dim]assigned to {self._resource_name(resource_id)}[/dim]")
+            return True
         except Exception as e:
             print(f"Error adding task: {e}")
-        finally:
-            conn.close()
+            return False
     
-    def list_tasks(self):
+    def list_tasks(self) -> bool:
         """Affiche toutes les tâches avec Rich"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            self.render_cache.show("list", 0, self._print_task_list)
+            return True
+        except Exception as e:
+            console.print(f"[red]Error listing tasks: {e}[/red]")
+            return False
+    
+    def _print_task_list(self):
+        """Tableau des tâches (rendu mis en cache par list_tasks)"""
+        # Même ordre qu'avant : récurrentes d'abord, puis par id
+        tasks = sorted(self.get_tasks(), key=lambda task: (not task.recurring, task.id))
         
+        if not tasks:
+            console.print("[yellow]No tasks found.[/yellow]")
+            return
+        
+        # Créer un tableau Rich
+        table = Table(title="📋 Task List")
+        table.add_column("ID", style="cyan", width=3)
+        table.add_column("Title", style="magenta", width=15)
+        table.add_column("Duration(h)", style="green", width=12)
+        table.add_column("Done", style="yellow", width=6)
+        table.add_column("Scheduled", style="blue", width=15)
+        table.add_column("Recurring", style="red", width=12)
+        
+        for task in tasks:
+            status = "[green]✓[/green]" if task.completed else "[red]○[/red]"
+            scheduled = task.scheduled_time if task.scheduled_time else "[dim]Not scheduled[/dim]"
+            if task.recurring:
+                recurring_info = f"[green]Yes[/green] ({task.recurring_hours})" if task.recurring_hours else "[green]Yes[/green]"
+            else:
+                recurring_info = "[dim]No[/dim]"
+            
+            table.add_row(
+                str(task.id),
+                task.title[:15],
+                str(task.duration),
+                status,
+                scheduled[:15],
+                recurring_info
+            )
+        
+        console.print(table)
+    
+    def search(self, query: str, limit: int = 20) -> List[SearchResult]:
+        """Recherche plein texte dans les tâches et les projets, classée par pertinence"""
+        with self._lock:
+            return full_text_search(self.conn, query, limit)
+    
+    def task_summary(self) -> TaskSummary:
+        """Compteurs globaux (tâches, heures, taux de complétion) en O(1)"""
+        with self._lock:
+            return stats.task_summary(self.conn)
+    
+    def project_progress(self) -> Dict[int, ProjectProgress]:
+        """Heures prévues et terminées par projet, en une requête groupée"""
+        with self._lock:
+            return stats.project_progress(self.conn)
+    
+    def booked_hours(self, dates) -> Dict:
+        """Heures réservées par date, lues dans les tables de résumé"""
+        with self._lock:
+            return stats.booked_hours(self.conn, dates)
+    
+    def show_search(self, query: str, limit: int = 20) -> bool:
+        """Affiche les résultats d'une recherche avec Rich"""
         try:
-            cursor.execute('''
-                SELECT id, title, duration, completed, scheduled_time, recurring, recurring_hours
-                FROM tasks
-                ORDER BY recurring DESC, id ASC
-            ''')
+            results = self.search(query, limit)
             
-            tasks = cursor.fetchall()
+            if not results:
+                console.print(f"[yellow]No results for '{query}'.[/yellow]")
+                return True
             
-            if not tasks:
-                console.print("[yellow]No tasks found.[/yellow]")
-                return
+            table = Table(title=f"🔍 Search: {query}")
+            table.add_column("Type", style="cyan", width=8)
+            table.add_column("ID", style="cyan", width=4)
+            table.add_column("Title", style="magenta", width=30)
+            table.add_column("Details", style="blue", width=25)
             
-            # Créer un tableau Rich
-            table = Table(title="📋 Task List")
-            table.add_column("ID", style="cyan", width=3)
-            table.add_column("Title", style="magenta", width=15)
-            table.add_column("Duration(h)", style="green", width=12)
-            table.add_column("Done", style="yellow", width=6)
-            table.add_column("Scheduled", style="blue", width=15)
-            table.add_column("Recurring", style="red", width=12)
-            
-            for task in tasks:
-                status = "[green]✓[/green]" if task[3] else "[red]○[/red]"
-                scheduled = task[4] if task[4] else "[dim]Not scheduled[/dim]"
-                if task[5]:  # recurring
-                    recurring_info = f"[green]Yes[/green] ({task[6]})" if task[6] else "[green]Yes[/green]"
-                else:
-                    recurring_info = "[dim]No[/dim]"
-                
-                table.add_row(
-                    str(task[0]),
-                    task[1][:15],
-                    str(task[2]),
-                    status,
-                    scheduled[:15],
-                    recurring_info
-                )
+            for result in results:
+                table.add_row(result.kind.capitalize(), str(result.id), result.title, result.detail)
             
             console.print(table)
-                
+            return True
         except Exception as e:
-            console.print(f"[red]Error listing tasks: {e}[/red]")
-        finally:
-            conn.close()
+            console.print(f"[red]Error searching: {e}[/red]")
+            return False
+    
+    def _add_dependency(self, cursor, task_id: int, depends_on: int) -> bool:
+        """Vérifie que les deux tâches existent, puis ajoute l'arc (détection de cycle incrémentale)"""
+        for existing in (task_id, depends_on):
+            cursor.execute('SELECT 1 FROM tasks WHERE id = ?', (existing,))
+            if cursor.fetchone() is None:
+                raise ValueError(f"task {existing} not found")
+        return dependencies.add_dependency(cursor, task_id, depends_on)
+    
+    def add_dependency(self, task_id: int, depends_on: List[int]) -> bool:
+        """Planifie la tâche après chacune des tâches `depends_on` (refuse les cycles)"""
+        try:
+            added = 0
+            with self.transaction() as cursor:
+                for prerequisite in depends_on:
+                    added += self._add_dependency(cursor, task_id, prerequisite)
+            console.print(f"[green]✓[/green] Task {task_id} now runs after {', '.join(f'#{prerequisite}' for prerequisite in depends_on)} ({added} new link(s))")
+            return True
+        except DependencyCycle as e:
+            console.print(f"[red]✗[/red] Refused, it would create a {e}")
+            return False
+        except Exception as e:
+            print(f"Error adding dependency: {e}")
+            return False
     
-    def delete_task(self, task_id: int):
+    def delete_task(self, task_id: int) -> bool:
         """Supprime une tâche"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+                found = cursor.rowcount > 0
             
-            if cursor.rowcount > 0:
+            if found:
                 console.print(f"[green]✓[/green] Task {task_id} deleted")
             else:
                 console.print(f"[red]✗[/red] Task {task_id} not found")
-            
-            conn.commit()
+            return found
         except Exception as e:
             print(f"Error deleting task: {e}")
-        finally:
-            conn.close()
+            return False
     
-    def complete_task(self, task_id: int):
+    def complete_task(self, task_id: int) -> bool:
         """Marque une tâche comme terminée"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('UPDATE tasks SET completed = TRUE WHERE id = ?', (task_id,))
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    UPDATE tasks SET completed = TRUE, completed_at = datetime('now'), version = version + 1
+                    WHERE id = ?
+                ''', (task_id,))
+                found = cursor.rowcount > 0
             
-            if cursor.rowcount > 0:
+            if found:
                 console.print(f"[green]✓[/green] Task {task_id} marked as done")
             else:
                 console.print(f"[red]✗[/red] Task {task_id} not found")
-            
-            conn.commit()
+            return found
         except Exception as e:
             print(f"Error completing task: {e}")
-        finally:
-            conn.close()
+            return False
     
-    def add_project(self, name: str, start_date: str, end_date: str, description: str = ""):
+    def add_project(self, name: str, start_date: str, end_date: str, description: str = "") -> bool:
         """Ajoute un nouveau projet"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                INSERT INTO projects (name, start_date, end_date, description)
-                VALUES (?, ?, ?, ?)
-            ''', (name, start_date, end_date, description))
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO projects (name, start_date, end_date, description)
+                    VALUES (?, ?, ?, ?)
+                ''', (name, start_date, end_date, description))
             
-            conn.commit()
             print(f"✓ Project added: {name} ({start_date} → {end_date})")
-                
+            return True
         except Exception as e:
             print(f"Error adding project: {e}")
-        finally:
-            conn.close()
+            return False
     
-    def delete_project(self, project_id: int):
+    def delete_project(self, project_id: int) -> bool:
         """Supprime un projet"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+                found = cursor.rowcount > 0
             
-            if cursor.rowcount > 0:
+            if found:
                 print(f"✓ Project {project_id} deleted")
             else:
                 print(f"✗ Project {project_id} not found")
-            
-            conn.commit()
+            return found
         except Exception as e:
             print(f"Error deleting project: {e}")
-        finally:
-            conn.close()
+            return False
     
-    def show_timeline(self):
+    def show_timeline(self) -> bool:
         """Affiche la timeline des projets sur 4 mois avec les IDs"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            self.render_cache.show("timeline", 0, self._print_timeline)
+            return True
+        except Exception as e:
+            print(f"Error showing timeline: {e}")
+            return False
+    
+    def _print_timeline(self):
+        """Timeline des projets (rendu mis en cache par show_timeline)"""
+        projects = self.get_projects()
+        
+        if not projects:
+            print("No projects to display in timeline.")
+            return
+        
+        # Heures terminées / prévues de tous les projets, en une requête
+        progress = self.project_progress()
+        
+        print("\n=== PROJECT TIMELINE (Next 4 Months) ===")
+        
+        # Générer les 4 prochains mois
+        current_date = datetime.now().date()
+        months = []
+        for i in range(4):
+            month_date = current_date.replace(day=1) + timedelta(days=32*i)
+            month_date = month_date.replace(day=1)  # Premier du mois
+            months.append(month_date)
+        
+        # En-tête avec les mois
+        header = "ID │ Project Name        │ Done/Plan  │"
+        month_names = []
+        for month in months:
+            month_name = month.strftime("%b %Y")
+            month_names.append(month_name)
+            header += f" {month_name:8} │"
         
+        print(header)
+        print("─" * len(header))
+        
+        current_year = datetime.now().year
+        
+        # Traiter chaque projet
+        for project in projects:
+            project_id, name, desc = project.id, project.name, project.description
+            try:
+                if project.start is None or project.end is None:
+                    raise ValueError
+                start_month, start_day = project.start
+                end_month, end_day = project.end
+                
+                start_date = datetime(current_year, start_month, start_day).date()
+                end_date = datetime(current_year, end_month, end_day).date()
+                
+                # Si la date de fin est avant le début, considérer l'année suivante
+                if end_date < start_date:
+                    end_date = datetime(current_year + 1, end_month, end_day).date()
+                
+                # Ligne du projet avec ID
+                line = f"{project_id:2} │ {name[:18]:18} │ {progress.get(project_id, NO_PROGRESS).label:10} │"
+                
+                for month in months:
+                    month_start = month
+                    # Dernier jour du mois
+                    if month.month == 12:
+                        month_end = month.replace(year=month.year + 1, month=1, day=1) - timedelta(days=1)
+                    else:
+                        month_end = month.replace(month=month.month + 1, day=1) - timedelta(days=1)
+                    
+                    # Vérifier si le projet chevauche ce mois
+                    if start_date <= month_end and end_date >= month_start:
+                        # Calculer la position dans le mois
+                        overlap_start = max(start_date, month_start)
+                        overlap_end = min(end_date, month_end)
+                        
+                        # Position relative dans le mois (0-8 caractères)
+                        days_in_month = (month_end - month_start).days + 1
+                        start_pos = ((overlap_start - month_start).days / days_in_month) * 8
+                        end_pos = ((overlap_end - month_start).days / days_in_month) * 8
+                        
+                        # Créer la barre visuelle
+                        bar = [' '] * 8
+                        for i in range(int(start_pos), min(8, int(end_pos) + 1)):
+                            if i == int(start_pos):
+                                bar[i] = '├'  # Début
+                            elif i == int(end_pos) or i == 7:
+                                bar[i] = '┤'  # Fin
+                            else:
+                                bar[i] = '─'  # Milieu
+                        
+                        line += f" {''.join(bar)} │"
+                    else:
+                        line += f" {' ':8} │"
+                
+                print(line)
+                if desc:
+                    desc_line = f"   │ {desc[:18]:18} │ {' ':10} │"
+                    for _ in months:
+                        desc_line += f" {' ':8} │"
+                    print(desc_line)
+                
+            except ValueError:
+                continue
+        
+        print(f"\nUse 'delproject <ID>' to delete a project, 'add --project <ID>' to link a task")
+    
+    def add_availability(self, day_of_week: int, start_hour: int, end_hour: int, resource_id: Optional[int] = None) -> bool:
+        """
+        Ajoute une fenêtre de disponibilité hebdomadaire (plusieurs par jour possibles)
+        resource_id : calendrier d'une ressource, None = calendrier par défaut
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO availability (day_of_week, start_hour, end_hour, resource_id)
+                    VALUES (?, ?, ?, ?)
+                ''', (day_of_week, start_hour, end_hour, resource_id))
+            
+            console.print(f"[green]✓[/green] Availability added{self._calendar_label(resource_id)}: {DAY_NAMES[day_of_week]} {start_hour}h-{end_hour}h")
+            return True
+        except Exception as e:
+            print(f"Error adding availability: {e}")
+            return False
+    
+    def remove_availability(self, day_of_week: int, start_hour: Optional[int] = None, resource_id: Optional[int] = None) -> bool:
+        """Supprime les fenêtres d'un jour (ou seulement celle qui commence à start_hour)"""
         try:
-            cursor.execute('''
-                SELECT id, name, start_date, end_date, description
-                FROM projects
-                ORDER BY start_date ASC
-            ''')
+            with self.transaction() as cursor:
+                if start_hour is None:
+                    cursor.execute('DELETE FROM availability WHERE day_of_week = ? AND resource_id IS ?', (day_of_week, resource_id))
+                else:
+                    cursor.execute('DELETE FROM availability WHERE day_of_week = ? AND start_hour = ? AND resource_id IS ?', (day_of_week, start_hour, resource_id))
+                removed = cursor.rowcount
             
-            projects = cursor.fetchall()
+            if removed > 0:
+                console.print(f"[green]✓[/green] {removed} window(s) removed on {DAY_NAMES[day_of_week]}{self._calendar_label(resource_id)}")
+            else:
+                console.print(f"[red]✗[/red] No matching availability on {DAY_NAMES[day_of_week]}{self._calendar_label(resource_id)}")
+            return removed > 0
+        except Exception as e:
+            print(f"Error removing availability: {e}")
+            return False
+    
+    def set_date_exception(self, date_iso: str, windows: List[Tuple[int, int]], resource_id: Optional[int] = None) -> bool:
+        """
+        Remplace les disponibilités d'une date précise
+        Une liste vide = jour off (holiday, congé...)
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM availability_exceptions WHERE date = ? AND resource_id IS ?', (date_iso, resource_id))
+                if windows:
+                    cursor.executemany('''
+                        INSERT INTO availability_exceptions (date, start_hour, end_hour, resource_id)
+                        VALUES (?, ?, ?, ?)
+                    ''', [(date_iso, start, end, resource_id) for start, end in windows])
+                else:
+                    cursor.execute('''
+                        INSERT INTO availability_exceptions (date, start_hour, end_hour, resource_id)
+                        VALUES (?, NULL, NULL, ?)
+                    ''', (date_iso, resource_id))
             
-            if not projects:
-                print("No projects to display in timeline.")
-                return
+            label = self._calendar_label(resource_id)
+            if windows:
+                hours = ", ".join(f"{start}h-{end}h" for start, end in windows)
+                console.print(f"[green]✓[/green] Availability on {date_iso}{label} set to {hours}")
+            else:
+                console.print(f"[green]✓[/green] {date_iso} marked as day off{label}")
+            return True
+        except Exception as e:
+            print(f"Error setting date exception: {e}")
+            return False
+    
+    def clear_date_exception(self, date_iso: str, resource_id: Optional[int] = None) -> bool:
+        """Supprime l'exception d'une date (retour à la semaine type)"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM availability_exceptions WHERE date = ? AND resource_id IS ?', (date_iso, resource_id))
+                found = cursor.rowcount > 0
             
-            print("\n=== PROJECT TIMELINE (Next 4 Months) ===")
+            if found:
+                console.print(f"[green]✓[/green] Exception on {date_iso}{self._calendar_label(resource_id)} removed")
+            else:
+                console.print(f"[red]✗[/red] No exception on {date_iso}{self._calendar_label(resource_id)}")
+            return found
+        except Exception as e:
+            print(f"Error clearing date exception: {e}")
+            return False
+    
+    def show_availability(self, resource_id: Optional[int] = None):
+        """Affiche la semaine type et les exceptions par date d'un calendrier"""
+        snapshot = self.snapshot()
+        free_time = snapshot.free_time_of(resource_id)
+        
+        table = Table(title=f"🕘 Weekly Availability{self._calendar_label(resource_id)}")
+        table.add_column("Day", style="cyan", width=10)
+        table.add_column("Windows", style="green", width=30)
+        table.add_column("Hours", style="yellow", width=6)
+        
+        for day_of_week, day_name in enumerate(DAY_NAMES):
+            windows = free_time.weekly(day_of_week)
+            hours = ", ".join(f"{start}h-{end}h" for start, end in windows.intervals) or "[dim]Off[/dim]"
+            table.add_row(day_name, hours, str(windows.total_hours))
+        
+        console.print(table)
+        
+        exceptions = {}
+        rows = snapshot.exceptions if resource_id is None else snapshot.resource_exceptions.get(resource_id, [])
+        for date_iso, start_hour, end_hour in rows:
+            windows = exceptions.setdefault(date_iso, [])
+            if start_hour is not None and end_hour is not None:
+                windows.append(f"{start_hour}h-{end_hour}h")
+        
+        if exceptions:
+            table = Table(title="📆 Date Exceptions")
+            table.add_column("Date", style="cyan", width=12)
+            table.add_column("Windows", style="green", width=30)
+            for date_iso, windows in exceptions.items():
+                table.add_row(date_iso, ", ".join(windows) or "[red]Day off[/red]")
+            console.print(table)
+    
+    def add_resource(self, name: str) -> bool:
+        """Ajoute une ressource (membre de l'équipe) avec un calendrier vide"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('INSERT INTO resources (name) VALUES (?)', (name,))
+                resource_id = cursor.lastrowid
             
-            # Générer les 4 prochains mois
-            current_date = datetime.now().date()
-            months = []
-            for i in range(4):
-                month_date = current_date.replace(day=1) + timedelta(days=32*i)
-                month_date = month_date.replace(day=1)  # Premier du mois
-                months.append(month_date)
+            console.print(f"[green]✓[/green] Resource added: [bold]{name}[/bold] (#{resource_id})")
+            console.print(f"  [dim]Set its hours with 'availability add DAY WINDOW --resource {name}'[/dim]")
+            return True
+        except sqlite3.IntegrityError:
+            console.print(f"[red]✗[/red] Resource '{name}' already exists")
+            return False
+        except Exception as e:
+            print(f"Error adding resource: {e}")
+            return False
+    
+    def delete_resource(self, resource_id: int) -> bool:
+        """
+        Supprime une ressource et ses disponibilités
+        Ses tâches restent, sans ressource (ON DELETE SET NULL)
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM resources WHERE id = ?', (resource_id,))
+                found = cursor.rowcount > 0
             
-            # En-tête avec les mois
-            header = "ID │ Project Name        │"
-            month_names = []
-            for month in months:
-                month_name = month.strftime("%b %Y")
-                month_names.append(month_name)
-                header += f" {month_name:8} │"
+            if found:
+                console.print(f"[green]✓[/green] Resource {resource_id} deleted")
+            else:
+                console.print(f"[red]✗[/red] Resource {resource_id} not found")
+            return found
+        except Exception as e:
+            print(f"Error deleting resource: {e}")
+            return False
+    
+    def show_resources(self):
+        """Affiche les ressources, leurs heures par semaine et leurs tâches en cours"""
+        snapshot = self.snapshot()
+        if not snapshot.resources:
+            console.print("[yellow]No resources. Add one with 'resource add NAME'.[/yellow]")
+            return
+        
+        open_tasks, open_hours = {}, {}
+        for task in snapshot.tasks:
+            if task.resource_id is not None and not task.completed:
+                open_tasks[task.resource_id] = open_tasks.get(task.resource_id, 0) + 1
+                open_hours[task.resource_id] = open_hours.get(task.resource_id, 0) + task.duration
+        
+        table = Table(title="👥 Resources")
+        table.add_column("ID", style="cyan", width=4)
+        table.add_column("Name", style="magenta", width=16)
+        table.add_column("Hours/week", style="green", justify="right")
+        table.add_column("Open tasks", style="yellow", justify="right")
+        for resource in snapshot.resources:
+            free_time = snapshot.free_time_of(resource.id)
+            weekly = sum(free_time.weekly(day).total_hours for day in range(7))
+            table.add_row(
+                str(resource.id), resource.name, f"{weekly}h",
+                f"{open_tasks.get(resource.id, 0)} ({open_hours.get(resource.id, 0)}h)",
+            )
+        console.print(table)
+    
+    def reset_schedule(self) -> bool:
+        """Remet à zéro la planification"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('UPDATE tasks SET scheduled_time = NULL, pinned = 0, version = version + 1 WHERE scheduled_time IS NOT NULL')
             
-            print(header)
-            print("─" * len(header))
+            print("✓ Schedule reset")
+            return True
+        except Exception as e:
+            print(f"Error resetting schedule: {e}")
+            return False
+    
+    def list_archived(self) -> bool:
+        """Affiche les tâches archivées avec Rich"""
+        try:
+            with self._lock:
+                rows = self.conn.execute('''
+                    SELECT id, title, duration, completed_at, archived_at
+                    FROM tasks_archive ORDER BY id ASC
+                ''').fetchall()
             
-            current_year = datetime.now().year
+            if not rows:
+                console.print("[yellow]No archived tasks.[/yellow]")
+                return True
             
-            # Traiter chaque projet
-            for project_id, name, start_str, end_str, desc in projects:
-                try:
-                    start_month, start_day = map(int, start_str.split('/'))
-                    end_month, end_day = map(int, end_str.split('/'))
-                    
-                    start_date = datetime(current_year, start_month, start_day).date()
-                    end_date = datetime(current_year, end_month, end_day).date()
-                    
-                    # Si la date de fin est avant le début, considérer l'année suivante
-                    if end_date < start_date:
-                        end_date = datetime(current_year + 1, end_month, end_day).date()
-                    
-                    # Ligne du projet avec ID
-                    line = f"{project_id:2} │ {name[:18]:18} │"
-                    
-                    for month in months:
-                        month_start = month
-                        # Dernier jour du mois
-                        if month.month == 12:
-                            month_end = month.replace(year=month.year + 1, month=1, day=1) - timedelta(days=1)
-                        else:
-                            month_end = month.replace(month=month.month + 1, day=1) - timedelta(days=1)
-                        
-                        # Vérifier si le projet chevauche ce mois
-                        if start_date <= month_end and end_date >= month_start:
-                            # Calculer la position dans le mois
-                            overlap_start = max(start_date, month_start)
-                            overlap_end = min(end_date, month_end)
-                            
-                            # Position relative dans le mois (0-8 caractères)
-                            days_in_month = (month_end - month_start).days + 1
-                            start_pos = ((overlap_start - month_start).days / days_in_month) * 8
-                            end_pos = ((overlap_end - month_start).days / days_in_month) * 8
-                            
-                            # Créer la barre visuelle
-                            bar = [' '] * 8
-                            for i in range(int(start_pos), min(8, int(end_pos) + 1)):
-                                if i == int(start_pos):
-                                    bar[i] = '├'  # Début
-                                elif i == int(end_pos) or i == 7:
-                                    bar[i] = '┤'  # Fin
-                                else:
-                                    bar[i] = '─'  # Milieu
-                            
-                            line += f" {''.join(bar)} │"
-                        else:
-                            line += f" {' ':8} │"
-                    
-                    print(line)
-                    if desc:
-                        desc_line = f"   │ {desc[:18]:18} │"
-                        for _ in months:
-                            desc_line += f" {' ':8} │"
-                        print(desc_line)
-                    
-                except ValueError:
-                    continue
+            table = Table(title="🗄️ Archived Tasks")
+            table.add_column("ID", style="cyan", width=5)
+            table.add_column("Title", style="magenta", width=25)
+            table.add_column("Duration(h)", style="green", width=12)
+            table.add_column("Completed", style="blue", width=12)
+            table.add_column("Archived", style="dim", width=12)
+            
+            for task_id, title, duration, completed_at, archived_at in rows:
+                table.add_row(str(task_id), title[:25], str(duration), (completed_at or "?")[:10], archived_at[:10])
+            
+            console.print(table)
+            return True
+        except Exception as e:
+            console.print(f"[red]Error listing archived tasks: {e}[/red]")
+            return False
+    
+    def export_ics(self, path: Optional[str] = None, include_archive: bool = True) -> int:
+        """
+        Écrit le planning au format iCalendar, en flux (fichier ou sortie standard)
+        Retourne le nombre d'événements exportés.
+        """
+        events = 0
+        with self._lock:
+            out = open(path, "w", encoding="utf-8", newline="") if path else sys.stdout
+            try:
+                for chunk in calendar_lines(self.conn, include_archive):
+                    events += chunk.startswith("BEGIN:VEVENT")
+                    out.write(chunk)
+            finally:
+                if path:
+                    out.close()
+        return events
+    
+    def export_snapshot(self, path: str, weeks: int = 4) -> Tuple[int, int, int, int]:
+        """
+        Écrit un snapshot colonnaire en lecture seule (voir planit.core.columnar)
+        Retourne (tâches, projets, créneaux résolus, taille en octets).
+        """
+        with self._lock:
+            # Compteur lu avant les données : au pire le fichier paraît plus ancien qu'il n'est
+            writes = change_count(self.conn)
+            snapshot = self.snapshot()
+        slots, size = write_snapshot(path, snapshot, writes, weeks)
+        return len(snapshot.tasks), len(snapshot.projects), slots, size
+    
+    def import_ics(self, path: str) -> bool:
+        """
+        Importe un fichier .ics, lu ligne par ligne, par lots de IMPORT_BATCH_SIZE
+        VEVENT -> tâche datée, RRULE hebdomadaire simple -> tâche récurrente.
+        Un UID déjà importé (même archivé) est ignoré : réimporter ne duplique rien.
+        Idem pour l'UID d'une tâche exportée par cette base, tant qu'elle existe.
+        """
+        try:
+            started = time.perf_counter()
+            projects = {project.name: project.id for project in self.get_projects()}
+            with self._lock:
+                tag = calendar_tag(self.conn)
+            skipped: Dict[str, int] = {}
+            read = inserted = 0
+            with open(path, encoding="utf-8", newline="") as source:
+                for batch in batches(import_rows(source, projects, skipped, tag)):
+                    # Une transaction par lot : mémoire bornée, verrou rendu entre deux lots
+                    with self.transaction() as cursor:
+                        cursor.executemany(IMPORT_INSERT, batch)
+                        inserted += cursor.rowcount
+                    read += len(batch)
             
-            print(f"\nUse 'delproject <ID>' to delete a project")
+            elapsed = time.perf_counter() - started
+            console.print(f"[green]✓[/green] Imported {inserted} task(s) from {path} in {elapsed:.2f}s")
+            if read > inserted:
+                console.print(f"  [dim]{read - inserted} already imported (same UID)[/dim]")
+            if skipped:
+                details = ", ".join(f"{count} {reason}" for reason, count in sorted(skipped.items()))
+                console.print(f"  [yellow]⚠[/yellow] Skipped {sum(skipped.values())} event(s): {details}")
+            return True
+        except Exception as e:
+            print(f"Error importing calendar: {e}")
+            return False
+    
+    def maintain(self, days: int = 30, vacuum: bool = False) -> bool:
+        """
+        Archive les tâches terminées depuis plus de `days` jours, puis
+        met à jour les statistiques de l'optimiseur (et compacte si demandé)
+        """
+        try:
+            with self._lock:
+                # VACUUM et ANALYZE hors de toute transaction en attente
+                self.flush()
+                size_before, _ = maintenance.database_size(self.conn)
+                hot_before = maintenance.time_hot_queries(self.conn)
+                
+                with self.transaction() as cursor:
+                    archived = maintenance.archive_completed(cursor, days)
+                self.flush()
                 
+                full_vacuum = maintenance.optimize(self.conn, vacuum)
+                size_after, free_after = maintenance.database_size(self.conn)
+                hot_after = maintenance.time_hot_queries(self.conn)
+            
+            console.print(f"[green]✓[/green] {archived} completed task(s) archived (done more than {days} day(s) ago)")
+            console.print("[green]✓[/green] ANALYZE and PRAGMA optimize done, search indexes merged")
+            if vacuum:
+                mode = "full VACUUM (incremental mode enabled)" if full_vacuum else "incremental VACUUM"
+                console.print(f"[green]✓[/green] {mode}")
+            
+            reclaimed = size_before - size_after
+            if reclaimed >= 0:
+                change = f"[green]{reclaimed / 1024:.0f} KiB reclaimed[/green]"
+            else:
+                change = f"[yellow]+{-reclaimed / 1024:.0f} KiB, archived rows stay in the file[/yellow]"
+            console.print(f"Database: {size_before / 1024:.0f} KiB → {size_after / 1024:.0f} KiB ({change})")
+            if free_after:
+                console.print(f"[dim]{free_after / 1024:.0f} KiB free inside the file (use --vacuum to release it)[/dim]")
+            speedup = hot_before / hot_after if hot_after else 1.0
+            console.print(f"Hot queries: {hot_before:.2f} ms → {hot_after:.2f} ms (x{speedup:.1f})")
+            return True
         except Exception as e:
-            print(f"Error showing timeline: {e}")
-        finally:
-            conn.close()
+            print(f"Error during maintenance: {e}")
+            return False
     
-    def reset_schedule(self):
-        """Remet à zéro la planification"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    # --- Transactions et écritures groupées ---
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Curseur d'écriture sur la connexion partagée
         
-        cursor.execute('UPDATE tasks SET scheduled_time = NULL')
-        conn.commit()
-        conn.close()
+        Hors batch : BEGIN IMMEDIATE ... COMMIT (ROLLBACK en cas d'erreur).
+        En batch : l'opération est un SAVEPOINT dans la transaction ouverte ;
+        une fois réussie, ses requêtes sont ajoutées au journal, et le commit
+        a lieu au prochain flush.
+        """
+        with self._lock:
+            if self._transaction_depth > 0:
+                # Appel imbriqué : fait partie de l'opération englobante
+                self._transaction_depth += 1
+                try:
+                    yield self._current_cursor
+                finally:
+                    self._transaction_depth -= 1
+                    # Les lectures suivantes, dans la même transaction, doivent voir cette écriture
+                    self.read_model.invalidate()
+                return
+            
+            if self._batch is None:
+                cursor = self.conn.cursor()
+                self._begin()
+            else:
+                statements = []
+                cursor = JournalingCursor(self.conn.cursor(), statements)
+                if not self.conn.in_transaction:
+                    self._begin()
+                self.conn.execute("SAVEPOINT planit_op")
+            
+            self._transaction_depth = 1
+            self._current_cursor = cursor
+            try:
+                yield cursor
+            except BaseException:
+                if self._batch is None:
+                    self.conn.execute("ROLLBACK")
+                else:
+                    self.conn.execute("ROLLBACK TO planit_op")
+                    self.conn.execute("RELEASE planit_op")
+                raise
+            else:
+                if self._batch is None:
+                    self.conn.execute("COMMIT")
+                else:
+                    self.conn.execute("RELEASE planit_op")
+                    self._batch_record(statements)
+            finally:
+                self._transaction_depth = 0
+                self._current_cursor = None
+                self.read_model.invalidate()
+    
+    def _begin(self):
+        """
+        BEGIN IMMEDIATE : prend le verrou d'écriture avant toute lecture, donc
+        ce qu'une opération lit reste vrai jusqu'à son COMMIT, et SQLite ne
+        peut plus renvoyer BUSY en cours de transaction. Au-delà de
+        BUSY_TIMEOUT, nouvelles tentatives avec un délai exponentiel aléatoire.
+        """
+        for attempt in range(BUSY_RETRIES):
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt == BUSY_RETRIES - 1:
+                    raise
+                time.sleep(BUSY_BACKOFF * (2 ** attempt) * (1 + random.random()))
+    
+    def update_task(self, task_id: int, expected_version: int, **changes) -> bool:
+        """
+        Modifie une tâche seulement si elle n'a pas changé depuis sa lecture
+        (verrouillage optimiste). Retourne False si une autre session l'a
+        modifiée entre-temps : relire la tâche et recommencer.
+        """
+        unknown = set(changes) - set(TASK_UPDATABLE)
+        if not changes or unknown:
+            raise ValueError(f"Cannot update task column(s): {', '.join(sorted(unknown))}")
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        with self.transaction() as cursor:
+            cursor.execute(f'''
+                UPDATE tasks SET {assignments}, version = version + 1
+                WHERE id = ? AND version = ?
+            ''', (*changes.values(), task_id, expected_version))
+            return cursor.rowcount > 0
+    
+    def begin_batch(self, max_writes: int = 50, max_delay: float = 1.0):
+        """
+        Groupe les écritures suivantes dans une seule transaction
+        
+        Flush (COMMIT) tous les max_writes opérations, max_delay secondes après
+        la première écriture en attente, ou sur flush()/end_batch(). Chaque
+        opération acquittée est d'abord écrite dans le journal (avec fsync).
+        """
+        with self._lock:
+            if self._batch is not None:
+                return
+            self._batch = {
+                "max_writes": max_writes,
+                "max_delay": max_delay,
+                "pending": 0,
+                "timer": None,
+            }
+    
+    def _batch_record(self, statements):
+        """Journalise une opération réussie et déclenche le flush si besoin"""
+        batch = self._batch
+        if not statements:
+            return
+        self._journal_seq += 1
+        self.journal.append(self._journal_seq, statements)
+        batch["pending"] += 1
         
-        print("✓ Schedule reset")
\ No newline at end of file
+        if batch["pending"] >= batch["max_writes"]:
+            self.flush()
+        elif batch["timer"] is None:
+            batch["timer"] = threading.Timer(batch["max_delay"], self.flush)
+            batch["timer"].daemon = True
+            batch["timer"].start()
+    
+    def flush(self):
+        """Commit les écritures en attente du batch, puis vide le journal"""
+        with self._lock:
+            batch = self._batch
+            if batch is None:
+                return
+            if batch["timer"] is not None:
+                batch["timer"].cancel()
+                batch["timer"] = None
+            if self.conn.in_transaction:
+                # Le numéro de séquence est commité avec les données
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO journal_sessions (name, last_seq) VALUES (?, ?)',
+                    (self.journal.name, self._journal_seq),
+                )
+                self.conn.execute("COMMIT")
+            self.journal.truncate()
+            batch["pending"] = 0
+    
+    def end_batch(self):
+        """Flush puis revient au commit immédiat"""
+        with self._lock:
+            self.flush()
+            self._batch = None
+    
+    def _journal_committed_seq(self, name: str, legacy: bool) -> int:
+        """Dernier numéro commité d'un journal (à lire dans la transaction de reprise)"""
+        if legacy:
+            row = self.conn.execute('SELECT last_seq FROM journal_state WHERE id = 1').fetchone()
+        else:
+            row = self.conn.execute('SELECT last_seq FROM journal_sessions WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+    
+    def recover_journal(self):
+        """
+        Rejoue les opérations acquittées mais non commitées des sessions mortes
+        
+        Le journal d'une session vivante (batch ouvert ailleurs) n'est jamais
+        touché. Le fichier et le dernier numéro commité sont relus après
+        BEGIN IMMEDIATE : deux processus qui reprennent le même journal
+        s'exécutent l'un après l'autre, et le second ne rejoue rien.
+        Un journal dont les ids ne tiennent plus (voir journal.replay) est
+        annulé en entier et mis de côté, sans rien écrire.
+        """
+        recovered = 0
+        for path in orphan_journals(self.db_path):
+            journal = WriteJournal(path)
+            legacy = path == f"{self.db_path}.planit-journal"
+            with self._lock:
+                self._begin()
+                try:
+                    last_seq = self._journal_committed_seq(journal.name, legacy)
+                    entries = [(seq, statements) for seq, statements in journal.entries() if seq > last_seq]
+                    replay(self.conn, [statement for _seq, statements in entries for statement in statements])
+                    if entries:
+                        if legacy:
+                            self.conn.execute('UPDATE journal_state SET last_seq = ? WHERE id = 1', (entries[-1][0],))
+                        else:
+                            self.conn.execute(
+                                'INSERT OR REPLACE INTO journal_sessions (name, last_seq) VALUES (?, ?)',
+                                (journal.name, entries[-1][0]),
+                            )
+                    self.conn.execute("COMMIT")
+                except ReplayConflict as e:
+                    self.conn.execute("ROLLBACK")
+                    console.print(f"[red]✗[/red] Write journal not recovered: {e}")
+                    console.print(f"  [dim]Its operations were kept in {journal.set_aside()}[/dim]")
+                    continue
+                except Exception:
+                    self.conn.execute("ROLLBACK")
+                    raise
+            journal.truncate()
+            recovered += len(entries)
+        if recovered:
+            self.read_model.invalidate()
+            console.print(f"[yellow]⚠[/yellow] Recovered {recovered} operation(s) from the write journal")
+    
+    def close(self):
+        """Flush les écritures en attente et ferme la connexion"""
+        self.end_batch()
+        self.journal.close()
+        if self._journal_seq:
+            # Journal vide et supprimé : sa ligne ne sert plus à aucune reprise
+            with self._lock:
+                self.conn.execute('DELETE FROM journal_sessions WHERE name = ?', (self.journal.name,))
+        self.conn.close()
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""
+Task dependencies for PlanIt: incremental cycle detection and topological order
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+# Arc depends_on -> task_id : task_id ne commence qu'après la fin de depends_on.
+# dependency_order garde un ordre topologique des tâches qui ont des arcs
+# (algorithme de Pearce-Kelly) : un nouvel arc qui respecte déjà l'ordre est
+# accepté en O(1), sinon seule la zone entre les deux positions est explorée.
+# Une tâche entre dans l'ordre à la position de son id : les positions restent
+# distinctes (une réorganisation ne fait que permuter celles de la zone) et
+# `add --after`, qui fait toujours dépendre une tâche récente d'une plus
+# ancienne, respecte l'ordre d'emblée.
+DEPENDENCY_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS task_dependencies (
+        task_id INTEGER NOT NULL,
+        depends_on INTEGER NOT NULL,
+        PRIMARY KEY (task_id, depends_on)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_task_dependencies_depends_on ON task_dependencies(depends_on, task_id)",
+    '''
+    CREATE TABLE IF NOT EXISTS dependency_order (
+        task_id INTEGER PRIMARY KEY,
+        position INTEGER NOT NULL
+    )
+    ''',
+    # Tâche supprimée (ou archivée) : ses arcs disparaissent avec elle
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_dependencies_delete AFTER DELETE ON tasks BEGIN
+        DELETE FROM task_dependencies WHERE task_id = old.id OR depends_on = old.id;
+        DELETE FROM dependency_order WHERE task_id = old.id;
+    END
+    ''',
+]
+
+
+class DependencyCycle(Exception):
+    """L'arc demandé fermerait un cycle ; path va de la tâche à elle-même"""
+
+    def __init__(self, path: List[int]):
+        super().__init__("dependency cycle: " + " → ".join(f"#{task_id}" for task_id in path))
+        self.path = path
+
+
+def create_dependency_tables(cursor):
+    for statement in DEPENDENCY_SCHEMA:
+        cursor.execute(statement)
+
+
+def _position(cursor, task_id: int) -> int:
+    """Position de la tâche dans l'ordre topologique (son id si elle n'y est pas encore)"""
+    cursor.execute("INSERT OR IGNORE INTO dependency_order (task_id, position) VALUES (?, ?)", (task_id, task_id))
+    cursor.execute("SELECT position FROM dependency_order WHERE task_id = ?", (task_id,))
+    return cursor.fetchone()[0]
+
+
+def _explore(cursor, start: int, sql: str, bound: int) -> Dict[int, Tuple[int, int]]:
+    """Parcours en profondeur borné : {tâche: (position, parent)}"""
+    cursor.execute("SELECT position FROM dependency_order WHERE task_id = ?", (start,))
+    seen = {start: (cursor.fetchone()[0], None)}
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        cursor.execute(sql, (node, bound))
+        for neighbour, position in cursor.fetchall():
+            if neighbour not in seen:
+                seen[neighbour] = (position, node)
+                stack.append(neighbour)
+    return seen
+
+
+def add_dependency(cursor, task_id: int, depends_on: int) -> bool:
+    """
+    Ajoute l'arc depends_on -> task_id ; appelé dans la transaction d'écriture
+    Retourne False si l'arc existait déjà, lève DependencyCycle s'il fermerait un cycle.
+    """
+    if task_id == depends_on:
+        raise DependencyCycle([task_id, task_id])
+    cursor.execute(
+        "SELECT 1 FROM task_dependencies WHERE task_id = ? AND depends_on = ?", (task_id, depends_on)
+    )
+    if cursor.fetchone():
+        return False
+
+    before = _position(cursor, depends_on)
+    after = _position(cursor, task_id)
+    if before > after:
+        # Successeurs de task_id placés avant depends_on : si depends_on en fait
+        # partie, il dépend déjà (transitivement) de task_id
+        forward = _explore(cursor, task_id, '''
+            SELECT d.task_id, o.position FROM task_dependencies d
+            JOIN dependency_order o ON o.task_id = d.task_id
+            WHERE d.depends_on = ? AND o.position <= ?
+        ''', before)
+        if depends_on in forward:
+            path = [depends_on]
+            while path[-1] != task_id:
+                path.append(forward[path[-1]][1])
+            path.reverse()
+            raise DependencyCycle([depends_on] + path)
+
+        # Prédécesseurs de depends_on placés après task_id
+        backward = _explore(cursor, depends_on, '''
+            SELECT d.depends_on, o.position FROM task_dependencies d
+            JOIN dependency_order o ON o.task_id = d.depends_on
+            WHERE d.task_id = ? AND o.position >= ?
+        ''', after)
+
+        # Réordonne la zone : prédécesseurs puis successeurs, sur les mêmes positions
+        by_position = lambda nodes: sorted(nodes, key=lambda node: nodes[node][0])
+        nodes = by_position(backward) + by_position(forward)
+        positions = sorted(position for position, _ in list(backward.values()) + list(forward.values()))
+        cursor.executemany(
+            "UPDATE dependency_order SET position = ? WHERE task_id = ?", list(zip(positions, nodes))
+        )
+
+    cursor.execute("INSERT INTO task_dependencies (task_id, depends_on) VALUES (?, ?)", (task_id, depends_on))
+    return True
+
+
+def topological_order(tasks: Sequence, prerequisites: Dict[int, List[int]]) -> Tuple[List, List]:
+    """
+    Ordonne des tâches pour que chacune passe après ses prérequis (parmi `tasks`)
+
+    Algorithme de Kahn en O(V + E log V) : à chaque étape, la tâche prête qui
+    vient en premier dans `tasks` (ordre de la stratégie) passe d'abord.
+    Retourne (tâches ordonnées, tâches prises dans un cycle).
+    """
+    rank = {task.id: i for i, task in enumerate(tasks)}
+    waiting = [0] * len(tasks)
+    dependents: Dict[int, List[int]] = {}
+    for task in tasks:
+        for prerequisite in prerequisites.get(task.id, ()):
+            if prerequisite in rank:
+                waiting[rank[task.id]] += 1
+                dependents.setdefault(prerequisite, []).append(rank[task.id])
+
+    ready = [i for i, count in enumerate(waiting) if count == 0]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        i = heapq.heappop(ready)
+        ordered.append(tasks[i])
+        for j in dependents.get(tasks[i].id, ()):
+            waiting[j] -= 1
+            if waiting[j] == 0:
+                heapq.heappush(ready, j)
+
+    if len(ordered) == len(tasks):
+        return ordered, []
+    placed: Set[int] = {task.id for task in ordered}
+    return ordered, [task for task in tasks if task.id not in placed]
+
+
+def prerequisites_map(edges: Iterable[Tuple[int, int]]) -> Dict[int, List[int]]:
+    """{tâche: [prérequis]} à partir des arcs (task_id, depends_on)"""
+    prerequisites: Dict[int, List[int]] = {}
+    for task_id, depends_on in edges:
+        prerequisites.setdefault(task_id, []).append(depends_on)
+    return prerequisites
@@ -0,0 +1,522 @@
+"""
+iCalendar (RFC 5545) export and import for PlanIt, streamed row by row
+"""
+
+import re
+import uuid
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from planit.core.models import DAY_NAMES, DAYS_SHORT, Task, days_from_mask, format_scheduled_time, ALL_DAYS_MASK
+
+PRODID = "-//PlanIt//PlanIt Task Manager//EN"
+UID_DOMAIN = "planit"
+# UID d'une tâche native : task-<id>.<étiquette de la base>@planit
+NATIVE_UID = re.compile(rf"task-(\d+)\.([0-9a-f]+)@{UID_DOMAIN}")
+# Codes BYDAY (RFC 5545) dans l'ordre de DAY_NAMES
+ICS_DAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+MAX_LINE_OCTETS = 75
+
+# Tâches actives puis archivées, avec le nom du projet (une seule passe, curseur en flux)
+EXPORT_QUERY = '''
+    SELECT t.id, t.title, t.duration, t.completed, t.scheduled_time, t.recurring,
+           t.recurring_days, t.recurring_hours, t.version, t.project_id, p.name, t.ics_uid
+    FROM tasks t LEFT JOIN projects p ON p.id = t.project_id
+    WHERE t.scheduled_time IS NOT NULL OR t.recurring
+'''
+EXPORT_ARCHIVE_QUERY = '''
+    SELECT a.id, a.title, a.duration, a.completed, a.scheduled_time, a.recurring,
+           a.recurring_days, a.recurring_hours, 0, a.project_id, p.name, a.ics_uid
+    FROM tasks_archive a LEFT JOIN projects p ON p.id = a.project_id
+    WHERE a.scheduled_time IS NOT NULL OR a.recurring
+'''
+
+
+def create_calendar_identity(cursor):
+    """Étiquette aléatoire de la base, tirée une fois : elle distingue ses UIDs de ceux d'une autre base"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS calendar_identity (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            tag TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO calendar_identity (id, tag) VALUES (1, ?)', (uuid.uuid4().hex[:12],))
+
+
+def calendar_tag(conn) -> str:
+    return conn.execute("SELECT tag FROM calendar_identity WHERE id = 1").fetchone()[0]
+
+
+def native_uid(task_id: int, tag: str) -> str:
+    return f"task-{task_id}.{tag}@{UID_DOMAIN}"
+
+
+def native_task_id(uid: str, tag: Optional[str]) -> Optional[int]:
+    """Id de la tâche si l'UID a été exporté par cette base (étiquette `tag`), sinon None"""
+    match = NATIVE_UID.fullmatch(uid)
+    if match is None or match.group(2) != tag:
+        return None
+    return int(match.group(1))
+
+
+def escape_text(value: str) -> str:
+    """Échappe une valeur TEXT (antislash, virgule, point-virgule, retour à la ligne)"""
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def fold(line: str) -> str:
+    """Replie une ligne de contenu à 75 octets (UTF-8), terminée par CRLF"""
+    # Au plus 4 octets par caractère : pas besoin d'encoder les lignes courtes
+    if len(line) * 4 <= MAX_LINE_OCTETS:
+        return line + "\r\n"
+    encoded = line.encode("utf-8")
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line + "\r\n"
+    parts, start, limit = [], 0, MAX_LINE_OCTETS
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Ne coupe pas au milieu d'un caractère multi-octets
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        start, limit = end, MAX_LINE_OCTETS - 1
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def resolve_date(day_name: str, day_month: str, today: date) -> Optional[date]:
+    """
+    Date complète d'un créneau 'Monday' + '19/10' (l'année n'est pas stockée) :
+    l'année proche d'aujourd'hui où ce jour tombe bien ce jour de la semaine
+    """
+    try:
+        day, month = map(int, day_month.split("/"))
+    except ValueError:
+        return None
+    weekday = DAY_NAMES.index(day_name) if day_name in DAY_NAMES else None
+    candidates = []
+    for year in (today.year, today.year + 1, today.year - 1):
+        try:
+            candidates.append(date(year, month, day))
+        except ValueError:
+            continue
+    for candidate in candidates:
+        if weekday is None or candidate.weekday() == weekday:
+            return candidate
+    return candidates[0] if candidates else None
+
+
+def _first_occurrence(mask: int, week_start: date) -> date:
+    """Premier jour du masque dans la semaine qui commence à week_start (lundi)"""
+    return week_start + timedelta(days=days_from_mask(mask)[0])
+
+
+def _local_time(day: date, hour: int) -> str:
+    """DATE-TIME local flottant ; 24h devient minuit le lendemain"""
+    if hour >= 24:
+        day, hour = day + timedelta(days=1), hour - 24
+    return f"{day.year:04d}{day.month:02d}{day.day:02d}T{hour:02d}0000"
+
+
+def _rrule(mask: int) -> str:
+    if mask == ALL_DAYS_MASK:
+        return "RRULE:FREQ=DAILY"
+    return "RRULE:FREQ=WEEKLY;BYDAY=" + ",".join(ICS_DAYS[day] for day in days_from_mask(mask))
+
+
+class EventWriter:
+    """
+    Construit le texte VEVENT d'une tâche
+    Les dates résolues ('Monday' + '19/10' -> date) sont mémorisées :
+    beaucoup de tâches partagent les mêmes jours.
+    """
+
+    def __init__(self, today: date, dtstamp: str, tag: str):
+        self.today = today
+        self.tag = tag
+        self.week_start = today - timedelta(days=today.weekday())
+        self.dtstamp = dtstamp
+        self._dates = {}
+
+    def _date(self, day_name: str, day_month: str) -> Optional[date]:
+        key = (day_name, day_month)
+        if key not in self._dates:
+            self._dates[key] = resolve_date(day_name, day_month, self.today)
+        return self._dates[key]
+
+    def event(self, task: Task, project: Optional[str], uid: Optional[str] = None) -> str:
+        """
+        VEVENT replié (CRLF) d'une tâche, '' si elle n'occupe aucun créneau
+        Récurrente ou créneau hebdomadaire non daté : un seul VEVENT avec RRULE.
+        Les heures sont en temps local flottant, comme dans PlanIt.
+        Une tâche importée garde l'UID de son calendrier d'origine.
+        """
+        if not task.is_placed or task.end_hour <= task.start_hour:
+            return ""
+        if task.scheduled_date is not None and not task.recurring:
+            start_day = self._date(task.scheduled_time.split(" ", 1)[0], task.scheduled_date)
+            if start_day is None:
+                return ""
+            rule = ""
+        else:
+            start_day = _first_occurrence(task.weekday_mask, self.week_start)
+            rule = _rrule(task.weekday_mask) + "\r\n"
+
+        text = (
+            f"BEGIN:VEVENT\r\n" + fold(f"UID:{uid or native_uid(task.id, self.tag)}") + f"DTSTAMP:{self.dtstamp}\r\n"
+            f"DTSTART:{_local_time(start_day, task.start_hour)}\r\n"
+            f"DTEND:{_local_time(start_day, task.end_hour)}\r\n{rule}"
+            + fold(f"SUMMARY:{escape_text(task.title)}")
+        )
+        if project:
+            text += fold(f"CATEGORIES:{escape_text(project)}")
+        if task.completed:
+            text += "X-PLANIT-COMPLETED:TRUE\r\n"
+        return text + "END:VEVENT\r\n"
+
+
+def calendar_lines(conn, include_archive: bool = True, today: Optional[date] = None) -> Iterator[str]:
+    """
+    VCALENDAR complet, en morceaux : l'en-tête, un VEVENT par tâche, la fin
+    Les lignes sont lues par le curseur au fil de l'eau : mémoire constante,
+    temps linéaire en nombre de tâches.
+    """
+    writer = EventWriter(
+        today or datetime.now().date(), datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"), calendar_tag(conn),
+    )
+    yield f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\n"
+
+    queries = [EXPORT_QUERY] + ([EXPORT_ARCHIVE_QUERY] if include_archive else [])
+    for query in queries:
+        for row in conn.execute(query):
+            event = writer.event(Task(*row[:10]), row[10], row[11])
+            if event:
+                yield event
+
+    yield "END:VCALENDAR\r\n"
+
+
+# --- Import ---------------------------------------------------------------
+
+IMPORT_BATCH_SIZE = 1000
+
+# Dédoublonnage par UID, tâches actives et archivées (index sur ics_uid).
+# Un UID exporté par cette base vise directement sa tâche (id, NULL sinon) :
+# réimporter son propre export ne recrée rien tant que la tâche existe.
+# Pas de INSERT OR IGNORE : un insert ignoré consomme quand même un id
+# AUTOINCREMENT, et chaque réimport ferait avancer la séquence.
+IMPORT_INSERT = '''
+    INSERT INTO tasks
+        (title, duration, completed, scheduled_time, recurring, recurring_days, recurring_hours, project_id, ics_uid, pinned)
+    SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+    WHERE NOT EXISTS (SELECT 1 FROM tasks WHERE ics_uid = ?)
+      AND NOT EXISTS (SELECT 1 FROM tasks_archive WHERE ics_uid = ?)
+      AND NOT EXISTS (SELECT 1 FROM tasks WHERE id = ?)
+      AND NOT EXISTS (SELECT 1 FROM tasks_archive WHERE id = ?)
+'''
+
+# Noms de fuseaux Windows (exports Outlook / Exchange) -> noms IANA
+WINDOWS_ZONES = {
+    "UTC": "UTC",
+    "GMT Standard Time": "Europe/London",
+    "Greenwich Standard Time": "Atlantic/Reykjavik",
+    "W. Europe Standard Time": "Europe/Berlin",
+    "Romance Standard Time": "Europe/Paris",
+    "Central Europe Standard Time": "Europe/Budapest",
+    "Central European Standard Time": "Europe/Warsaw",
+    "E. Europe Standard Time": "Europe/Chisinau",
+    "FLE Standard Time": "Europe/Kiev",
+    "GTB Standard Time": "Europe/Bucharest",
+    "Russian Standard Time": "Europe/Moscow",
+    "Morocco Standard Time": "Africa/Casablanca",
+    "South Africa Standard Time": "Africa/Johannesburg",
+    "Arabian Standard Time": "Asia/Dubai",
+    "India Standard Time": "Asia/Kolkata",
+    "China Standard Time": "Asia/Shanghai",
+    "Singapore Standard Time": "Asia/Singapore",
+    "Tokyo Standard Time": "Asia/Tokyo",
+    "AUS Eastern Standard Time": "Australia/Sydney",
+    "New Zealand Standard Time": "Pacific/Auckland",
+    "Eastern Standard Time": "America/New_York",
+    "Central Standard Time": "America/Chicago",
+    "Mountain Standard Time": "America/Denver",
+    "US Mountain Standard Time": "America/Phoenix",
+    "Pacific Standard Time": "America/Los_Angeles",
+    "Alaskan Standard Time": "America/Anchorage",
+    "Hawaiian Standard Time": "Pacific/Honolulu",
+    "Atlantic Standard Time": "America/Halifax",
+    "E. South America Standard Time": "America/Sao_Paulo",
+    "Argentina Standard Time": "America/Buenos_Aires",
+}
+
+
+def unescape_text(value: str) -> str:
+    """Inverse de escape_text"""
+    if "\\" not in value:
+        return value
+    out, chars = [], iter(value)
+    for char in chars:
+        if char == "\\":
+            char = next(chars, "")
+            out.append("\n" if char in "nN" else char)
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def unfold(lines: Iterable[str]) -> Iterator[str]:
+    """Lignes logiques : une ligne qui commence par un espace ou une tabulation continue la précédente"""
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_line(line: str) -> Tuple[str, Dict[str, str], str]:
+    """'DTSTART;TZID=Europe/Paris:20261019T090000' -> ('DTSTART', {'TZID': ...}, valeur)"""
+    # Le premier ':' hors guillemets sépare nom/paramètres et valeur
+    split = line.find(":")
+    if split < 0:
+        split = len(line)
+    elif '"' in line[:split]:
+        quoted = False
+        for i, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char == ":" and not quoted:
+                split = i
+                break
+    head, value = line[:split], line[split + 1:]
+    if ";" not in head:
+        return head.upper(), {}, value
+    name, *params = head.split(";")
+    parameters = {}
+    for param in params:
+        key, _, param_value = param.partition("=")
+        parameters[key.upper()] = param_value.strip('"')
+    return name.upper(), parameters, value
+
+
+def _named_zone(name: Optional[str]) -> Optional[tzinfo]:
+    """Fuseau d'un nom IANA ('/Europe/Paris' accepté) ou Windows, None s'il est inconnu"""
+    for candidate in (name and name.lstrip("/"), WINDOWS_ZONES.get(name)):
+        if not candidate:
+            continue
+        try:
+            return ZoneInfo(candidate)
+        except (ZoneInfoNotFoundError, ValueError):
+            continue
+    return None
+
+
+def _parse_offset(value: Optional[str]) -> Optional[timedelta]:
+    """TZOFFSETTO '+0200', '-0530' -> timedelta"""
+    match = re.fullmatch(r"([+-])(\d{2})(\d{2})(\d{2})?", value or "")
+    if not match:
+        return None
+    sign, hours, minutes, seconds = match.groups()
+    offset = timedelta(hours=int(hours), minutes=int(minutes), seconds=int(seconds or 0))
+    return -offset if sign == "-" else offset
+
+
+def vtimezone_zone(properties: Dict[str, str]) -> Optional[tzinfo]:
+    """
+    Fuseau d'un composant VTIMEZONE du fichier : nom IANA ou Windows du TZID,
+    X-LIC-LOCATION, sinon décalage fixe de sa partie STANDARD (sans l'heure d'été)
+    """
+    zone = _named_zone(properties.get("TZID")) or _named_zone(properties.get("X-LIC-LOCATION"))
+    if zone is not None:
+        return zone
+    offset = _parse_offset(properties.get("STANDARD.TZOFFSETTO") or properties.get("DAYLIGHT.TZOFFSETTO"))
+    return timezone(offset) if offset is not None else None
+
+
+def parse_events(lines: Iterable[str], timezones: Optional[Dict[str, Optional[tzinfo]]] = None) -> Iterator[Dict[str, Tuple[Dict[str, str], str]]]:
+    """
+    VEVENT un par un : {propriété: (paramètres, valeur)}, première occurrence
+    Le fichier est lu ligne par ligne ; les composants imbriqués (VALARM) sont ignorés.
+    Les VTIMEZONE rencontrés sont ajoutés à `timezones` (TZID -> fuseau).
+    """
+    event, depth = None, 0
+    # VTIMEZONE en cours de lecture et son sous-composant (STANDARD / DAYLIGHT)
+    zone, zone_part = None, None
+    for line in unfold(lines):
+        name, params, value = parse_line(line)
+        if zone is not None:
+            if name == "BEGIN":
+                zone_part = value.upper()
+            elif name == "END" and value.upper() == "VTIMEZONE":
+                if timezones is not None and zone.get("TZID"):
+                    timezones[zone["TZID"]] = vtimezone_zone(zone)
+                zone, zone_part = None, None
+            elif name == "END":
+                zone_part = None
+            else:
+                zone.setdefault(f"{zone_part}.{name}" if zone_part else name, value)
+            continue
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and event is None:
+                event, depth = {}, 0
+            elif value.upper() == "VTIMEZONE" and event is None:
+                zone = {}
+            elif event is not None:
+                depth += 1
+        elif name == "END" and event is not None:
+            if depth:
+                depth -= 1
+            elif value.upper() == "VEVENT":
+                yield event
+                event = None
+        elif event is not None and not depth and name not in event:
+            event[name] = (params, value)
+
+
+def _zone(tzid: str, timezones: Dict[str, Optional[tzinfo]]) -> Optional[tzinfo]:
+    """Fuseau d'un TZID (VTIMEZONE du fichier, nom IANA ou Windows), mémorisé dans `timezones`"""
+    if tzid not in timezones:
+        timezones[tzid] = _named_zone(tzid)
+    return timezones[tzid]
+
+
+def _parse_datetime(params: Dict[str, str], value: str, timezones: Optional[Dict[str, Optional[tzinfo]]] = None) -> Optional[datetime]:
+    """
+    DATE-TIME converti en heure locale naïve ; None pour une date seule (journée entière)
+    UTC ('Z') et TZID connu sont convertis ; un TZID inconnu reste en heure flottante.
+    """
+    if params.get("VALUE") == "DATE" or "T" not in value:
+        return None
+    # Découpage direct : strptime coûte plus que tout le reste de l'import
+    try:
+        if value[8] != "T":
+            raise ValueError(value)
+        moment = datetime(int(value[:4]), int(value[4:6]), int(value[6:8]),
+                          int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    except (ValueError, IndexError):
+        return None
+    if value.endswith("Z"):
+        return moment.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    if "TZID" in params:
+        zone = _zone(params["TZID"], {} if timezones is None else timezones)
+        if zone is None:
+            return moment
+        return moment.replace(tzinfo=zone).astimezone().replace(tzinfo=None)
+    return moment
+
+
+def _parse_duration(value: str) -> Optional[timedelta]:
+    """DURATION simple : P1D, PT2H, PT1H30M, P1W"""
+    match = re.fullmatch(r"P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?", value)
+    if not match:
+        return None
+    weeks, days, hours, minutes, seconds = (int(group or 0) for group in match.groups())
+    return timedelta(weeks=weeks, days=days, hours=hours, minutes=minutes, seconds=seconds)
+
+
+def _weekly_days(rule: str, start: datetime, shift: int = 0) -> Optional[str]:
+    """
+    recurring_days PlanIt d'une RRULE hebdomadaire simple ('mon,wed', 'daily'),
+    None si la règle ne s'exprime pas ainsi (INTERVAL, COUNT, UNTIL, BYMONTH...)
+    shift : jours gagnés ou perdus par la conversion en heure locale (BYDAY suit)
+    """
+    parts = dict(part.partition("=")[::2] for part in rule.upper().split(";") if part)
+    if set(parts) - {"FREQ", "BYDAY", "WKST", "INTERVAL"} or parts.get("INTERVAL", "1") != "1":
+        return None
+    if parts.get("FREQ") == "DAILY" and "BYDAY" not in parts:
+        return "daily"
+    if parts.get("FREQ") != "WEEKLY":
+        return None
+    codes = parts.get("BYDAY", ICS_DAYS[start.weekday()]).split(",")
+    if not all(code in ICS_DAYS for code in codes):
+        return None
+    # Sans BYDAY, le jour vient de start, déjà en heure locale
+    offset = shift if "BYDAY" in parts else 0
+    days = sorted({(ICS_DAYS.index(code) + offset) % 7 for code in codes})
+    return "daily" if len(days) == 7 else ",".join(DAYS_SHORT[day] for day in days)
+
+
+def event_row(event, projects: Dict[str, int], timezones: Optional[Dict[str, Optional[tzinfo]]] = None, tag: Optional[str] = None) -> Tuple[Optional[tuple], str]:
+    """
+    Ligne à insérer pour un VEVENT (paramètres de IMPORT_INSERT), ou
+    (None, raison) s'il ne tient pas dans le modèle de PlanIt (heures entières, un seul jour)
+    `tag` : étiquette de la base qui importe (reconnaît ses propres UIDs)
+    """
+    uid = event.get("UID", ({}, ""))[1]
+    if not uid:
+        return None, "no UID"
+    if "RECURRENCE-ID" in event:
+        return None, "recurrence override"
+    if "DTSTART" not in event:
+        return None, "no start"
+    if timezones is None:
+        timezones = {}
+    start = _parse_datetime(*event["DTSTART"], timezones)
+    if start is None:
+        return None, "all-day"
+    if "DTEND" in event:
+        end = _parse_datetime(*event["DTEND"], timezones)
+    elif "DURATION" in event:
+        duration = _parse_duration(event["DURATION"][1])
+        end = start + duration if duration is not None else None
+    else:
+        end = start + timedelta(hours=1)
+    if end is None or end <= start:
+        return None, "invalid end"
+
+    # Heures entières : début arrondi à l'heure, fin à l'heure supérieure
+    start_hour = start.hour
+    end_hour = (end - datetime.combine(start.date(), datetime.min.time())).total_seconds() / 3600
+    end_hour = int(end_hour) + (end_hour % 1 > 0)
+    if end_hour > 24:
+        return None, "multi-day"
+
+    title = unescape_text(event.get("SUMMARY", ({}, ""))[1]).strip() or "(untitled)"
+    completed = event.get("X-PLANIT-COMPLETED", ({}, ""))[1].upper() == "TRUE"
+    category = unescape_text(event.get("CATEGORIES", ({}, ""))[1]).split(",")[0].strip()
+    project_id = projects.get(category)
+    duration = end_hour - start_hour
+
+    recurring_days = None
+    if "RRULE" in event:
+        start_value = event["DTSTART"][1]
+        shift = (start.date() - date(int(start_value[:4]), int(start_value[4:6]), int(start_value[6:8]))).days
+        recurring_days = _weekly_days(event["RRULE"][1], start, shift)
+    if recurring_days:
+        row = (title, duration, completed, None, True, recurring_days, f"{start_hour}-{end_hour}", project_id, uid, False)
+    else:
+        # Règle non hebdomadaire : seule la première occurrence est importée ;
+        # un événement a une heure fixée ailleurs : épinglé
+        scheduled_time = format_scheduled_time(start.date(), start_hour, end_hour)
+        row = (title, duration, completed, scheduled_time, False, None, None, project_id, uid, True)
+    task_id = native_task_id(uid, tag)
+    return row + (uid, uid, task_id, task_id), ""
+
+
+def import_rows(lines: Iterable[str], projects: Dict[str, int], skipped: Dict[str, int], tag: Optional[str] = None) -> Iterator[tuple]:
+    """Lignes à insérer, au fil de la lecture ; compte les VEVENT écartés par raison"""
+    timezones: Dict[str, Optional[tzinfo]] = {}
+    for event in parse_events(lines, timezones):
+        row, reason = event_row(event, projects, timezones, tag)
+        if row is None:
+            skipped[reason] = skipped.get(reason, 0) + 1
+        else:
+            yield row
+
+
+def batches(rows: Iterable[tuple], size: int = IMPORT_BATCH_SIZE) -> Iterator[List[tuple]]:
+    """Découpe un flux de lignes en listes de `size` lignes au plus"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,209 @@
+"""
+Write-ahead journal for batched writes in PlanIt
+"""
+
+import glob
+import json
+import os
+import uuid
+from typing import Iterator, List, Optional, Tuple
+
+# (sql, paramètres) ; un INSERT d'une ligne porte en plus le rowid obtenu
+Statement = Tuple
+
+JOURNAL_SUFFIX = ".planit-journal"
+# Journaux écartés à la reprise : gardés pour inspection, jamais rejoués
+REJECTED_SUFFIX = ".planit-journal-rejected"
+
+
+class ReplayConflict(Exception):
+    """Rejeu impossible : une ligne recréée n'a plus son id et une opération suivante y fait référence"""
+
+
+def session_journal_path(db_path: str) -> str:
+    """
+    Journal propre à une session : {base}.planit-journal.{pid}.{aléa}
+    Le pid permet de savoir si le propriétaire vit encore ; l'aléa
+    distingue deux sessions du même processus (ou un pid réutilisé).
+    """
+    return f"{db_path}{JOURNAL_SUFFIX}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+
+
+def journal_owner(path: str) -> Optional[int]:
+    """Pid du propriétaire d'un journal de session (None : ancien journal partagé)"""
+    parts = os.path.basename(path).rsplit(".", 2)
+    if len(parts) == 3 and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+
+def process_alive(pid: int) -> bool:
+    """Vrai si le processus existe encore"""
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION ; STILL_ACTIVE = 259
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def orphan_journals(db_path: str) -> List[str]:
+    """
+    Journaux à rejouer : ceux dont la session propriétaire est morte
+    L'ancien journal partagé ({base}.planit-journal, sans pid) est inclus.
+    """
+    legacy = f"{db_path}{JOURNAL_SUFFIX}"
+    paths = [legacy] if os.path.exists(legacy) else []
+    for path in sorted(glob.glob(f"{glob.escape(legacy)}.*")):
+        owner = journal_owner(path)
+        if owner is not None and not process_alive(owner):
+            paths.append(path)
+    return paths
+
+
+def _sync_directory(path: str):
+    """fsync du répertoire : la création du fichier survit elle aussi à une coupure"""
+    if os.name == "nt":
+        return
+    descriptor = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class JournalingCursor:
+    """
+    Curseur qui mémorise les requêtes d'écriture exécutées
+
+    Utilisé pendant un batch : les requêtes d'une opération réussie sont
+    écrites dans le journal, pour pouvoir les rejouer après un crash.
+    """
+
+    def __init__(self, cursor, statements: List[Statement]):
+        self._cursor = cursor
+        self._statements = statements
+        # Total de lignes du dernier executemany (rejoué requête par requête)
+        self._rowcount = None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount if self._rowcount is None else self._rowcount
+
+    def execute(self, sql: str, params=()):
+        self._rowcount = None
+        result = self._cursor.execute(sql, params)
+        verb = sql.lstrip()[:6].upper()
+        if verb == "INSERT" and self._cursor.rowcount == 1:
+            # Rowid noté : les requêtes suivantes peuvent viser cette ligne par son id
+            self._statements.append((sql, list(params), self._cursor.lastrowid))
+        elif verb != "SELECT":
+            self._statements.append((sql, list(params)))
+        return result
+
+    def executemany(self, sql: str, seq_of_params):
+        # Ligne par ligne : chaque INSERT garde son propre rowid
+        rowcount = 0
+        for params in seq_of_params:
+            self.execute(sql, params)
+            rowcount += max(self._cursor.rowcount, 0)
+        self._rowcount = rowcount
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def replay(conn, statements: List[Statement]):
+    """
+    Rejoue des requêtes journalisées sur la connexion (dans une transaction)
+
+    Les ids ne sont pas réécrits : si une autre session a pris entre-temps
+    l'id d'une ligne créée par le journal, l'INSERT rejoué obtient un autre
+    id. Tant qu'aucune requête suivante ne contient l'ancien id, rien ne le
+    visait. Sinon (dépendance, done, delete sur cette ligne) le rejeu
+    toucherait la ligne d'un autre : ReplayConflict, à annuler par ROLLBACK.
+    La vérification est prudente : un paramètre égal à l'ancien id suffit.
+    """
+    for index, statement in enumerate(statements):
+        cursor = conn.execute(statement[0], statement[1])
+        if len(statement) > 2 and cursor.lastrowid != statement[2]:
+            old_id = statement[2]
+            if any(old_id in later[1] for later in statements[index + 1:]):
+                raise ReplayConflict(f"row #{old_id} was taken by another session before recovery")
+
+
+class WriteJournal:
+    """
+    Journal append-only d'une session (une ligne JSON par opération acquittée)
+
+    Chaque ligne porte un numéro de séquence croissant. Le dernier numéro
+    commité est stocké dans la base (table journal_sessions, clé = nom du
+    journal) dans la même transaction que les données : à la reprise,
+    seules les opérations au-delà de ce numéro sont rejouées, même si le
+    crash a eu lieu entre le COMMIT et la troncature du journal.
+    Une session n'écrit et ne supprime que son propre fichier.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._file = None
+
+    def append(self, seq: int, statements: List[Statement]):
+        """Ajoute une opération ; fsync avant de rendre la main (survit à une coupure de courant)"""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            _sync_directory(self.path)
+        self._file.write(json.dumps({"seq": seq, "statements": statements}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def entries(self) -> Iterator[Tuple[int, List[Statement]]]:
+        """Relit les opérations du journal ; une dernière ligne tronquée est ignorée"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                yield entry["seq"], entry["statements"]
+
+    def set_aside(self) -> str:
+        """Renomme un journal qu'on ne peut pas rejouer ; retourne son nouveau chemin"""
+        self.close()
+        directory, name = os.path.split(self.path)
+        target = os.path.join(directory, name.replace(JOURNAL_SUFFIX, REJECTED_SUFFIX, 1))
+        os.replace(self.path, target)
+        return target
+
+    def truncate(self):
+        """Vide le journal une fois son contenu commité"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,93 @@
+"""
+Archival and database maintenance for PlanIt
+"""
+
+import time
+from typing import Tuple
+
+from planit.core.readmodel import TASKS_QUERY
+from planit.core.search import RANK_CANDIDATES, TASK_SEARCH, fts_query
+
+# Tâches terminées sorties de `tasks` : mêmes colonnes, même id
+ARCHIVE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS tasks_archive (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        duration INTEGER NOT NULL,
+        completed BOOLEAN DEFAULT TRUE,
+        scheduled_time TEXT,
+        recurring BOOLEAN DEFAULT FALSE,
+        recurring_days TEXT,
+        recurring_hours TEXT,
+        completed_at TEXT,
+        archived_at TEXT NOT NULL DEFAULT (datetime('now'))
+    )
+'''
+
+ARCHIVE_COLUMNS = "id, title, duration, completed, scheduled_time, recurring, recurring_days, recurring_hours, completed_at, project_id, ics_uid, resource_id"
+
+# Requêtes lues à chaque commande : chargement du read model et recherche.
+# Les requêtes de l'application elles-mêmes, pas des copies qui divergeraient.
+HOT_QUERIES = [
+    (TASKS_QUERY, ()),
+    (TASK_SEARCH, (fts_query("a"), RANK_CANDIDATES, 20)),
+]
+
+
+def archive_completed(cursor, days: int) -> int:
+    """
+    Déplace dans tasks_archive les tâches terminées depuis au moins `days` jours
+    Une tâche terminée avant l'ajout de completed_at (NULL) est considérée ancienne.
+    """
+    condition = "completed AND (completed_at IS NULL OR completed_at <= datetime('now', ?))"
+    modifier = f"-{days} days"
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO tasks_archive ({ARCHIVE_COLUMNS})
+        SELECT {ARCHIVE_COLUMNS} FROM tasks WHERE {condition}
+    ''', (modifier,))
+    cursor.execute(f"DELETE FROM tasks WHERE {condition}", (modifier,))
+    return cursor.rowcount
+
+
+def database_size(conn) -> Tuple[int, int]:
+    """Taille du fichier et espace libre réutilisable, en octets"""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return page_count * page_size, freelist * page_size
+
+
+def time_hot_queries(conn, repeat: int = 5) -> float:
+    """Meilleur temps (ms) d'un passage sur les requêtes chaudes"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sql, params in HOT_QUERIES:
+            conn.execute(sql, params).fetchall()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def optimize(conn, vacuum: bool = False) -> bool:
+    """
+    ANALYZE, PRAGMA optimize et compactage des index FTS5
+    Avec vacuum : rend l'espace libre au système. Le premier passage
+    active auto_vacuum=INCREMENTAL (un VACUUM complet, une seule fois),
+    les suivants se contentent de PRAGMA incremental_vacuum.
+    Retourne True si un VACUUM complet a été nécessaire.
+    """
+    conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('optimize')")
+    conn.execute("INSERT INTO projects_fts (projects_fts) VALUES ('optimize')")
+    conn.execute("INSERT INTO tasks_archive_fts (tasks_archive_fts) VALUES ('optimize')")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+
+    if not vacuum:
+        return False
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    conn.execute("PRAGMA incremental_vacuum").fetchall()
+    return False
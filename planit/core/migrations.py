@@ -0,0 +1,202 @@
+"""
+Versioned schema migrations for PlanIt, keyed on PRAGMA user_version
+"""
+
+from typing import Callable, List, Tuple
+
+from rich.console import Console
+
+from planit.core.changelog import create_change_log
+from planit.core.dependencies import create_dependency_tables
+from planit.core.icalendar import create_calendar_identity
+from planit.core.maintenance import ARCHIVE_SCHEMA
+from planit.core.rendercache import create_change_counter
+from planit.core.resources import create_resource_tables
+from planit.core.search import create_search_index
+from planit.core.stats import create_stats_tables, recreate_stats_triggers
+
+console = Console()
+
+
+def _base_schema(cursor):
+    """Tables d'origine et disponibilité par défaut (9h-18h du lundi au vendredi)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            duration INTEGER NOT NULL,
+            completed BOOLEAN DEFAULT FALSE,
+            scheduled_time TEXT,
+            recurring BOOLEAN DEFAULT FALSE,
+            recurring_days TEXT,
+            recurring_hours TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            description TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS availability (
+            day_of_week INTEGER,
+            start_hour INTEGER,
+            end_hour INTEGER
+        )
+    ''')
+
+    # Seulement pour une base neuve (ou sans aucune disponibilité)
+    cursor.execute('SELECT COUNT(*) FROM availability')
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany('''
+            INSERT INTO availability (day_of_week, start_hour, end_hour)
+            VALUES (?, ?, ?)
+        ''', [(day, 9, 18) for day in range(5)])
+        console.print("[green]✓[/green] Default availability created: 9h-18h Monday to Friday")
+
+
+def _availability_exceptions(cursor):
+    """Exceptions par date ; start_hour/end_hour NULL = journée indisponible"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS availability_exceptions (
+            date TEXT NOT NULL,
+            start_hour INTEGER,
+            end_hour INTEGER
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_availability_exceptions_date ON availability_exceptions(date)')
+
+
+def _journal_state(cursor):
+    """Dernière opération du journal d'écritures déjà commitée"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS journal_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_seq INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO journal_state (id, last_seq) VALUES (1, 0)')
+
+
+def _journal_sessions(cursor):
+    """Dernière opération commitée de chaque journal de session (remplace journal_state)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS journal_sessions (
+            name TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL
+        )
+    ''')
+
+
+def _archive(cursor):
+    """Date de complétion et table des tâches archivées"""
+    cursor.execute("PRAGMA table_info(tasks)")
+    if 'completed_at' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE tasks ADD COLUMN completed_at TEXT')
+    cursor.execute(ARCHIVE_SCHEMA)
+
+
+def _task_version(cursor):
+    """Numéro de version par tâche, incrémenté à chaque UPDATE (verrouillage optimiste)"""
+    cursor.execute("PRAGMA table_info(tasks)")
+    if 'version' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+
+
+def _task_project(cursor):
+    """Projet de chaque tâche (clé étrangère indexée), conservé à l'archivage"""
+    cursor.execute("PRAGMA table_info(tasks)")
+    if 'project_id' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE tasks ADD COLUMN project_id INTEGER REFERENCES projects(id) ON DELETE SET NULL')
+    cursor.execute("PRAGMA table_info(tasks_archive)")
+    if 'project_id' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE tasks_archive ADD COLUMN project_id INTEGER')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_archive_project ON tasks_archive(project_id)')
+
+
+def _ics_uid(cursor):
+    """UID iCalendar des tâches importées, unique : un second import les ignore"""
+    for table in ('tasks', 'tasks_archive'):
+        cursor.execute(f"PRAGMA table_info({table})")
+        if 'ics_uid' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN ics_uid TEXT')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_ics_uid ON tasks(ics_uid)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_archive_ics_uid ON tasks_archive(ics_uid)')
+
+
+def _task_pinned(cursor):
+    """Tâches placées à la main, que rebalance ne déplace pas ; les événements importés le sont"""
+    cursor.execute("PRAGMA table_info(tasks)")
+    if 'pinned' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE tasks ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('UPDATE tasks SET pinned = 1 WHERE ics_uid IS NOT NULL AND scheduled_time IS NOT NULL AND NOT recurring')
+
+
+# (version, description, étape) dans l'ordre d'application. Une base créée
+# avant ce module (user_version = 0) a déjà une partie du schéma : chaque
+# étape est donc idempotente. Ne jamais modifier une étape publiée,
+# en ajouter une nouvelle à la fin.
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "base tables and default availability", _base_schema),
+    (2, "availability exceptions", _availability_exceptions),
+    (3, "write journal state", _journal_state),
+    (4, "completed_at and tasks archive", _archive),
+    (5, "full-text search indexes", create_search_index),
+    (6, "workload summary tables", create_stats_tables),
+    (7, "task row versions", _task_version),
+    (8, "task dependencies", create_dependency_tables),
+    (9, "task projects", _task_project),
+    (10, "iCalendar UIDs", _ics_uid),
+    (11, "change counter for the render cache", create_change_counter),
+    (12, "resources and per-resource availability", create_resource_tables),
+    (13, "change log for incremental refresh", create_change_log),
+    (14, "per-session write journals", _journal_sessions),
+    (15, "pinned (manually placed) tasks", _task_pinned),
+    (16, "same done-task rule for daily and weekly load", recreate_stats_triggers),
+    (17, "calendar identity for exported UIDs", create_calendar_identity),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn) -> int:
+    """
+    Amène la base à SCHEMA_VERSION et retourne la version de départ
+
+    Base à jour : une seule lecture de PRAGMA user_version. Sinon chaque
+    étape s'exécute dans sa propre transaction, avec la nouvelle
+    user_version commitée en même temps que le schéma. BEGIN IMMEDIATE
+    et la relecture de la version évitent qu'un autre processus qui
+    démarre en même temps applique deux fois la même étape.
+    La connexion doit être en mode autocommit (isolation_level=None).
+    """
+    start_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if start_version >= SCHEMA_VERSION:
+        if start_version > SCHEMA_VERSION:
+            console.print(f"[yellow]⚠[/yellow] Database schema v{start_version} is newer than this PlanIt (v{SCHEMA_VERSION})")
+        return start_version
+
+    for version, description, step in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                conn.execute("ROLLBACK")
+                continue
+            step(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if start_version > 0:
+            console.print(f"[green]✓[/green] Database upgraded to schema v{version}: {description}")
+
+    # WAL : les lecteurs ne bloquent plus l'écrivain (et inversement).
+    # Persistant dans le fichier, mais impossible dans une transaction.
+    conn.execute("PRAGMA journal_mode = WAL").fetchone()
+    return start_version
@@ -0,0 +1,202 @@
+"""
+Typed row objects for PlanIt tasks, projects and resources
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAYS_SHORT = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+ALL_DAYS_MASK = (1 << 7) - 1
+
+
+def parse_weekday_mask(recurring_days: Optional[str]) -> int:
+    """Convertit 'mon,wed' ou 'daily' en bitmask (bit 0 = lundi)"""
+    if not recurring_days:
+        return 0
+    if recurring_days.strip() == 'daily':
+        return ALL_DAYS_MASK
+    mask = 0
+    for day_short in recurring_days.split(','):
+        day_short = day_short.strip()
+        if day_short in DAYS_SHORT:
+            mask |= 1 << DAYS_SHORT.index(day_short)
+    return mask
+
+
+def days_from_mask(mask: int) -> List[int]:
+    """Retourne les index de jours (0 = lundi) présents dans le bitmask"""
+    return [day for day in range(7) if mask & (1 << day)]
+
+
+def parse_hour_range(hours: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Convertit '9-11' ou '9h-11h' en (9, 11), (None, None) si invalide"""
+    if not hours or '-' not in hours:
+        return None, None
+    try:
+        start_str, end_str = hours.split('-')
+        return int(start_str.replace('h', '')), int(end_str.replace('h', ''))
+    except ValueError:
+        return None, None
+
+
+def format_scheduled_time(day, start_hour: int, end_hour: int) -> str:
+    """Formate un créneau daté : 'Wednesday 21/10 14h-16h'"""
+    return f"{DAY_NAMES[day.weekday()]} {day.strftime('%d/%m')} {start_hour}h-{end_hour}h"
+
+
+def parse_month_day(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Convertit 'MM/DD' en (mois, jour), None si invalide"""
+    try:
+        month, day = map(int, value.split('/'))
+        return month, day
+    except (AttributeError, ValueError):
+        return None
+
+
+class Task:
+    """
+    Tâche avec ses champs décodés une seule fois au chargement
+
+    scheduled_time peut valoir 'Monday 9h-11h' (auto-planifiée) ou
+    'Monday 15/06 14h-16h' (planifiée manuellement, datée).
+    """
+
+    __slots__ = (
+        "id", "title", "duration", "completed", "scheduled_time",
+        "recurring", "recurring_days", "recurring_hours", "version", "project_id", "resource_id", "pinned",
+        "weekday_mask", "start_hour", "end_hour", "scheduled_date",
+    )
+
+    def __init__(self, id, title, duration, completed, scheduled_time, recurring, recurring_days, recurring_hours, version=0, project_id=None, resource_id=None, pinned=False):
+        self.id = id
+        self.title = title
+        self.duration = duration
+        self.completed = bool(completed)
+        self.scheduled_time = scheduled_time
+        self.recurring = bool(recurring)
+        self.recurring_days = recurring_days
+        self.recurring_hours = recurring_hours
+        # Incrémenté à chaque modification : UPDATE ... WHERE version = ?
+        self.version = version
+        self.project_id = project_id
+        # Calendrier de la tâche : une ressource, None = calendrier par défaut
+        self.resource_id = resource_id
+        # Placée à la main (--manual, import) : rebalance ne la déplace pas
+        self.pinned = bool(pinned)
+        self.scheduled_date = None
+
+        if self.recurring:
+            self.weekday_mask = parse_weekday_mask(recurring_days)
+            self.start_hour, self.end_hour = parse_hour_range(recurring_hours)
+        elif scheduled_time:
+            parts = scheduled_time.split()
+            day_name = parts[0] if parts else ""
+            self.weekday_mask = 1 << DAY_NAMES.index(day_name) if day_name in DAY_NAMES else 0
+            self.start_hour, self.end_hour = parse_hour_range(parts[-1]) if len(parts) >= 2 else (None, None)
+            if len(parts) >= 3:
+                self.scheduled_date = parts[1]
+        else:
+            self.weekday_mask = 0
+            self.start_hour = self.end_hour = None
+
+    @property
+    def is_placed(self) -> bool:
+        """Vrai si la tâche occupe des créneaux du planning"""
+        return self.weekday_mask != 0 and self.start_hour is not None
+
+    def days_in_week(self, week_dates) -> List[int]:
+        """Jours (0 = lundi) occupés par la tâche dans la semaine donnée"""
+        if not self.is_placed:
+            return []
+        days = days_from_mask(self.weekday_mask)
+        if self.scheduled_date is not None:
+            # Tâche datée : seulement la semaine qui contient cette date
+            return [day for day in days if week_dates[day].strftime("%d/%m") == self.scheduled_date]
+        return days
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, title={self.title!r}, duration={self.duration!r})"
+
+
+class Project:
+    """Projet avec ses dates MM/DD décodées en (mois, jour)"""
+
+    __slots__ = ("id", "name", "start_date", "end_date", "description", "start", "end")
+
+    def __init__(self, id, name, start_date, end_date, description):
+        self.id = id
+        self.name = name
+        self.start_date = start_date
+        self.end_date = end_date
+        self.description = description
+        self.start = parse_month_day(start_date)
+        self.end = parse_month_day(end_date)
+
+    def __repr__(self):
+        return f"Project(id={self.id!r}, name={self.name!r})"
+
+
+class Resource:
+    """Membre de l'équipe (ou salle, machine...) avec son propre calendrier"""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+    def __repr__(self):
+        return f"Resource(id={self.id!r}, name={self.name!r})"
+
+
+def task_row_factory(cursor, row) -> Task:
+    """row_factory sqlite3 pour les SELECT de colonnes complètes de tasks"""
+    return Task(*row)
+
+
+def project_row_factory(cursor, row) -> Project:
+    """row_factory sqlite3 pour les SELECT de colonnes complètes de projects"""
+    return Project(*row)
+
+
+def resource_row_factory(cursor, row) -> Resource:
+    """row_factory sqlite3 pour les SELECT de colonnes complètes de resources"""
+    return Resource(*row)
+
+
+class WeekGrid:
+    """
+    Planning d'une semaine : {(jour, heure): titre}, jour 0 = lundi
+    Deux grilles sont égales si elles affichent exactement la même chose
+    """
+
+    __slots__ = ("offset", "week_dates", "cells")
+
+    def __init__(self, offset: int, week_dates, cells: Dict[Tuple[int, int], str]):
+        self.offset = offset
+        self.week_dates = week_dates
+        self.cells = cells
+
+    def __eq__(self, other):
+        if not isinstance(other, WeekGrid):
+            return NotImplemented
+        return self.week_dates == other.week_dates and self.cells == other.cells
+
+    __hash__ = None
+
+    def changed_cells(self, other: Optional["WeekGrid"]) -> Set[Tuple[int, int]]:
+        """Cellules dont le contenu diffère de l'autre grille"""
+        if other is None:
+            return set(self.cells)
+        changed = set()
+        for cell in self.cells.keys() | other.cells.keys():
+            if self.cells.get(cell) != other.cells.get(cell):
+                changed.add(cell)
+        return changed
+
+    def hours_by_title(self) -> Dict[str, int]:
+        """Heures planifiées par tâche sur la semaine"""
+        summary = {}
+        for title in self.cells.values():
+            summary[title] = summary.get(title, 0) + 1
+        return summary
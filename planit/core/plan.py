@@ -0,0 +1,74 @@
+"""
+In-memory scheduling plans for PlanIt (preview, comparison, then apply)
+"""
+
+from datetime import date
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from planit.core.models import Task, format_scheduled_time
+
+
+class Placement(NamedTuple):
+    """Créneau proposé pour une tâche du backlog"""
+    task: Task
+    day: date
+    start_hour: int
+    end_hour: int
+    # Ressource dont le calendrier reçoit la tâche, None = calendrier par défaut
+    resource_id: Optional[int] = None
+
+    @property
+    def scheduled_time(self) -> str:
+        return format_scheduled_time(self.day, self.start_hour, self.end_hour)
+
+
+# Ordre dans lequel le backlog est placé (None = ordre de création)
+STRATEGIES: Dict[str, Optional[Callable[[Task], object]]] = {
+    "first-fit": None,
+    "longest-first": lambda task: -task.duration,
+    "shortest-first": lambda task: task.duration,
+}
+
+
+class Plan:
+    """
+    Résultat d'une planification calculée en mémoire, sans écriture en base
+
+    booked_hours et available_hours couvrent l'horizon de planification
+    (à partir de la date de début), avant application du plan.
+    """
+
+    __slots__ = ("strategy", "placements", "unplaced", "blocked", "booked_hours", "available_hours", "elapsed_ms")
+
+    def __init__(self, strategy: str, placements: List[Placement], unplaced: List[Task],
+                 booked_hours: int, available_hours: int, elapsed_ms: float = 0.0,
+                 blocked: Optional[Dict[int, str]] = None):
+        self.strategy = strategy
+        self.placements = placements
+        self.unplaced = unplaced
+        # Tâches non placées à cause de leurs dépendances : {id: raison}
+        self.blocked = blocked or {}
+        self.booked_hours = booked_hours
+        self.available_hours = available_hours
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def planned_hours(self) -> int:
+        return sum(placement.end_hour - placement.start_hour for placement in self.placements)
+
+    @property
+    def finish(self) -> Optional[date]:
+        """Date du dernier créneau placé"""
+        return max((placement.day for placement in self.placements), default=None)
+
+    @property
+    def utilization_before(self) -> float:
+        """Part des heures disponibles déjà réservées, entre 0 et 1"""
+        return self.booked_hours / self.available_hours if self.available_hours else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """Part des heures disponibles réservées une fois le plan appliqué"""
+        if not self.available_hours:
+            return 0.0
+        return (self.booked_hours + self.planned_hours) / self.available_hours
@@ -2,23 +2,82 @@
 Planning and scheduling engine for PlanIt
 """
 
-import sqlite3
-from datetime import datetime, timedelta
-from typing import List, Dict, Set, Tuple
+import math
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional, Set, Tuple
 
 from rich.console import Console
+from rich.table import Table
+
+from planit.core.dependencies import topological_order
+from planit.core.intervals import IntervalIndex, from_slot, to_slot
+from planit.core.models import DAY_NAMES, Task, WeekGrid, format_scheduled_time
+from planit.core.plan import STRATEGIES, Placement, Plan
+from planit.core.rebalance import Rebalancer
+from planit.core.resources import ResourcePool
+from planit.core.slotarray import BACKENDS, SlotArray, require_numpy
+from planit.core.weekcache import WeekCache
 
 console = Console()
 
+# resource_id des fonctions d'occupation : toutes les tâches, quel que soit leur calendrier
+ANY_RESOURCE = object()
+# resource_id par défaut des grilles de semaine : le calendrier affiché (self.resource_id)
+DISPLAYED = object()
+
+
+class ConcurrentModification(Exception):
+    """Une tâche a changé (version différente) entre la lecture et l'écriture"""
+    
+    def __init__(self, task: Task):
+        super().__init__(f"Task {task.id} was modified concurrently")
+        self.task = task
+
 class PlanningEngine:
     """
     Moteur de planification automatique
     Gère la logique de scheduling et d'affichage des plannings
     """
     
-    def __init__(self, task_manager):
+    # Nombre de semaines explorées par auto_schedule à partir de la semaine affichée
+    SCHEDULE_HORIZON_WEEKS = 4
+    # Nombre de semaines indexées pour la détection de conflits et les suggestions
+    CONFLICT_HORIZON_WEEKS = 4
+    
+    # Nombre de semaines gardées en cache (LRU)
+    WEEK_CACHE_SIZE = 8
+    
+    def __init__(self, task_manager, backend: str = "python", prefetch: bool = False):
         self.task_manager = task_manager
         self.current_week_offset = 0
+        # Calendrier affiché par le planning : une ressource, None = calendrier
+        # par défaut, ANY_RESOURCE = toutes les tâches (vue d'origine)
+        self.resource_id = ANY_RESOURCE
+        # "numpy" : occupation en tableau (jour, heure), si NumPy est installé
+        self.backend = "python"
+        self.set_backend(backend)
+        # Semaines voisines précalculées dans un thread : utile seulement aux
+        # sessions longues (TUI, serveur), pas à une commande CLI ponctuelle
+        self.prefetch = prefetch
+        self.week_cache = WeekCache(
+            lambda key, snapshot: self.build_week_grid(key[1], snapshot, key[0]),
+            max_size=self.WEEK_CACHE_SIZE,
+        )
+    
+    def set_backend(self, backend: str):
+        """Choisit le moteur de calcul des grilles et du planificateur"""
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}' (choose from {', '.join(BACKENDS)})")
+        if backend == "numpy":
+            require_numpy()
+        # Mêmes grilles avec les deux moteurs : le cache de semaines reste valide
+        self.backend = backend
+    
+    def set_resource(self, resource_id=ANY_RESOURCE):
+        """Choisit le calendrier affiché par le planning (ANY_RESOURCE = tout le monde)"""
+        # Le cache de semaines est indexé par calendrier : rien à vider
+        self.resource_id = resource_id
     
     def get_week_dates(self, offset=0):
         """Retourne les dates de la semaine (lundi à dimanche)"""
@@ -28,137 +87,641 @@ class PlanningEngine:
         # Ajoute l'offset en semaines
         target_monday = monday + timedelta(weeks=offset)
         
-        week_dates = []
-        for i in range(7):
-            week_dates.append(target_monday + timedelta(days=i))
-        
-        return week_dates
+        return self.get_week_dates_from(target_monday)
     
-    def auto_schedule(self):
-        """Planning automatique - seulement pour les tâches non-récurrentes"""
-        conn = sqlite3.connect(self.task_manager.db_path)
-        cursor = conn.cursor()
-        
-        # Récupère seulement les tâches NON récurrentes, non terminées et non planifiées
-        cursor.execute('''
-            SELECT id, title, duration
-            FROM tasks
-            WHERE completed = FALSE AND scheduled_time IS NULL AND recurring = FALSE
-            ORDER BY id ASC
-        ''')
-        tasks = cursor.fetchall()
-        
-        # Récupère les disponibilités
-        cursor.execute('SELECT day_of_week, start_hour, end_hour FROM availability ORDER BY day_of_week')
-        availability = cursor.fetchall()
-        
-        if not tasks:
+    def get_week_dates_from(self, monday: date) -> List[date]:
+        """Retourne les 7 dates d'une semaine à partir de son lundi"""
+        return [monday + timedelta(days=i) for i in range(7)]
+    
+    def auto_schedule(self, strategy: str = "first-fit", dry_run: bool = False, pool: bool = False) -> bool:
+        """
+        Planning automatique - seulement pour les tâches non-récurrentes
+        Place chaque tâche sur une date précise, à partir d'aujourd'hui (ou de la
+        semaine affichée), dans les disponibilités effectives de cette date
+        Avec dry_run : affiche le plan sans rien écrire
+        Avec pool : les tâches sans ressource vont à la ressource libre le plus tôt
+        Retourne False si des tâches n'ont pas pu être placées
+        """
+        if not self._backlog(self.task_manager.snapshot()):
+            # Rien à planifier : pas besoin du verrou d'écriture
             console.print("[yellow]No non-recurring tasks to schedule.[/yellow]")
-            conn.close()
-            return
+            return True
+        
+        if dry_run:
+            self.show_plan(self.plan(strategy, pool=pool))
+            console.print("[dim]Dry run: nothing was written. Run 'schedule' without --dry-run to apply.[/dim]")
+            return True
+        
+        # BEGIN IMMEDIATE avant de relire le backlog : deux `schedule` lancés en
+        # même temps (CLI, TUI...) s'exécutent l'un après l'autre, chacun sur
+        # des données à jour, et ne placent jamais deux tâches au même créneau
+        # Les messages sont affichés après le COMMIT, pour ne pas garder le
+        # verrou d'écriture pendant l'affichage
+        with self.task_manager.transaction() as cursor:
+            plan = self.plan(strategy, pool=pool)
+            skipped = self._apply_plan(cursor, plan)
+        return self.print_applied(plan, skipped)
+    
+    def _backlog(self, snapshot) -> List[Task]:
+        """Tâches NON récurrentes, non terminées et non planifiées"""
+        return [
+            task for task in snapshot.tasks
+            if not task.completed and task.scheduled_time is None and not task.recurring
+        ]
+    
+    def _horizon(self) -> Tuple[date, date]:
+        """Premier jour planifiable et lundi de sa semaine"""
+        # À partir d'aujourd'hui, ou du lundi de la semaine affichée si elle est future
+        today = datetime.now().date()
+        search_start = max(today, self.get_week_dates(self.current_week_offset)[0])
+        return search_start, search_start - timedelta(days=search_start.weekday())
+    
+    def plan(self, strategy: str = "first-fit", snapshot=None, pool: bool = False) -> Plan:
+        """
+        Calcule où placer le backlog, sans écrire en base ni rien afficher
+        Le plan se lit depuis le snapshot en mémoire : comparer plusieurs
+        stratégies ne coûte que quelques millisecondes.
+        Une tâche attribuée à une ressource est placée dans son calendrier ;
+        les autres dans le calendrier par défaut, ou, avec pool, chez la
+        ressource qui a le créneau libre le plus tôt (tas de ResourcePool).
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}' (choose from {', '.join(STRATEGIES)})")
+        started = time.perf_counter()
+        if snapshot is None:
+            snapshot = self.task_manager.snapshot()
+        
+        tasks = self._backlog(snapshot)
+        if STRATEGIES[strategy] is not None:
+            tasks.sort(key=STRATEGIES[strategy])
+        
+        # Chaque tâche après ses prérequis, dans l'ordre de la stratégie sinon
+        prerequisites = snapshot.prerequisites
+        cyclic = []
+        if prerequisites:
+            tasks, cyclic = topological_order(tasks, prerequisites)
+        
+        search_start, first_monday = self._horizon()
+        horizon_end = first_monday + timedelta(weeks=self.SCHEDULE_HORIZON_WEEKS)
+        first_slot = to_slot(search_start, 0)
+        
+        # Calendriers concernés : ressources du pot commun, calendrier par
+        # défaut pour les autres tâches, et calendrier de chaque tâche attribuée
+        calendars = {task.resource_id for task in tasks}
+        pooled = []
+        if pool and None in calendars and snapshot.resources:
+            pooled = [resource.id for resource in snapshot.resources]
+            calendars.discard(None)
+            calendars.update(pooled)
+        finders = {
+            resource_id: self._free_slot_finder(snapshot, resource_id, search_start, first_monday, horizon_end)
+            for resource_id in sorted(calendars, key=lambda resource_id: (resource_id is not None, resource_id))
+        }
+        booked = sum(finder[2] for finder in finders.values())
+        available = sum(finder[3] for finder in finders.values())
+        resource_pool = ResourcePool({resource_id: finders[resource_id][0] for resource_id in pooled}, first_slot) if pooled else None
+        
+        # Fin (heure absolue) des prérequis déjà datés dans l'horizon, puis des tâches placées
+        ends = self._dated_ends(first_monday, snapshot) if prerequisites else {}
+        backlog_ids = {task.id for task in tasks}
+        
+        placements, unplaced = [], []
+        blocked = {task.id: "dependency cycle" for task in cyclic}
+        # Plus petite durée qui n'a pas trouvé de place en partant du début de
+        # l'horizon, par calendrier (ou pot commun) : l'index ne fait que se
+        # remplir, donc toute tâche au moins aussi longue échouera aussi, quel
+        # que soit son point de départ. Un échec après un prérequis ne dit
+        # rien des créneaux plus tôt : il n'est pas retenu.
+        min_failed = {}
+        if any(snapshot.free_time_of(resource_id).has_any() for resource_id in finders):
+            for task in tasks:
+                duration = task.duration
+                # Calendrier visé : celui de la tâche, ou "pool" (n'importe quelle ressource du pot)
+                target = "pool" if pooled and task.resource_id is None else task.resource_id
+                
+                # Après la fin de chaque prérequis ; un prérequis du backlog non
+                # placé bloque la tâche. Terminés, récurrents ou hors horizon
+                # (passés) ne contraignent rien.
+                earliest = first_slot
+                for prerequisite in prerequisites.get(task.id, ()):
+                    if prerequisite in ends:
+                        earliest = max(earliest, ends[prerequisite])
+                    elif prerequisite in backlog_ids:
+                        blocked[task.id] = f"waits for #{prerequisite}"
+                        break
+                if task.id in blocked:
+                    unplaced.append(task)
+                    continue
+                
+                # Premier créneau libre dans les disponibilités effectives, en O(log n) par essai
+                # (plus O(log R) pour choisir la ressource dans le pot commun, O(R) après un prérequis)
+                if target in min_failed and duration >= min_failed[target]:
+                    found = None
+                elif target == "pool":
+                    found = resource_pool.next_free(earliest, duration)
+                else:
+                    slot = finders[target][0](earliest, duration)
+                    found = (slot, target) if slot is not None else None
+                
+                if found is None:
+                    if earliest == first_slot:
+                        min_failed[target] = min(min_failed.get(target, duration), duration)
+                    unplaced.append(task)
+                    continue
+                
+                # Marque ce créneau comme occupé pour les tâches suivantes
+                slot, resource_id = found
+                finders[resource_id][1](slot, slot + duration, task)
+                if resource_pool is not None and resource_id in resource_pool.calendars:
+                    resource_pool.taken(resource_id)
+                ends[task.id] = slot + duration
+                target_date, start_hour = from_slot(slot)
+                placements.append(Placement(task, target_date, start_hour, start_hour + duration, resource_id))
+        else:
+            unplaced = tasks
+        unplaced += cyclic
         
-        if not availability:
+        elapsed = (time.perf_counter() - started) * 1000
+        return Plan(strategy, placements, unplaced, booked, available, elapsed, blocked)
+    
+    def _free_slot_finder(self, snapshot, resource_id: Optional[int], search_start: date, first_monday: date, horizon_end: date):
+        """
+        Recherche de créneaux dans un calendrier sur l'horizon de planification
+        Retourne (next_free(début, durée), take(début, fin, tâche), heures réservées, heures disponibles)
+        """
+        free_time = snapshot.free_time_of(resource_id)
+        first_slot = to_slot(search_start, 0)
+        limit = to_slot(horizon_end, 0)
+        # Créneaux déjà occupés (récurrentes, manuelles, déjà planifiées)
+        if self.backend == "numpy":
+            # Tableau (jour, heure) et plages libres calculées d'un bloc
+            slots = SlotArray(self._planned_tasks(snapshot, resource_id), first_monday, self.SCHEDULE_HORIZON_WEEKS)
+            from_day = (search_start - first_monday).days
+            booked = slots.booked_hours(from_day)
+            runs = slots.free_runs(free_time, from_day)
+            next_free, take = runs.next_free, lambda start, end, task: runs.take(start, end)
+        else:
+            occupied = self.build_occupancy_index(first_monday, self.SCHEDULE_HORIZON_WEEKS, snapshot, resource_id)
+            booked = sum(max(0, end - max(start, first_slot)) for start, end in occupied.intervals())
+            next_free = lambda start, duration: occupied.next_free(start, duration, free_time, limit)
+            take = occupied.add
+        available = sum(
+            free_time.free_hours(search_start + timedelta(days=day))
+            for day in range((horizon_end - search_start).days)
+        )
+        return next_free, take, booked, available
+    
+    def _dated_ends(self, first_monday: date, snapshot) -> Dict[int, int]:
+        """Heure absolue de fin des tâches datées (non récurrentes) dans l'horizon"""
+        ends = {}
+        for task in self._planned_tasks(snapshot):
+            if task.recurring or task.scheduled_date is None:
+                continue
+            for week in range(self.SCHEDULE_HORIZON_WEEKS):
+                week_dates = self.get_week_dates_from(first_monday + timedelta(weeks=week))
+                days = task.days_in_week(week_dates)
+                if days:
+                    ends[task.id] = to_slot(week_dates[days[0]], task.end_hour)
+                    break
+        return ends
+    
+    def apply_plan(self, plan: Plan) -> bool:
+        """
+        Écrit un plan (calculé plus tôt) en une transaction et affiche le résultat
+        Les placements devenus invalides entre-temps (créneau pris, tâche modifiée) sont écartés
+        """
+        with self.task_manager.transaction() as cursor:
+            skipped = self._apply_plan(cursor, plan)
+        return self.print_applied(plan, skipped)
+    
+    def _apply_plan(self, cursor, plan: Plan) -> Dict[int, str]:
+        """
+        Écrit les placements encore valides ; appelé dans la transaction d'écriture
+        Retourne les placements écartés : {id de tâche: raison}
+        """
+        skipped = {}
+        _, first_monday = self._horizon()
+        # Un index d'occupation par calendrier, construit au premier placement qui le vise
+        indexes = {}
+        for placement in plan.placements:
+            task = placement.task
+            start = to_slot(placement.day, placement.start_hour)
+            end = to_slot(placement.day, placement.end_hour)
+            if placement.resource_id not in indexes:
+                indexes[placement.resource_id] = self.build_occupancy_index(
+                    first_monday, self.SCHEDULE_HORIZON_WEEKS, resource_id=placement.resource_id,
+                )
+            occupied = indexes[placement.resource_id]
+            # Plan calculé avant une autre écriture : le créneau a pu être pris
+            if not occupied.is_free(start, end):
+                skipped[task.id] = "slot taken in the meantime"
+                continue
+            cursor.execute('''
+                UPDATE tasks SET scheduled_time = ?, resource_id = ?, version = version + 1
+                WHERE id = ? AND version = ?
+            ''', (placement.scheduled_time, placement.resource_id, task.id, task.version))
+            if cursor.rowcount == 0:
+                # Modifiée depuis la lecture (version différente) : on n'écrase rien
+                skipped[task.id] = "changed by another session"
+                continue
+            occupied.add(start, end, task)
+        return skipped
+    
+    def resource_names(self) -> Dict[int, str]:
+        """{id: nom} des ressources, depuis le snapshot"""
+        return {resource.id: resource.name for resource in self.task_manager.snapshot().resources}
+    
+    def print_applied(self, plan: Plan, skipped: Dict[int, str]) -> bool:
+        """Affiche le résultat d'un plan appliqué, une ligne par tâche ; False si des tâches restent non placées ou écartées"""
+        names = self.resource_names()
+        for placement in plan.placements:
+            title = placement.task.title
+            if placement.task.id in skipped:
+                console.print(f"[yellow]⚠[/yellow] Skipped: {title} ({skipped[placement.task.id]})")
+            else:
+                who = f" → {names.get(placement.resource_id, '?')}" if placement.resource_id is not None else ""
+                console.print(f"[green]✓[/green] {title} scheduled: [blue]{placement.scheduled_time}[/blue]{who}")
+        if plan.unplaced and not plan.available_hours:
             console.print("[red]No availability defined.[/red]")
-            conn.close()
-            return
+        else:
+            for task in plan.unplaced:
+                reason = f", {plan.blocked[task.id]}" if task.id in plan.blocked else ""
+                console.print(f"[red]✗[/red] Cannot schedule: {task.title} (duration: {task.duration}h{reason})")
+        scheduled_count = len(plan.placements) - len(skipped)
+        console.print(f"\n[bold green]{scheduled_count}[/bold green] task(s) scheduled automatically.")
+        return not plan.unplaced and not skipped
+    
+    def show_plan(self, plan: Plan):
+        """Aperçu d'un plan, sans écriture"""
+        table = Table(title=f"🧪 Schedule preview ({plan.strategy})")
+        table.add_column("ID", style="cyan", width=4)
+        table.add_column("Title", style="magenta", width=20)
+        table.add_column("Duration", style="green", width=8)
+        table.add_column("Slot", style="blue", width=26)
+        # Colonne "Who" seulement si le plan touche des ressources
+        names = self.resource_names()
+        shared = any(placement.resource_id is not None for placement in plan.placements) or any(
+            task.resource_id is not None for task in plan.unplaced
+        )
+        if shared:
+            table.add_column("Who", style="yellow", width=12)
+        for placement in plan.placements:
+            task = placement.task
+            who = [names.get(placement.resource_id, "-")] if shared else []
+            table.add_row(str(task.id), task.title[:20], f"{task.duration}h", placement.scheduled_time, *who)
+        for task in plan.unplaced:
+            reason = plan.blocked.get(task.id, "no free slot")
+            who = [names.get(task.resource_id, "-")] if shared else []
+            table.add_row(str(task.id), task.title[:20], f"{task.duration}h", f"[red]{reason}[/red]", *who)
+        console.print(table)
+        console.print(
+            f"{len(plan.placements)} placed, {len(plan.unplaced)} unplaced | "
+            f"utilization {plan.utilization_before:.0%} → [bold]{plan.utilization:.0%}[/bold] | "
+            f"computed in {plan.elapsed_ms:.1f} ms"
+        )
+    
+    def preview_plan(self, strategy: str = "first-fit", pool: bool = False) -> Optional[Plan]:
+        """
+        Calcule et affiche un plan sans l'écrire ; None s'il n'y a rien à planifier
+        Le plan retourné s'écrit tel quel avec apply_plan (après confirmation)
+        """
+        if not self._backlog(self.task_manager.snapshot()):
+            console.print("[yellow]No non-recurring tasks to schedule.[/yellow]")
+            return None
+        plan = self.plan(strategy, pool=pool)
+        self.show_plan(plan)
+        return plan
+    
+    def compare_strategies(self, pool: bool = False) -> Dict[str, Plan]:
+        """
+        Calcule le plan de chaque stratégie sur le même snapshot et les compare
+        Retourne les plans par stratégie : celui choisi peut être écrit avec apply_plan
+        """
+        snapshot = self.task_manager.snapshot()
+        plans = {}
+        table = Table(title="🧪 Scheduling strategies")
+        table.add_column("Strategy", style="cyan", no_wrap=True)
+        table.add_column("Placed", justify="right")
+        table.add_column("Unplaced", justify="right")
+        table.add_column("Hours", justify="right")
+        table.add_column("Utilization", justify="right", style="green")
+        table.add_column("Last slot", style="blue")
+        table.add_column("Time", justify="right", style="dim")
+        for strategy in STRATEGIES:
+            plan = plans[strategy] = self.plan(strategy, snapshot, pool)
+            table.add_row(
+                strategy, str(len(plan.placements)), str(len(plan.unplaced)), f"{plan.planned_hours}h",
+                f"{plan.utilization:.0%}", plan.finish.strftime("%a %d/%m") if plan.finish else "-",
+                f"{plan.elapsed_ms:.1f} ms",
+            )
+        console.print(table)
+        return plans
+    
+    def rebalance(self, seconds: float = 1.0, seed: Optional[int] = None) -> bool:
+        """
+        Déplace les tâches datées (non récurrentes, non terminées, non épinglées) de l'horizon
+        de planification pour égaliser la charge par jour, en respectant les
+        disponibilités et les créneaux fixes. Les déplacements sont écrits en
+        une transaction, seulement si aucune tâche n'a changé pendant le calcul.
+        Retourne False si une écriture concurrente a empêché les déplacements.
+        """
+        snapshot = self.task_manager.snapshot()
+        free_time = snapshot.free_time
+        
+        search_start, first_monday = self._horizon()
+        weeks = [self.get_week_dates_from(first_monday + timedelta(weeks=week)) for week in range(self.SCHEDULE_HORIZON_WEEKS)]
+        dates = [day for week_dates in weeks for day in week_dates if day >= search_start]
+        
+        # Dépendances : position (heures absolues) de chaque tâche datée, tous calendriers
+        prerequisites = snapshot.prerequisites
+        dependents: Dict[int, List[int]] = {}
+        for task_id, required in prerequisites.items():
+            for prerequisite in required:
+                dependents.setdefault(prerequisite, []).append(task_id)
+        positions = {}
+        for task in self._planned_tasks(snapshot):
+            if not task.recurring and task.scheduled_date is not None:
+                for week_dates in weeks:
+                    days = task.days_in_week(week_dates)
+                    if days:
+                        start = to_slot(week_dates[days[0]], task.start_hour)
+                        positions[task.id] = (start, start + task.end_hour - task.start_hour)
+                        break
         
-        # Récupère les créneaux déjà occupés par les tâches récurrentes
-        cursor.execute('''
-            SELECT recurring_days, recurring_hours FROM tasks 
-            WHERE recurring = TRUE AND recurring_hours IS NOT NULL
-        ''')
-        recurring_tasks = cursor.fetchall()
-        
-        # Construire une liste des créneaux occupés
-        occupied_slots = set()
-        days_map = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
-        
-        for recurring_days, recurring_hours in recurring_tasks:
-            if recurring_hours and '-' in recurring_hours:
-                try:
-                    start_hour, end_hour = map(int, recurring_hours.split('-'))
-                    if recurring_days == 'daily':
-                        for day in range(7):
-                            for hour in range(start_hour, end_hour):
-                                occupied_slots.add((day, hour))
+        rebalancer = Rebalancer(dates, free_time, seed)
+        movable = []
+        # Calendrier par défaut seulement : ses disponibilités sont celles de free_time
+        for task in self._planned_tasks(snapshot, None):
+            for week_dates in weeks:
+                for day in task.days_in_week(week_dates):
+                    if not task.recurring and task.scheduled_date is not None and not task.pinned:
+                        movable.append((task, week_dates[day]))
                     else:
-                        for day_name in recurring_days.split(','):
-                            day_name = day_name.strip()
-                            if day_name in days_map:
-                                day = days_map[day_name]
-                                for hour in range(start_hour, end_hour):
-                                    occupied_slots.add((day, hour))
-                except ValueError:
-                    continue
-        
-        # Planning des tâches
-        scheduled_count = 0
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        
-        for task_id, title, duration in tasks:
-            scheduled = False
-            
-            for day, start_hour, end_hour in availability:
-                # Cherche un créneau libre de la durée nécessaire
-                for current_hour in range(start_hour, end_hour - duration + 1):
-                    # Vérifie si toutes les heures nécessaires sont libres
-                    conflict = False
-                    for h in range(current_hour, current_hour + duration):
-                        if (day, h) in occupied_slots:
-                            conflict = True
-                            break
-                    
-                    if not conflict:
-                        # Planifie la tâche
-                        schedule_time = f"{days[day]} {current_hour}h-{current_hour + duration}h"
-                        
+                        rebalancer.add_fixed(week_dates[day], task.start_hour, task.end_hour)
+        for task, day in movable:
+            rebalancer.add_movable(task, day)
+        for task, _day in movable:
+            if not rebalancer.is_movable(task.id):
+                continue
+            # Prérequis et dépendants déplaçables : borne selon leur position courante ;
+            # les autres (autre calendrier, hors horizon, jour indisponible) sont fixes
+            earliest = latest = None
+            for prerequisite in prerequisites.get(task.id, ()):
+                if rebalancer.is_movable(prerequisite):
+                    rebalancer.add_dependency(task.id, prerequisite)
+                elif prerequisite in positions:
+                    earliest = max(earliest or 0, positions[prerequisite][1])
+            for dependent in dependents.get(task.id, ()):
+                if not rebalancer.is_movable(dependent) and dependent in positions:
+                    latest = positions[dependent][0] if latest is None else min(latest, positions[dependent][0])
+            rebalancer.limit(task.id, earliest, latest)
+        movable_count = len(rebalancer.movable)
+        
+        if movable_count == 0:
+            console.print("[yellow]No scheduled tasks to rebalance in the next weeks.[/yellow]")
+            return True
+        
+        variance_before = rebalancer.variance()
+        moves = rebalancer.run(seconds)
+        variance_after = rebalancer.variance()
+        
+        if moves:
+            try:
+                with self.task_manager.transaction() as cursor:
+                    for task, new_date, start_hour in moves:
+                        schedule_time = format_scheduled_time(new_date, start_hour, start_hour + task.end_hour - task.start_hour)
                         cursor.execute('''
-                            UPDATE tasks SET scheduled_time = ? WHERE id = ?
-                        ''', (schedule_time, task_id))
-                        
-                        # Marque ces créneaux comme occupés
-                        for h in range(current_hour, current_hour + duration):
-                            occupied_slots.add((day, h))
-                        
-                        console.print(f"[green]✓[/green] {title} scheduled: [blue]{schedule_time}[/blue]")
-                        scheduled_count += 1
-                        scheduled = True
-                        break
-                
-                if scheduled:
-                    break
+                            UPDATE tasks SET scheduled_time = ?, version = version + 1
+                            WHERE id = ? AND version = ?
+                        ''', (schedule_time, task.id, task.version))
+                        if cursor.rowcount == 0:
+                            raise ConcurrentModification(task)
+            except ConcurrentModification as e:
+                console.print(f"[red]✗[/red] {e.task.title} was changed by another session, nothing moved. Run rebalance again.")
+                return False
             
-            if not scheduled:
-                console.print(f"[red]✗[/red] Cannot schedule: {title} (duration: {duration}h)")
-        
-        conn.commit()
-        conn.close()
+            table = Table(title="⚖️ Rebalanced tasks")
+            table.add_column("ID", style="cyan", width=4)
+            table.add_column("Title", style="magenta", width=20)
+            table.add_column("From", style="red", width=22)
+            table.add_column("To", style="green", width=22)
+            for task, new_date, start_hour in moves:
+                table.add_row(
+                    str(task.id), task.title[:20], task.scheduled_time,
+                    format_scheduled_time(new_date, start_hour, start_hour + task.end_hour - task.start_hour),
+                )
+            console.print(table)
+        
+        console.print(
+            f"Daily load variance: {variance_before:.2f} → [bold green]{variance_after:.2f}[/bold green] "
+            f"(std {math.sqrt(variance_before):.1f}h → {math.sqrt(variance_after):.1f}h) | "
+            f"{len(moves)} task(s) moved, {rebalancer.iterations:,} moves evaluated in {seconds:g}s"
+        )
+        return True
+    
+    def _planned_tasks(self, snapshot=None, resource_id=ANY_RESOURCE) -> List[Task]:
+        """
+        Tâches non terminées qui occupent le planning, lues depuis le snapshot
+        Avec resource_id : seulement celles de ce calendrier (None = calendrier par défaut)
+        """
+        if snapshot is None:
+            snapshot = self.task_manager.snapshot()
+        if resource_id is ANY_RESOURCE:
+            return [task for task in snapshot.tasks if not task.completed and task.is_placed]
+        return [
+            task for task in snapshot.tasks
+            if not task.completed and task.is_placed and task.resource_id == resource_id
+        ]
+    
+    def build_occupancy_index(self, first_monday: date, weeks: int, snapshot=None, resource_id=ANY_RESOURCE) -> IntervalIndex:
+        """Construit l'index des créneaux occupés sur `weeks` semaines à partir d'un lundi"""
+        index = IntervalIndex()
+        tasks = self._planned_tasks(snapshot, resource_id)
+        for week in range(weeks):
+            week_dates = self.get_week_dates_from(first_monday + timedelta(weeks=week))
+            for task in tasks:
+                for day in task.days_in_week(week_dates):
+                    index.add(to_slot(week_dates[day], task.start_hour), to_slot(week_dates[day], task.end_hour), task)
+        return index
+    
+    def occupancy_index(self, first_monday: date, weeks: int, resource_id=ANY_RESOURCE) -> IntervalIndex:
+        """Index des créneaux occupés, mis en cache jusqu'au prochain changement de la base"""
+        snapshot = self.task_manager.snapshot()
+        key = ("occupancy", first_monday, weeks, "any" if resource_id is ANY_RESOURCE else resource_id)
+        if key not in snapshot.derived:
+            snapshot.derived[key] = self.build_occupancy_index(first_monday, weeks, snapshot, resource_id)
+        return snapshot.derived[key]
+    
+    def _conflict_index(self, target_date: date, resource_id: Optional[int]) -> IntervalIndex:
+        """Index d'un calendrier couvrant la semaine de target_date et les suivantes"""
+        first_monday = target_date - timedelta(days=target_date.weekday())
+        return self.occupancy_index(first_monday, self.CONFLICT_HORIZON_WEEKS, resource_id)
+    
+    def find_conflicts(self, target_date: date, start_hour: int, end_hour: int, resource_id: Optional[int] = None) -> List[Task]:
+        """Tâches du même calendrier qui occupent déjà une partie de [start_hour, end_hour) à cette date"""
+        index = self._conflict_index(target_date, resource_id)
+        return index.overlapping(to_slot(target_date, start_hour), to_slot(target_date, end_hour))
+    
+    def suggest_slot(self, target_date: date, start_hour: int, duration: int, resource_id: Optional[int] = None) -> Optional[Tuple[date, int]]:
+        """Prochain créneau libre (dans les disponibilités du calendrier) à partir de l'heure demandée"""
+        index = self._conflict_index(target_date, resource_id)
+        first_monday = target_date - timedelta(days=target_date.weekday())
+        limit = to_slot(first_monday + timedelta(weeks=self.CONFLICT_HORIZON_WEEKS), 0)
+        free_time = self.task_manager.snapshot().free_time_of(resource_id)
+        slot = index.next_free(to_slot(target_date, start_hour), duration, free_time, limit)
+        return from_slot(slot) if slot is not None else None
+    
+    def print_conflicts(self, conflicts: List[Task], suggestion: Optional[Tuple[date, int]], duration: int):
+        """Affiche les tâches en conflit et le créneau libre suggéré"""
+        for task in conflicts:
+            when = f"recurring {task.recurring_days} {task.recurring_hours}" if task.recurring else task.scheduled_time
+            console.print(f"[red]✗[/red] Conflicts with [bold]{task.title}[/bold] (#{task.id}, {when})")
+        if suggestion is not None:
+            suggested_date, suggested_hour = suggestion
+            slot = format_scheduled_time(suggested_date, suggested_hour, suggested_hour + duration)
+            console.print(f"[yellow]→[/yellow] Next free slot: [blue]{slot}[/blue]")
+        else:
+            console.print("[yellow]→[/yellow] No free slot found in the next weeks")
+    
+    def build_week_schedule(self, week_dates, snapshot=None, resource_id=DISPLAYED) -> Dict[str, Dict[int, str]]:
+        """Construit {jour: {heure: titre}} pour la semaine donnée (par défaut, du calendrier affiché)"""
+        if resource_id is DISPLAYED:
+            resource_id = self.resource_id
+        schedule = {day: {} for day in DAY_NAMES}
+        for task in self._planned_tasks(snapshot, resource_id):
+            for day in task.days_in_week(week_dates):
+                day_schedule = schedule[DAY_NAMES[day]]
+                for hour in range(task.start_hour, task.end_hour):
+                    day_schedule[hour] = task.title
+        return schedule
+    
+    def build_week_grid(self, offset: Optional[int] = None, snapshot=None, resource_id=DISPLAYED) -> WeekGrid:
+        """
+        Construit la WeekGrid d'une semaine (par défaut la semaine et le calendrier affichés)
+        Avec un snapshot explicite, n'accède pas à SQLite (utilisable depuis un thread)
+        """
+        if offset is None:
+            offset = self.current_week_offset
+        if resource_id is DISPLAYED:
+            resource_id = self.resource_id
+        week_dates = self.get_week_dates(offset)
+        if self.backend == "numpy":
+            if snapshot is None:
+                snapshot = self.task_manager.snapshot()
+            tasks = self._planned_tasks(snapshot, resource_id)
+            return WeekGrid(offset, week_dates, SlotArray(tasks, week_dates[0], 1).week_cells())
+        schedule = self.build_week_schedule(week_dates, snapshot, resource_id)
+        cells = {
+            (day, hour): title
+            for day, day_name in enumerate(DAY_NAMES)
+            for hour, title in schedule[day_name].items()
+        }
+        return WeekGrid(offset, week_dates, cells)
+    
+    def week_grid(self, offset: Optional[int] = None, resource_id=DISPLAYED) -> WeekGrid:
+        """
+        WeekGrid depuis le cache de semaines ; relance le préchargement autour de l'offset
+        Sans argument : semaine et calendrier affichés
+        """
+        if offset is None:
+            offset = self.current_week_offset
+        if resource_id is DISPLAYED:
+            resource_id = self.resource_id
+        snapshot = self.task_manager.snapshot()
+        grid = self.week_cache.get(snapshot, (resource_id, offset))
+        if self.prefetch:
+            self.week_cache.prefetch(snapshot, ((resource_id, offset - 1), (resource_id, offset + 1)))
+        return grid
+    
+    def prefetch_weeks(self):
+        """Précalcule en arrière-plan les semaines N-1, N et N+1 autour de la semaine affichée"""
+        if not self.prefetch:
+            return
+        offset, resource_id = self.current_week_offset, self.resource_id
+        self.week_cache.prefetch(
+            self.task_manager.snapshot(), [(resource_id, week) for week in (offset, offset - 1, offset + 1)]
+        )
+    
+    def _schedule_from_grid(self, grid: WeekGrid) -> Dict[str, Dict[int, str]]:
+        """Convertit une WeekGrid en {jour: {heure: titre}} pour les rendus texte"""
+        schedule = {day: {} for day in DAY_NAMES}
+        for (day, hour), title in grid.cells.items():
+            schedule[DAY_NAMES[day]][hour] = title
+        return schedule
+    
+    def week_load(self, week_dates) -> List[Tuple]:
+        """
+        Charge par date : (date, heures réservées, heures disponibles)
+        Réservé vient des tables de résumé, disponible du cache des disponibilités
+        """
+        booked = self.task_manager.booked_hours(week_dates)
+        free_time = self.task_manager.free_time()
+        return [(day, booked[day], free_time.free_hours(day)) for day in week_dates]
+    
+    def show_stats(self, weeks: int = 4):
+        """Affiche le résumé global, la charge par jour et par semaine"""
+        summary = self.task_manager.task_summary()
+        
+        overview = Table(title="📊 Workload Statistics", show_header=False)
+        overview.add_column("Metric", style="cyan")
+        overview.add_column("Value", style="white")
+        overview.add_row("Tasks", f"{summary.task_count} ({summary.done_count} done, {summary.completion_rate:.0%})")
+        overview.add_row("Hours", f"{summary.total_hours}h ({summary.done_hours}h done)")
+        overview.add_row("Unscheduled", f"{summary.backlog_count} task(s), {summary.backlog_hours}h")
+        console.print(overview)
         
-        console.print(f"\n[bold green]{scheduled_count}[/bold green] task(s) scheduled automatically.")
+        week_dates = self.get_week_dates(self.current_week_offset)
+        days_table = Table(title=f"📅 Load ({week_dates[0].strftime('%d/%m')} - {week_dates[6].strftime('%d/%m')})")
+        days_table.add_column("Day", style="cyan")
+        days_table.add_column("Booked", style="magenta", justify="right")
+        days_table.add_column("Available", style="green", justify="right")
+        days_table.add_column("Free", style="blue", justify="right")
+        days_table.add_column("Load", style="yellow", justify="right")
+        for day, booked, available in self.week_load(week_dates):
+            days_table.add_row(
+                f"{DAY_NAMES[day.weekday()][:3]} {day.strftime('%d/%m')}",
+                f"{booked}h", f"{available}h", f"{max(available - booked, 0)}h",
+                f"{booked / available:.0%}" if available else "-",
+            )
+        console.print(days_table)
+        
+        weeks_table = Table(title=f"🗓️ Next {weeks} week(s)")
+        weeks_table.add_column("Week", style="cyan")
+        weeks_table.add_column("Booked", style="magenta", justify="right")
+        weeks_table.add_column("Available", style="green", justify="right")
+        weeks_table.add_column("Free", style="blue", justify="right")
+        weeks_table.add_column("Load", style="yellow", justify="right")
+        for offset in range(self.current_week_offset, self.current_week_offset + weeks):
+            dates = self.get_week_dates(offset)
+            load = self.week_load(dates)
+            booked = sum(hours for _, hours, _ in load)
+            available = sum(hours for _, _, hours in load)
+            free = sum(max(avail - hours, 0) for _, hours, avail in load)
+            weeks_table.add_row(
+                f"{dates[0].strftime('%d/%m')} - {dates[6].strftime('%d/%m')}",
+                f"{booked}h", f"{available}h", f"{free}h",
+                f"{booked / available:.0%}" if available else "-",
+            )
+        console.print(weeks_table)
     
     def show_schedule(self):
         """Affiche le planning de la semaine sous forme de tableau"""
-        conn = sqlite3.connect(self.task_manager.db_path)
-        cursor = conn.cursor()
-        
-        # Récupère toutes les tâches planifiées (récurrentes + programmées)
-        cursor.execute('''
-            SELECT title, scheduled_time, duration, recurring, recurring_days, recurring_hours
-            FROM tasks
-            WHERE (scheduled_time IS NOT NULL OR (recurring = TRUE AND recurring_hours IS NOT NULL)) 
-            AND completed = FALSE
-        ''')
-        
-        tasks = cursor.fetchall()
-        conn.close()
-        
-        # Obtenir les dates de la semaine
-        week_dates = self.get_week_dates(self.current_week_offset)
+        # Rendu réutilisé tant que la base, le jour et la largeur du terminal n'ont pas changé
+        view = "planning" if self.resource_id is ANY_RESOURCE else f"planning@{self.resource_id or 'default'}"
+        self.task_manager.render_cache.show(view, self.current_week_offset, self._print_schedule)
+    
+    def _print_schedule(self):
+        """Planning de la semaine courante (rendu mis en cache par show_schedule)"""
+        # Grille de la semaine (souvent déjà précalculée)
+        grid = self.week_grid()
+        week_dates = grid.week_dates
         
         # Affichage de l'en-tête avec les dates
         week_start = week_dates[0].strftime("%d/%m")
         week_end = week_dates[6].strftime("%d/%m")
         print(f"\n=== WEEKLY SCHEDULE ({week_start} - {week_end}) ===")
+        if self.resource_id is not ANY_RESOURCE:
+            print(f"Resource: {self.resource_label()}")
         
         if self.current_week_offset == 0:
             print("(Current week)")
@@ -167,50 +730,9 @@ class PlanningEngine:
         else:
             print(f"({self.current_week_offset} week{'s' if self.current_week_offset < -1 else ''})")
         
-        # Créer un planning par jour
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        days_short = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
-        schedule = {day: {} for day in days}
-        
-        for title, scheduled_time, duration, recurring, recurring_days, recurring_hours in tasks:
-            if recurring and recurring_hours:
-                # Tâche récurrente
-                if '-' in recurring_hours:
-                    try:
-                        start_hour, end_hour = map(int, recurring_hours.split('-'))
-                        if recurring_days == 'daily':
-                            target_days = days
-                        else:
-                            target_days = []
-                            for day_short in recurring_days.split(','):
-                                day_short = day_short.strip()
-                                if day_short in days_short:
-                                    target_days.append(days[days_short.index(day_short)])
-                        
-                        for day in target_days:
-                            if day in schedule:
-                                for hour in range(start_hour, end_hour):
-                                    schedule[day][hour] = f"{title}"
-                    except ValueError:
-                        continue
-            elif scheduled_time:
-                # Tâche programmée
-                if 'h-' in scheduled_time:
-                    parts = scheduled_time.split(' ')
-                    if len(parts) >= 2:
-                        day_name = parts[0]
-                        time_part = parts[1]
-                        if 'h-' in time_part:
-                            try:
-                                start_str, end_str = time_part.split('-')
-                                start_hour = int(start_str.replace('h', ''))
-                                end_hour = int(end_str.replace('h', ''))
-                                
-                                if day_name in schedule:
-                                    for hour in range(start_hour, end_hour):
-                                        schedule[day_name][hour] = f"{title}"
-                            except ValueError:
-                                continue
+        # Créer un planning par jour (récurrentes + programmées)
+        days = DAY_NAMES
+        schedule = self._schedule_from_grid(grid)
         
         # Affichage du planning avec dates
         if not any(schedule.values()):
@@ -231,21 +753,32 @@ class PlanningEngine:
                 print(f"| {task[:10]:10}", end="")
             print()
         
+        # Heures encore libres par date, dans les disponibilités effectives du calendrier affiché
+        resource_id = None if self.resource_id is ANY_RESOURCE else self.resource_id
+        free_time = self.task_manager.snapshot().free_time_of(resource_id)
+        print("-" * (6 + 13 * len(days)))
+        print("Free ", end="")
+        for i, day in enumerate(days):
+            windows = free_time.windows(week_dates[i])
+            booked = sum(1 for hour in schedule[day] if windows.covering(hour) is not None)
+            print(f"| {str(windows.total_hours - booked) + 'h':10}", end="")
+        print()
+        
         print(f"\nCommands: 'next' (next week) | 'prev' (previous week) | 'planning' (current week)")
     
     def get_compact_schedule_content(self) -> str:
         """
         Retourne le planning sous forme de texte compact pour l'interface TUI
         """
-        conn = sqlite3.connect(self.task_manager.db_path)
-        cursor = conn.cursor()
-        
-        # Get week dates
-        week_dates = self.get_week_dates(self.current_week_offset)
+        # Get week grid (usually prefetched)
+        grid = self.week_grid()
+        week_dates = grid.week_dates
         week_start = week_dates[0].strftime("%d/%m")
         week_end = week_dates[6].strftime("%d/%m")
         
         content = f"📅 SCHEDULE ({week_start} - {week_end})\n"
+        if self.resource_id is not ANY_RESOURCE:
+            content += f"👤 {self.resource_label()}\n"
         
         if self.current_week_offset == 0:
             content += "(Current week)\n\n"
@@ -254,60 +787,12 @@ class PlanningEngine:
         else:
             content += f"({self.current_week_offset} week)\n\n"
         
-        # Get tasks
-        cursor.execute('''
-            SELECT title, scheduled_time, duration, recurring, recurring_days, recurring_hours
-            FROM tasks
-            WHERE (scheduled_time IS NOT NULL OR (recurring = TRUE AND recurring_hours IS NOT NULL)) 
-            AND completed = FALSE
-        ''')
-        tasks = cursor.fetchall()
-        conn.close()
-        
         # Create schedule grid
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        days_short = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
-        schedule = {day: {} for day in days}
-        
-        for title, scheduled_time, duration, recurring, recurring_days, recurring_hours in tasks:
-            if recurring and recurring_hours:
-                # Tâche récurrente
-                if '-' in recurring_hours:
-                    try:
-                        start_hour, end_hour = map(int, recurring_hours.split('-'))
-                        if recurring_days == 'daily':
-                            target_days = days
-                        else:
-                            target_days = []
-                            for day_short in recurring_days.split(','):
-                                day_short = day_short.strip()
-                                if day_short in days_short:
-                                    target_days.append(days[days_short.index(day_short)])
-                        
-                        for day in target_days:
-                            if day in schedule:
-                                for hour in range(start_hour, end_hour):
-                                    schedule[day][hour] = title[:6]
-                    except ValueError:
-                        continue
-            elif scheduled_time:
-                # Tâche programmée
-                if 'h-' in scheduled_time:
-                    parts = scheduled_time.split(' ')
-                    if len(parts) >= 2:
-                        day_name = parts[0]
-                        time_part = parts[1]
-                        if 'h-' in time_part:
-                            try:
-                                start_str, end_str = time_part.split('-')
-                                start_hour = int(start_str.replace('h', ''))
-                                end_hour = int(end_str.replace('h', ''))
-                                
-                                if day_name in schedule:
-                                    for hour in range(start_hour, end_hour):
-                                        schedule[day_name][hour] = title[:6]
-                            except ValueError:
-                                continue
+        days = DAY_NAMES
+        schedule = {
+            day: {hour: title[:6] for hour, title in day_schedule.items()}
+            for day, day_schedule in self._schedule_from_grid(grid).items()
+        }
         
         if any(schedule.values()):
             content += "Time |Mon |Tue |Wed |Thu |Fri |Sat |Sun\n"
@@ -335,14 +820,37 @@ class PlanningEngine:
         content += f"\nNav: Next Week (n) | Prev Week (b)"
         return content
     
+    def resource_label(self, resource_id=DISPLAYED) -> str:
+        """Nom d'un calendrier (par défaut, du calendrier affiché)"""
+        if resource_id is DISPLAYED:
+            resource_id = self.resource_id
+        if resource_id is ANY_RESOURCE:
+            return "everyone"
+        if resource_id is None:
+            return "default calendar"
+        return self.resource_names().get(resource_id, f"#{resource_id}")
+    
+    def reset_view(self):
+        """Semaine courante, tous les calendriers, moteur Python : l'état d'un moteur neuf"""
+        self.current_week_offset = 0
+        self.set_resource(ANY_RESOURCE)
+        self.set_backend("python")
+    
+    def close(self):
+        """Arrête le préchargement des semaines (à la fin d'une session TUI ou serveur)"""
+        self.week_cache.shutdown()
+    
     def next_week(self):
         """Passe à la semaine suivante"""
         self.current_week_offset += 1
+        self.prefetch_weeks()
     
     def prev_week(self):
         """Passe à la semaine précédente"""
         self.current_week_offset -= 1
+        self.prefetch_weeks()
     
     def current_week(self):
         """Retourne à la semaine actuelle"""
-        self.current_week_offset = 0
\ No newline at end of file
+        self.current_week_offset = 0
+        self.prefetch_weeks()
\ No newline at end of file
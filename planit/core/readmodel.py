@@ -0,0 +1,265 @@
+"""
+In-memory read model for PlanIt
+"""
+
+import heapq
+import sqlite3
+import threading
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
+
+from planit.core.availability import FreeTimeCache
+from planit.core.changelog import Changes, changes_since, last_change
+from planit.core.dependencies import prerequisites_map
+from planit.core.models import Task, Project, Resource, task_row_factory, project_row_factory, resource_row_factory
+
+# Colonnes lues pour construire une Task (même ordre que son constructeur)
+TASK_COLUMNS = "id, title, duration, completed, scheduled_time, recurring, recurring_days, recurring_hours, version, project_id, resource_id, pinned"
+TASKS_QUERY = f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY id ASC"
+
+_by_id = attrgetter("id")
+
+
+class Snapshot:
+    """
+    Copie en mémoire des tâches, projets, ressources et disponibilités
+    Chargée en une fois, puis servie sans SQL tant que la base ne change pas
+    """
+
+    __slots__ = (
+        "tasks", "projects", "availability", "exceptions", "dependencies", "data_version", "derived",
+        "resources", "resource_availability", "resource_exceptions",
+        "_free_time", "_prerequisites", "_resource_free_time", "_lock",
+    )
+
+    def __init__(self, tasks: List[Task], projects: List[Project], availability: List[Tuple], exceptions: List[Tuple], data_version: int, dependencies: List[Tuple] = (),
+                 resources: List[Resource] = (), resource_availability: Dict[int, List[Tuple]] = None, resource_exceptions: Dict[int, List[Tuple]] = None):
+        self.tasks = tasks
+        # Projets triés par start_date
+        self.projects = projects
+        # availability: (day_of_week, start_hour, end_hour), triés par jour
+        self.availability = availability
+        # exceptions: (date ISO, start_hour, end_hour), heures NULL = jour off
+        self.exceptions = exceptions
+        # dependencies: (task_id, depends_on)
+        self.dependencies = dependencies
+        # Ressources triées par nom ; leurs disponibilités et exceptions par resource_id
+        # (availability/exceptions ci-dessus = calendrier par défaut)
+        self.resources = resources
+        self.resource_availability = resource_availability or {}
+        self.resource_exceptions = resource_exceptions or {}
+        self.data_version = data_version
+        # Structures dérivées (index, grilles...) : jetées avec le snapshot
+        self.derived = {}
+        self._free_time = None
+        self._prerequisites = None
+        self._resource_free_time = {}
+        # Champs paresseux : le snapshot est aussi lu par le thread de
+        # préchargement des semaines et par les threads du serveur HTTP
+        self._lock = threading.Lock()
+
+    @property
+    def prerequisites(self) -> Dict[int, List[int]]:
+        """{tâche: [tâches qui doivent finir avant]}, construit une fois par snapshot"""
+        if self._prerequisites is None:
+            with self._lock:
+                if self._prerequisites is None:
+                    self._prerequisites = prerequisites_map(self.dependencies)
+        return self._prerequisites
+
+    @property
+    def free_time(self) -> FreeTimeCache:
+        """Disponibilités effectives par date, fusionnées une fois par snapshot"""
+        if self._free_time is None:
+            with self._lock:
+                if self._free_time is None:
+                    self._free_time = FreeTimeCache(self.availability, self.exceptions)
+        return self._free_time
+
+    def free_time_of(self, resource_id: Optional[int]) -> FreeTimeCache:
+        """Disponibilités d'une ressource (None = calendrier par défaut)"""
+        if resource_id is None:
+            return self.free_time
+        free_time = self._resource_free_time.get(resource_id)
+        if free_time is None:
+            with self._lock:
+                free_time = self._resource_free_time.get(resource_id)
+                if free_time is None:
+                    free_time = self._resource_free_time[resource_id] = FreeTimeCache(
+                        self.resource_availability.get(resource_id, []),
+                        self.resource_exceptions.get(resource_id, []),
+                    )
+        return free_time
+
+
+class ReadModel:
+    """
+    Cache de lecture revalidé avec PRAGMA data_version
+
+    data_version change dès qu'une AUTRE connexion commit sur la base.
+    Les écritures faites sur la connexion partagée de TaskManager ne le
+    modifient pas : TaskManager appelle invalidate() après chacune.
+
+    Un snapshot périmé n'est pas rechargé en entier : les lignes notées
+    dans change_log depuis le dernier chargement sont relues par id, et
+    seules les tables touchées sont relues. Rechargement complet si le
+    journal a été purgé entre-temps ou s'il y a plus de PATCH_LIMIT
+    écritures, et dans une transaction encore ouverte (elle peut être
+    annulée, avec ses lignes de change_log).
+    """
+
+    # Au-delà, relire toute la table coûte moins cher que les requêtes par id
+    PATCH_LIMIT = 2000
+    # Ids par requête "WHERE id IN (...)" (limite de variables des vieux SQLite : 999)
+    PATCH_CHUNK = 500
+
+    def __init__(self, conn: sqlite3.Connection, lock):
+        self.conn = conn
+        self._lock = lock
+        self._snapshot = None
+        self._dirty = False
+        # Dernière entrée de change_log couverte par le snapshot, None = inconnue
+        self._seq = None
+
+    def data_version(self) -> int:
+        """Lit le compteur de modifications de SQLite (une seule pragma, pas de table lue)"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def is_stale(self) -> bool:
+        """Vrai si la base a été modifiée depuis le dernier chargement"""
+        return self._snapshot is None or self._dirty or self._snapshot.data_version != self.data_version()
+
+    def invalidate(self):
+        """Force la revalidation au prochain accès (le snapshot actuel sert de base)"""
+        self._dirty = True
+
+    def snapshot(self) -> Snapshot:
+        """Retourne le snapshot courant, mis à jour seulement si la base a changé"""
+        with self._lock:
+            if self.is_stale():
+                self._snapshot = self._refresh()
+                self._dirty = False
+            return self._snapshot
+
+    def _refresh(self) -> Snapshot:
+        if self.conn.in_transaction:
+            self._seq = None
+            return self._load()
+        if self._snapshot is None or self._seq is None:
+            # Numéro lu avant les tables : une écriture concurrente sera rejouée, jamais perdue
+            self._seq = last_change(self.conn)
+            return self._load()
+        changes = changes_since(self.conn, self._seq, self.PATCH_LIMIT)
+        self._seq = changes.seq
+        if changes.full:
+            return self._load()
+        return self._patch(changes)
+
+    def _load(self) -> Snapshot:
+        """Charge tâches, projets, ressources, disponibilités et exceptions en une passe"""
+        version = self.data_version()
+        cursor = self.conn.cursor()
+        availability, resource_availability = self._load_availability(cursor)
+        exceptions, resource_exceptions = self._load_exceptions(cursor)
+        return Snapshot(
+            self._load_tasks(cursor), self._load_projects(cursor), availability, exceptions, version,
+            self._load_dependencies(cursor), self._load_resources(cursor), resource_availability, resource_exceptions,
+        )
+
+    def _patch(self, changes: Changes) -> Snapshot:
+        """Nouveau snapshot : lignes modifiées relues, tables inchangées partagées avec l'ancien"""
+        old = self._snapshot
+        version = self.data_version()
+        cursor = self.conn.cursor()
+        tasks = self._patch_tasks(cursor, old.tasks, changes.rows["tasks"]) if changes.touches("tasks") else old.tasks
+        projects = self._load_projects(cursor) if changes.touches("projects") else old.projects
+        resources = self._load_resources(cursor) if changes.touches("resources") else old.resources
+        if changes.touches("availability"):
+            availability, resource_availability = self._load_availability(cursor)
+        else:
+            availability, resource_availability = old.availability, old.resource_availability
+        if changes.touches("availability_exceptions"):
+            exceptions, resource_exceptions = self._load_exceptions(cursor)
+        else:
+            exceptions, resource_exceptions = old.exceptions, old.resource_exceptions
+        dependencies = self._load_dependencies(cursor) if changes.touches("task_dependencies") else old.dependencies
+        return Snapshot(
+            tasks, projects, availability, exceptions, version,
+            dependencies, resources, resource_availability, resource_exceptions,
+        )
+
+    def _patch_tasks(self, cursor, tasks: List[Task], ids) -> List[Task]:
+        """Remplace, retire ou insère (par id) les tâches modifiées, sans relire les autres"""
+        ids = list(ids)
+        fetched = {}
+        cursor.row_factory = task_row_factory
+        for start in range(0, len(ids), self.PATCH_CHUNK):
+            chunk = ids[start:start + self.PATCH_CHUNK]
+            cursor.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+            for task in cursor.fetchall():
+                fetched[task.id] = task
+        cursor.row_factory = None
+        changed = set(ids)
+        # Les Task ne sont jamais modifiées en place : les autres sont partagées avec l'ancien snapshot
+        patched = [fetched.pop(task.id, None) if task.id in changed else task for task in tasks]
+        patched = [task for task in patched if task is not None]
+        if fetched:
+            # Nouvelles tâches : fusionnées à leur place, la liste reste triée par id
+            patched = list(heapq.merge(patched, sorted(fetched.values(), key=_by_id), key=_by_id))
+        return patched
+
+    def _load_tasks(self, cursor) -> List[Task]:
+        cursor.row_factory = task_row_factory
+        cursor.execute(TASKS_QUERY)
+        tasks = cursor.fetchall()
+        cursor.row_factory = None
+        return tasks
+
+    def _load_projects(self, cursor) -> List[Project]:
+        cursor.row_factory = project_row_factory
+        cursor.execute('''
+            SELECT id, name, start_date, end_date, description
+            FROM projects
+            ORDER BY start_date ASC, id ASC
+        ''')
+        projects = cursor.fetchall()
+        cursor.row_factory = None
+        return projects
+
+    def _load_resources(self, cursor) -> List[Resource]:
+        cursor.row_factory = resource_row_factory
+        cursor.execute("SELECT id, name FROM resources ORDER BY name ASC")
+        resources = cursor.fetchall()
+        cursor.row_factory = None
+        return resources
+
+    def _load_availability(self, cursor) -> Tuple[List[Tuple], Dict[int, List[Tuple]]]:
+        cursor.execute('''
+            SELECT resource_id, day_of_week, start_hour, end_hour
+            FROM availability
+            ORDER BY day_of_week ASC, start_hour ASC
+        ''')
+        return self._by_resource(cursor.fetchall())
+
+    def _load_exceptions(self, cursor) -> Tuple[List[Tuple], Dict[int, List[Tuple]]]:
+        cursor.execute('''
+            SELECT resource_id, date, start_hour, end_hour
+            FROM availability_exceptions
+            ORDER BY date ASC, start_hour ASC
+        ''')
+        return self._by_resource(cursor.fetchall())
+
+    def _load_dependencies(self, cursor) -> List[Tuple]:
+        cursor.execute("SELECT task_id, depends_on FROM task_dependencies")
+        return cursor.fetchall()
+
+    @staticmethod
+    def _by_resource(rows) -> Tuple[List[Tuple], Dict[int, List[Tuple]]]:
+        """Sépare les lignes (resource_id, ...) : calendrier par défaut, puis {ressource: lignes}"""
+        default, by_resource = [], {}
+        for resource_id, *row in rows:
+            if resource_id is None:
+                default.append(tuple(row))
+            else:
+                by_resource.setdefault(resource_id, []).append(tuple(row))
+        return default, by_resource
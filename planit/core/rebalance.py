@@ -0,0 +1,200 @@
+"""
+Load-balancing local search over an existing schedule for PlanIt
+"""
+
+import math
+import random
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from planit.core.availability import FreeTimeCache
+from planit.core.intervals import to_slot
+from planit.core.models import Task
+
+
+def hour_mask(start: int, end: int) -> int:
+    """Bitmask des heures [start, end) (bit h = heure h)"""
+    return ((1 << (end - start)) - 1) << start
+
+
+class Rebalancer:
+    """
+    Recuit simulé qui déplace des tâches datées pour égaliser la charge par jour
+
+    Chaque jour est un masque de 24 bits (heures disponibles, heures occupées) :
+    vérifier qu'un créneau est libre et dans une seule fenêtre est une
+    opération sur des entiers. La somme des charges est constante, donc la
+    variance ne dépend que de la somme des carrés : déplacer w heures du jour
+    a au jour b la change de 2w(L[b] - L[a] + w), en O(1).
+
+    Seuls les jours disponibles (au moins une fenêtre) comptent dans la
+    variance ; les tâches récurrentes et les tâches hors horizon sont fixes.
+    Les dépendances bornent chaque tâche (heures absolues, voir to_slot) :
+    après la fin de ses prérequis, avant le début des tâches qui l'attendent.
+    Entre deux tâches déplaçables, la borne suit la position courante de
+    l'autre ; un déplacement qui la franchirait est refusé.
+    """
+
+    def __init__(self, dates: List[date], free_time: FreeTimeCache, seed: Optional[int] = None):
+        self.dates = dates
+        self.index = {day: i for i, day in enumerate(dates)}
+        self.day_slots = [to_slot(day, 0) for day in dates]
+        self.available = [self._available_mask(free_time, day) for day in dates]
+        self.balance_days = [i for i, mask in enumerate(self.available) if mask]
+        self.occupied = [0] * len(dates)
+        self.load = [0] * len(dates)
+        # Tâches déplaçables : [tâche, index du jour, heure de début]
+        self.movable: List[list] = []
+        # Par tâche déplaçable : bornes fixes (début au plus tôt, fin au plus tard)
+        # et tâches déplaçables qui la précèdent / la suivent
+        self.limits: List[Tuple[float, float]] = []
+        self.prerequisites: Dict[int, List[int]] = {}
+        self.dependents: Dict[int, List[int]] = {}
+        self._position: Dict[int, int] = {}
+        self.rng = random.Random(seed)
+        self.iterations = 0
+
+    @staticmethod
+    def _available_mask(free_time: FreeTimeCache, day: date) -> int:
+        mask = 0
+        for start, end in free_time.windows(day).intervals:
+            mask |= hour_mask(max(start, 0), min(end, 24))
+        return mask
+
+    def add_fixed(self, day: date, start: int, end: int):
+        """Créneau occupé qui ne bouge pas (récurrente, manuelle hors horizon...)"""
+        i = self.index.get(day)
+        if i is None or start is None or end is None or start >= end:
+            return
+        self.occupied[i] |= hour_mask(start, end)
+        self.load[i] += end - start
+
+    def add_movable(self, task: Task, day: date) -> bool:
+        """Tâche déplaçable ; False (et traitée comme fixe) si son jour n'est pas disponible"""
+        i = self.index.get(day)
+        if i is None or not self.available[i]:
+            self.add_fixed(day, task.start_hour, task.end_hour)
+            return False
+        self.occupied[i] |= hour_mask(task.start_hour, task.end_hour)
+        self.load[i] += task.end_hour - task.start_hour
+        self._position[task.id] = len(self.movable)
+        self.movable.append([task, i, task.start_hour])
+        self.limits.append((-math.inf, math.inf))
+        return True
+
+    def is_movable(self, task_id: int) -> bool:
+        return task_id in self._position
+
+    def limit(self, task_id: int, earliest: Optional[int] = None, latest: Optional[int] = None):
+        """Bornes fixes d'une tâche déplaçable, en heures absolues (prérequis et dépendants qui ne bougent pas)"""
+        k = self._position[task_id]
+        low, high = self.limits[k]
+        self.limits[k] = (low if earliest is None else max(low, earliest), high if latest is None else min(high, latest))
+
+    def add_dependency(self, task_id: int, prerequisite_id: int):
+        """task_id doit commencer après la fin de prerequisite_id (deux tâches déplaçables)"""
+        k, p = self._position[task_id], self._position[prerequisite_id]
+        self.prerequisites.setdefault(k, []).append(p)
+        self.dependents.setdefault(p, []).append(k)
+
+    def _bounds(self, k: int) -> Tuple[float, float]:
+        """Début au plus tôt et fin au plus tard de la tâche k, vu la position des autres"""
+        earliest, latest = self.limits[k]
+        for p in self.prerequisites.get(k, ()):
+            task, day, start = self.movable[p]
+            earliest = max(earliest, self.day_slots[day] + start + task.end_hour - task.start_hour)
+        for c in self.dependents.get(k, ()):
+            _task, day, start = self.movable[c]
+            latest = min(latest, self.day_slots[day] + start)
+        return earliest, latest
+
+    def variance(self) -> float:
+        """Variance de la charge (heures) sur les jours disponibles"""
+        loads = [self.load[i] for i in self.balance_days]
+        if not loads:
+            return 0.0
+        mean = sum(loads) / len(loads)
+        return sum((load - mean) ** 2 for load in loads) / len(loads)
+
+    def _free_starts(self, day: int, duration: int) -> List[int]:
+        """Heures de début possibles pour `duration` heures ce jour-là"""
+        free = self.available[day] & ~self.occupied[day]
+        return [hour for hour in range(25 - duration) if hour_mask(hour, hour + duration) & ~free == 0]
+
+    def run(self, seconds: float) -> List[Tuple[Task, date, int]]:
+        """
+        Recuit simulé limité en temps ; retourne les tâches dont la place
+        a changé : (tâche, nouvelle date, nouvelle heure de début)
+        """
+        if len(self.balance_days) < 2 or not self.movable:
+            return []
+
+        n = len(self.balance_days)
+        sum_squares = sum(self.load[i] ** 2 for i in self.balance_days)
+        best_squares = sum_squares
+        best = [(day, start) for _task, day, start in self.movable]
+
+        # Température : de l'ordre d'un déplacement moyen, refroidie jusqu'à ~0
+        mean_duration = sum(task.end_hour - task.start_hour for task, _, _ in self.movable) / len(self.movable)
+        initial_temperature = 2 * mean_duration ** 2
+        final_temperature = 0.01
+        temperature = initial_temperature
+
+        started = time.perf_counter()
+        while True:
+            self.iterations += 1
+            if self.iterations % 256 == 0:
+                elapsed = time.perf_counter() - started
+                if elapsed >= seconds:
+                    break
+                temperature = initial_temperature * (final_temperature / initial_temperature) ** (elapsed / seconds)
+
+            k = self.rng.randrange(len(self.movable))
+            entry = self.movable[k]
+            task, source, start = entry
+            target = self.balance_days[self.rng.randrange(n)]
+            if target == source:
+                continue
+            duration = task.end_hour - task.start_hour
+            starts = self._free_starts(target, duration)
+            if starts and (k in self.prerequisites or k in self.dependents or self.limits[k] != (-math.inf, math.inf)):
+                earliest, latest = self._bounds(k)
+                base = self.day_slots[target]
+                starts = [hour for hour in starts if earliest <= base + hour and base + hour + duration <= latest]
+            if not starts:
+                continue
+
+            delta = 2 * duration * (self.load[target] - self.load[source] + duration)
+            if delta > 0 and self.rng.random() >= math.exp(-delta / temperature):
+                continue
+
+            new_start = starts[self.rng.randrange(len(starts))]
+            self.occupied[source] &= ~hour_mask(start, start + duration)
+            self.occupied[target] |= hour_mask(new_start, new_start + duration)
+            self.load[source] -= duration
+            self.load[target] += duration
+            entry[1], entry[2] = target, new_start
+            sum_squares += delta
+
+            if sum_squares < best_squares:
+                best_squares = sum_squares
+                best = [(day, start) for _task, day, start in self.movable]
+
+        # Revient à la meilleure solution rencontrée
+        for entry, (day, start) in zip(self.movable, best):
+            task, current_day, current_start = entry
+            duration = task.end_hour - task.start_hour
+            self.occupied[current_day] &= ~hour_mask(current_start, current_start + duration)
+            self.load[current_day] -= duration
+            entry[1], entry[2] = day, start
+        for task, day, start in self.movable:
+            duration = task.end_hour - task.start_hour
+            self.occupied[day] |= hour_mask(start, start + duration)
+            self.load[day] += duration
+
+        moves = []
+        for task, day, start in self.movable:
+            if self.dates[day].strftime("%d/%m") != task.scheduled_date or start != task.start_hour:
+                moves.append((task, self.dates[day], start))
+        return moves
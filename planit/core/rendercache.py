@@ -0,0 +1,129 @@
+"""
+Persistent cache of rendered CLI views for PlanIt
+"""
+
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+from datetime import date
+from typing import Callable
+
+from rich.console import Console
+
+from planit.core.atomicfile import replace_file
+
+# Tables lues par les vues en cache : toute écriture incrémente le compteur
+WATCHED_TABLES = ("tasks", "projects", "availability", "availability_exceptions", "task_dependencies")
+
+# À incrémenter quand le rendu d'une vue change : les anciens fichiers sont ignorés
+RENDER_FORMAT = 1
+
+
+def counter_triggers(tables=WATCHED_TABLES) -> list:
+    triggers = []
+    for table in tables:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            triggers.append(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_change_counter_{event.lower()} AFTER {event} ON {table} BEGIN
+                UPDATE change_counter SET writes = writes + 1 WHERE id = 1;
+            END
+            ''')
+    return triggers
+
+
+# PRAGMA data_version ne vaut que pour une connexion (il repart de la même
+# valeur à chaque processus) : un compteur persistant, tenu par triggers
+# dans la transaction de l'écriture, sert de jeton de changement entre deux
+# invocations de la CLI.
+CHANGE_COUNTER_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS change_counter (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        writes INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    "INSERT OR IGNORE INTO change_counter (id, writes) VALUES (1, 0)",
+] + counter_triggers()
+
+
+def create_change_counter(cursor):
+    for statement in CHANGE_COUNTER_SCHEMA:
+        cursor.execute(statement)
+
+
+def change_count(conn) -> int:
+    """Nombre d'écritures commitées (ou en cours sur cette connexion) dans les tables suivies"""
+    return conn.execute("SELECT writes FROM change_counter WHERE id = 1").fetchone()[0]
+
+
+class RenderCache:
+    """
+    Sorties déjà rendues de `list`, `planning` et `timeline`, un fichier par vue
+
+    Clé : commande, semaine affichée et largeur du terminal (nom du fichier),
+    puis compteur d'écritures, date du jour et couleurs (première ligne du
+    fichier). Si rien n'a changé, la sortie est réécrite telle quelle, sans
+    charger le read model ni passer par le planificateur ou Rich.
+    Un fichier par vue et par largeur : le répertoire ne grossit pas.
+    """
+
+    def __init__(self, conn, lock, directory: str, console: Console):
+        self.conn = conn
+        self._lock = lock
+        self.directory = directory
+        self.console = console
+
+    def change_token(self) -> str:
+        """Jeton de la base et du contexte d'affichage ; change dès qu'une vue pourrait changer"""
+        with self._lock:
+            writes = change_count(self.conn)
+        return f"{RENDER_FORMAT}:{writes}:{date.today().isoformat()}:{self.console.color_system}"
+
+    def _path(self, command: str, offset: int) -> str:
+        return os.path.join(self.directory, f"{command}{offset:+d}-w{self.console.width}.txt")
+
+    def _load(self, path: str, token: str):
+        try:
+            with open(path, encoding="utf-8", newline="") as cached:
+                if cached.readline().rstrip("\n") != token:
+                    return None
+                return cached.read()
+        except OSError:
+            return None
+
+    def _store(self, path: str, token: str, output: str):
+        """Écriture atomique : un autre processus lit l'ancien fichier ou le nouveau, jamais un mélange"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as out:
+                out.write(f"{token}\n{output}")
+            replace_file(temporary, path)
+        except OSError:
+            # Cache en lecture seule ou disque plein : la vue reste affichée
+            pass
+
+    def show(self, command: str, offset: int, render: Callable[[], None]):
+        """
+        Affiche la vue depuis le cache, ou l'affiche avec render() et la met en cache
+        render() écrit sur la console Rich et/ou avec print() ; s'il lève
+        une exception, rien n'est mis en cache.
+        Pendant une transaction ouverte (batch, `run --atomic`), la vue
+        montre des écritures non commitées : ni lue ni mise en cache, car
+        après un ROLLBACK le même compteur désignerait un autre état.
+        """
+        if self.conn.in_transaction:
+            render()
+            return
+        token = self.change_token()
+        path = self._path(command, offset)
+        output = self._load(path, token)
+        if output is None:
+            buffer = io.StringIO()
+            with self.console.capture() as capture, redirect_stdout(buffer):
+                render()
+            output = capture.get() + buffer.getvalue()
+            self._store(path, token, output)
+        self.console.file.write(output)
+        self.console.file.flush()
@@ -0,0 +1,106 @@
+"""
+Team resources for PlanIt: per-person calendars and pooled placement
+"""
+
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple
+
+from planit.core.rendercache import counter_triggers
+
+# Un calendrier = une ressource (resources.id), NULL = le calendrier personnel
+# d'origine. Disponibilités, exceptions et tâches portent leur resource_id ;
+# supprimer une ressource supprime ses fenêtres et rend ses tâches au pot commun.
+RESOURCE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS resources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE COLLATE NOCASE
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_tasks_resource ON tasks(resource_id)",
+    "CREATE INDEX IF NOT EXISTS idx_availability_resource ON availability(resource_id, day_of_week)",
+    "CREATE INDEX IF NOT EXISTS idx_availability_exceptions_resource ON availability_exceptions(resource_id, date)",
+] + counter_triggers(("resources",))
+
+RESOURCE_COLUMNS = [
+    ("tasks", "resource_id INTEGER REFERENCES resources(id) ON DELETE SET NULL"),
+    ("tasks_archive", "resource_id INTEGER"),
+    ("availability", "resource_id INTEGER REFERENCES resources(id) ON DELETE CASCADE"),
+    ("availability_exceptions", "resource_id INTEGER REFERENCES resources(id) ON DELETE CASCADE"),
+]
+
+
+def create_resource_tables(cursor):
+    # La table d'abord : les colonnes y font référence
+    cursor.execute(RESOURCE_SCHEMA[0])
+    for table, column in RESOURCE_COLUMNS:
+        cursor.execute(f"PRAGMA table_info({table})")
+        if 'resource_id' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+    for statement in RESOURCE_SCHEMA[1:]:
+        cursor.execute(statement)
+
+
+# next_free(début au plus tôt, durée) -> heure absolue ou None
+NextFree = Callable[[int, int], Optional[int]]
+
+
+class ResourcePool:
+    """
+    Place une tâche sur la ressource qui a le créneau libre le plus tôt
+
+    Tas des calendriers par première heure libre (une borne inférieure du
+    créneau de n'importe quelle durée) : on ne consulte l'index d'intervalles
+    d'une ressource que tant que sa borne peut battre le meilleur créneau
+    trouvé. Sans prérequis (earliest = début de l'horizon), un pop et une
+    recherche suffisent en général : O(log R + log n) par tâche. Après une
+    prise, la borne de la ressource est recalculée au prochain passage en
+    tête du tas.
+    Avec un prérequis, earliest dépasse souvent la borne de toutes les
+    ressources : les bornes ne départagent plus rien et la recherche
+    devient un parcours linéaire, O(R log n) par tâche (comme interroger
+    chaque ressource). Les bornes restent calculées depuis `start`, car
+    earliest change d'une tâche à l'autre. Voir benchmarks/bench_resources.py.
+    À créneau égal, la première ressource de `calendars` l'emporte.
+    """
+
+    def __init__(self, calendars: Dict[int, NextFree], start: int):
+        self.calendars = calendars
+        self.start = start
+        self._heap: List[Tuple[int, int, int]] = []
+        self._stale = set()
+        for order, resource_id in enumerate(calendars):
+            first = calendars[resource_id](start, 1)
+            if first is not None:
+                self._heap.append((first, order, resource_id))
+        heapq.heapify(self._heap)
+
+    def next_free(self, earliest: int, duration: int) -> Optional[Tuple[int, int]]:
+        """(créneau, ressource) le plus tôt pour `duration` heures à partir de `earliest`"""
+        best: Optional[Tuple[int, int, int]] = None
+        visited = []
+        while self._heap:
+            first, order, resource_id = self._heap[0]
+            if best is not None:
+                # Plus aucune ressource ne peut faire mieux (ou aussi bien avec un rang inférieur)
+                if max(first, earliest) > best[0] or (first >= earliest and (first, order) > best[:2]):
+                    break
+            heapq.heappop(self._heap)
+            if resource_id in self._stale:
+                # Borne périmée par une prise : recalculée, puis remise à sa place
+                self._stale.discard(resource_id)
+                first = self.calendars[resource_id](self.start, 1)
+                if first is not None:
+                    heapq.heappush(self._heap, (first, order, resource_id))
+                continue
+            visited.append((first, order, resource_id))
+            slot = self.calendars[resource_id](max(first, earliest), duration)
+            if slot is not None and (best is None or (slot, order) < best[:2]):
+                best = (slot, order, resource_id)
+        for entry in visited:
+            heapq.heappush(self._heap, entry)
+        return (best[0], best[2]) if best is not None else None
+
+    def taken(self, resource_id: int):
+        """À appeler après avoir occupé un créneau de la ressource"""
+        self._stale.add(resource_id)
@@ -0,0 +1,180 @@
+"""
+Full-text search over tasks and projects for PlanIt
+"""
+
+import re
+from typing import List, NamedTuple, Optional
+
+# Index FTS5 à contenu externe : le texte reste dans tasks/projects,
+# les triggers tiennent l'index à jour à chaque écriture.
+# remove_diacritics : "reunion" trouve "Réunion".
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+SEARCH_SCHEMA = [
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, content='tasks', content_rowid='id', tokenize='{FTS_TOKENIZER}'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts (rowid, title) VALUES (new.id, new.title);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO tasks_fts (rowid, title) VALUES (new.id, new.title);
+    END
+    ''',
+    # Tâches archivées : toujours trouvables (lignes insérées/supprimées, jamais modifiées)
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_archive_fts USING fts5(
+        title, content='tasks_archive', content_rowid='id', tokenize='{FTS_TOKENIZER}'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_fts_insert AFTER INSERT ON tasks_archive BEGIN
+        INSERT INTO tasks_archive_fts (rowid, title) VALUES (new.id, new.title);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_fts_delete AFTER DELETE ON tasks_archive BEGIN
+        INSERT INTO tasks_archive_fts (tasks_archive_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    END
+    ''',
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+        name, description, content='projects', content_rowid='id', tokenize='{FTS_TOKENIZER}'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects BEGIN
+        INSERT INTO projects_fts (projects_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF name, description ON projects BEGIN
+        INSERT INTO projects_fts (projects_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO projects_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    ''',
+]
+
+
+# Nombre maximum de correspondances classées par requête : au-delà, seules
+# les plus récentes (rowid décroissant, parcours direct de l'index) sont
+# classées, ce qui garde un coût borné pour les mots très fréquents
+RANK_CANDIDATES = 500
+
+
+class SearchResult(NamedTuple):
+    kind: str          # "task", "archive" ou "project"
+    id: int
+    title: str
+    detail: str        # statut de la tâche, dates du projet
+    rank: float        # score bm25 (plus petit = plus pertinent)
+
+
+def create_search_index(cursor):
+    """Crée les index FTS5 et leurs triggers, et indexe les lignes déjà présentes"""
+    indexes = ('tasks_fts', 'tasks_archive_fts', 'projects_fts')
+    cursor.execute(f"SELECT name FROM sqlite_master WHERE name IN {indexes}")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    for statement in SEARCH_SCHEMA:
+        cursor.execute(statement)
+
+    # Base créée avant la recherche : construit l'index une seule fois
+    for index in indexes:
+        if index not in existing:
+            cursor.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Convertit la saisie utilisateur en requête FTS5
+    Chaque mot devient un préfixe entre guillemets ("rap" trouve "rapport"),
+    ce qui neutralise la syntaxe FTS (AND, NEAR, *, guillemets...)
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+# Tâches actives : les RANK_CANDIDATES plus récentes qui correspondent, puis les `limit` meilleures
+TASK_SEARCH = '''
+    SELECT t.id, t.title, t.completed, t.scheduled_time, t.recurring, f.rank
+    FROM (
+        SELECT rowid, rank FROM (
+            SELECT rowid, rank FROM tasks_fts WHERE tasks_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+        ) ORDER BY rank LIMIT ?
+    ) AS f
+    JOIN tasks AS t ON t.id = f.rowid
+'''
+
+
+def search(conn, text: str, limit: int = 20) -> List[SearchResult]:
+    """
+    Tâches et projets correspondant à la recherche, les plus pertinents d'abord
+
+    Chaque index classe au plus RANK_CANDIDATES correspondances (les plus
+    récentes) et renvoie ses `limit` meilleures, puis les listes sont
+    fusionnées par score. Le titre d'un projet pèse plus que sa description.
+    """
+    query = fts_query(text)
+    if query is None:
+        return []
+
+    results = []
+    rows = conn.execute(TASK_SEARCH, (query, RANK_CANDIDATES, limit)).fetchall()
+    for task_id, title, completed, scheduled_time, recurring, rank in rows:
+        if completed:
+            detail = "Done"
+        elif recurring:
+            detail = "Recurring"
+        else:
+            detail = scheduled_time or "Not scheduled"
+        results.append(SearchResult("task", task_id, title, detail, rank))
+
+    rows = conn.execute('''
+        SELECT t.id, t.title, t.completed_at, f.rank
+        FROM (
+            SELECT rowid, rank FROM (
+                SELECT rowid, rank FROM tasks_archive_fts WHERE tasks_archive_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+            ) ORDER BY rank LIMIT ?
+        ) AS f
+        JOIN tasks_archive AS t ON t.id = f.rowid
+    ''', (query, RANK_CANDIDATES, limit)).fetchall()
+    for task_id, title, completed_at, rank in rows:
+        detail = f"Done {completed_at[:10]}" if completed_at else "Done"
+        results.append(SearchResult("archive", task_id, title, detail, rank))
+
+    rows = conn.execute('''
+        SELECT p.id, p.name, p.start_date, p.end_date, f.rank
+        FROM (
+            SELECT rowid, rank FROM (
+                SELECT rowid, bm25(projects_fts, 2.0, 1.0) AS rank
+                FROM projects_fts WHERE projects_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+            ) ORDER BY rank LIMIT ?
+        ) AS f
+        JOIN projects AS p ON p.id = f.rowid
+    ''', (query, RANK_CANDIDATES, limit)).fetchall()
+    for project_id, name, start_date, end_date, rank in rows:
+        results.append(SearchResult("project", project_id, name, f"{start_date} → {end_date}", rank))
+
+    results.sort(key=lambda result: result.rank)
+    return results[:limit]
@@ -0,0 +1,149 @@
+"""
+Optional NumPy backend for PlanIt: occupancy as a (day, hour) array
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # Dépendance optionnelle : pip install "planit-taskmanager[numpy]"
+    np = None
+
+from planit.core.availability import FreeTimeCache
+from planit.core.models import Task
+
+HAS_NUMPY = np is not None
+BACKENDS = ("python", "numpy")
+
+FREE = -1
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError('the numpy backend needs NumPy (pip install "planit-taskmanager[numpy]")')
+
+
+def _expand(starts, lengths):
+    """Index de toutes les heures des intervalles [start, start + length), sans boucle Python"""
+    total = int(lengths.sum())
+    # Position dans l'intervalle = rang global - rang du premier élément de l'intervalle
+    first = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + (np.arange(total) - first)
+
+
+class SlotArray:
+    """
+    Occupation de `weeks` semaines à partir d'un lundi : owner[jour, heure]
+    est le rang (dans `tasks`) de la tâche affichée dans la case, FREE sinon
+
+    Même règle que le rendu Python (PlanningEngine.build_week_schedule) :
+    tâches non terminées et placées ; si deux tâches se chevauchent, la
+    dernière dans `tasks` gagne la case. Les récurrences hebdomadaires sont
+    appliquées par broadcasting des masques de jours sur tout l'horizon.
+    """
+
+    def __init__(self, tasks: Sequence[Task], first_monday: date, weeks: int):
+        require_numpy()
+        self.tasks = tasks
+        self.first_monday = first_monday
+        self.weeks = weeks
+        days = 7 * weeks
+
+        ranks = np.array([rank for rank, task in enumerate(tasks) if not task.completed and task.is_placed], dtype=np.int64)
+        placed = [tasks[rank] for rank in ranks]
+        starts = np.array([task.start_hour for task in placed], dtype=np.int64)
+        ends = np.array([task.end_hour for task in placed], dtype=np.int64)
+        masks = np.array([task.weekday_mask for task in placed], dtype=np.int64)
+        dated = np.array([task.scheduled_date is not None for task in placed], dtype=bool)
+
+        # Hebdomadaires : (tâche, jour de l'horizon) pour chaque bit du masque, répété chaque semaine
+        weekday_bits = (masks[~dated, None] >> np.arange(7)) & 1
+        weekly_rows, weekly_days = np.nonzero(np.tile(weekday_bits, weeks).astype(bool))
+        weekly_rows = np.flatnonzero(~dated)[weekly_rows]
+
+        # Datées 'dd/mm' : une recherche par tâche, puis même contrôle du jour de semaine
+        positions: Dict[str, List[int]] = {}
+        for i in range(days):
+            positions.setdefault((first_monday + timedelta(days=i)).strftime("%d/%m"), []).append(i)
+        pairs = [
+            (row, day)
+            for row in np.flatnonzero(dated)
+            for day in positions.get(placed[row].scheduled_date, ())
+        ]
+        dated_rows = np.array([row for row, _ in pairs], dtype=np.int64)
+        dated_days = np.array([day for _, day in pairs], dtype=np.int64)
+        keep = (masks[dated_rows] >> (dated_days % 7)) & 1 == 1
+
+        rows = np.concatenate([weekly_rows, dated_rows[keep]])
+        occurrence_days = np.concatenate([weekly_days, dated_days[keep]])
+        lengths = np.clip(ends[rows] - starts[rows], 0, None)
+        # Heures absolues dans l'horizon ; une fin après minuit déborde sur le lendemain, comme l'index Python
+        cells = _expand(occurrence_days * 24 + starts[rows], lengths)
+        owners = np.repeat(ranks[rows], lengths)
+        inside = (cells >= 0) & (cells < days * 24)
+
+        owner = np.full(days * 24, FREE, dtype=np.int64)
+        np.maximum.at(owner, cells[inside], owners[inside])
+        self.owner = owner.reshape(days, 24)
+
+    def week_cells(self, week: int = 0) -> Dict[Tuple[int, int], str]:
+        """{(jour, heure): titre} d'une semaine de l'horizon, comme WeekGrid.cells"""
+        block = self.owner[week * 7:(week + 1) * 7]
+        days, hours = np.nonzero(block != FREE)
+        return {
+            (int(day), int(hour)): self.tasks[rank].title
+            for day, hour, rank in zip(days, hours, block[days, hours])
+        }
+
+    def hours_per_task(self):
+        """Heures affichées par tâche (rang dans `tasks`), en un seul bincount"""
+        taken = self.owner[self.owner != FREE]
+        return np.bincount(taken, minlength=len(self.tasks))
+
+    def booked_hours(self, from_day: int = 0) -> int:
+        """Heures occupées à partir du jour `from_day` de l'horizon"""
+        return int(np.count_nonzero(self.owner[from_day:] != FREE))
+
+    def free_runs(self, free_time: FreeTimeCache, from_day: int = 0) -> "FreeRuns":
+        """Plages libres (disponibles et non occupées) de chaque jour, à partir de `from_day`"""
+        days = self.owner.shape[0]
+        available = np.zeros((days, 25), dtype=np.int8)
+        for i in range(from_day, days):
+            for start, end in free_time.windows(self.first_monday + timedelta(days=i)).intervals:
+                available[i, max(start, 0):min(end, 24)] = 1
+        # Colonne 24 toujours à 0 : une plage ne traverse jamais minuit (une fenêtre = un jour)
+        available[:, :24] &= self.owner == FREE
+        edges = np.diff(available.ravel(), prepend=0)
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        # Coordonnées (jour, 25 colonnes) -> heures absolues
+        base = self.first_monday.toordinal() * 24
+        to_absolute = lambda positions: base + positions // 25 * 24 + positions % 25
+        return FreeRuns(to_absolute(run_starts), to_absolute(run_ends))
+
+
+class FreeRuns:
+    """
+    Plages libres triées [début, fin) en heures absolues (voir intervals.to_slot)
+    next_free et take remplacent IntervalIndex.next_free / add pour le planificateur.
+    """
+
+    def __init__(self, starts, ends):
+        self.starts = starts
+        self.ends = ends
+
+    def next_free(self, earliest: int, duration: int) -> Optional[int]:
+        """Premier début possible pour `duration` heures à partir de `earliest`"""
+        candidates = np.maximum(self.starts, earliest)
+        fits = np.flatnonzero(self.ends - candidates >= duration)
+        return int(candidates[fits[0]]) if len(fits) else None
+
+    def take(self, start: int, end: int):
+        """Retire [start, end) de la plage qui le contient (coupée en deux au plus)"""
+        i = int(np.searchsorted(self.starts, start, side="right")) - 1
+        run_start, run_end = int(self.starts[i]), int(self.ends[i])
+        pieces = [(a, b) for a, b in ((run_start, start), (end, run_end)) if a < b]
+        self.starts = np.concatenate([self.starts[:i], [a for a, _ in pieces], self.starts[i + 1:]]).astype(np.int64)
+        self.ends = np.concatenate([self.ends[:i], [b for _, b in pieces], self.ends[i + 1:]]).astype(np.int64)
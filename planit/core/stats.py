@@ -0,0 +1,252 @@
+"""
+Workload statistics for PlanIt, backed by trigger-maintained summary tables
+"""
+
+from datetime import date
+from typing import Dict, List, NamedTuple
+
+from planit.core.models import DAY_NAMES, DAYS_SHORT
+
+
+def _day_key(time_expr: str) -> str:
+    """
+    Expression SQL : date 'dd/mm' d'un scheduled_time daté ('Monday 19/10 9h-12h'),
+    NULL pour un créneau hebdomadaire ('Monday 9h-11h') ou absent
+    """
+    rest = f"substr({time_expr}, instr({time_expr}, ' ') + 1)"
+    token = f"substr({rest}, 1, instr({rest}, ' ') - 1)"
+    return f"(CASE WHEN instr({token}, '/') > 0 THEN {token} END)"
+
+
+def _is_done(row: str) -> str:
+    return f"(COALESCE({row}.completed, 0) != 0)"
+
+
+# Règle commune aux deux tables de charge : `hours` = heures réservées par
+# des tâches non terminées (ce que le planificateur considère occupé). Les
+# heures terminées d'une date sont comptées à part, dans daily_load.done_hours.
+
+def _on_weekday(row: str) -> str:
+    """
+    Condition SQL : la tâche (non terminée) revient chaque semaine le jour
+    weekday_load.day_of_week, en récurrente ou en créneau hebdomadaire non daté
+    """
+    recurring_on_day = (
+        f"({row}.recurring_days = 'daily' OR "
+        f"instr(',' || replace({row}.recurring_days, ' ', '') || ',', ',' || weekday_load.day_short || ',') > 0)"
+    )
+    weekly_slot_on_day = (
+        f"({row}.scheduled_time LIKE weekday_load.day_name || ' %' AND {_day_key(f'{row}.scheduled_time')} IS NULL)"
+    )
+    return (
+        f"(NOT {_is_done(row)} AND CASE WHEN {row}.recurring "
+        f"THEN {recurring_on_day} ELSE {weekly_slot_on_day} END)"
+    )
+
+
+def _apply(row: str, sign: str) -> List[str]:
+    """Requêtes qui ajoutent (sign '+') ou retirent (sign '-') une ligne des résumés"""
+    done = _is_done(row)
+    return [
+        f'''
+        UPDATE task_summary SET
+            task_count = task_count {sign} 1,
+            done_count = done_count {sign} {done},
+            total_hours = total_hours {sign} {row}.duration,
+            done_hours = done_hours {sign} {done} * {row}.duration,
+            backlog_count = backlog_count {sign} (NOT {row}.recurring AND NOT {done} AND {row}.scheduled_time IS NULL),
+            backlog_hours = backlog_hours {sign} (NOT {row}.recurring AND NOT {done} AND {row}.scheduled_time IS NULL) * {row}.duration
+        WHERE id = 1;
+        ''',
+        f'''
+        INSERT INTO daily_load (day_key, hours, done_hours)
+        SELECT {_day_key(f'{row}.scheduled_time')}, {sign}(NOT {done}) * {row}.duration, {sign}{done} * {row}.duration
+        WHERE NOT {row}.recurring AND {_day_key(f'{row}.scheduled_time')} IS NOT NULL
+        ON CONFLICT (day_key) DO UPDATE SET
+            hours = hours + excluded.hours,
+            done_hours = done_hours + excluded.done_hours;
+        ''',
+        f'''
+        UPDATE weekday_load SET hours = hours {sign} {row}.duration
+        WHERE {_on_weekday(row)};
+        ''',
+    ]
+
+
+STATS_TABLES = [
+    # Compteurs globaux (une seule ligne)
+    '''
+    CREATE TABLE IF NOT EXISTS task_summary (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        task_count INTEGER NOT NULL DEFAULT 0,
+        done_count INTEGER NOT NULL DEFAULT 0,
+        total_hours INTEGER NOT NULL DEFAULT 0,
+        done_hours INTEGER NOT NULL DEFAULT 0,
+        backlog_count INTEGER NOT NULL DEFAULT 0,
+        backlog_hours INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    # Heures des tâches datées, par date 'dd/mm' (même clé que le planning) :
+    # à faire (hours) et terminées (done_hours)
+    '''
+    CREATE TABLE IF NOT EXISTS daily_load (
+        day_key TEXT PRIMARY KEY,
+        hours INTEGER NOT NULL DEFAULT 0,
+        done_hours INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    # Heures à faire qui reviennent chaque semaine (récurrentes, créneaux non datés)
+    '''
+    CREATE TABLE IF NOT EXISTS weekday_load (
+        day_of_week INTEGER PRIMARY KEY,
+        day_short TEXT NOT NULL,
+        day_name TEXT NOT NULL,
+        hours INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+]
+
+STATS_TRIGGER_NAMES = ("tasks_stats_insert", "tasks_stats_delete", "tasks_stats_update")
+
+STATS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS tasks_stats_insert AFTER INSERT ON tasks BEGIN"
+    + "".join(_apply("new", "+")) + "END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_stats_delete AFTER DELETE ON tasks BEGIN"
+    + "".join(_apply("old", "-")) + "END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_stats_update AFTER UPDATE ON tasks BEGIN"
+    + "".join(_apply("old", "-") + _apply("new", "+")) + "END",
+]
+
+
+class TaskSummary(NamedTuple):
+    task_count: int
+    done_count: int
+    total_hours: int
+    done_hours: int
+    backlog_count: int
+    backlog_hours: int
+
+    @property
+    def completion_rate(self) -> float:
+        """Part des tâches terminées, entre 0 et 1"""
+        return self.done_count / self.task_count if self.task_count else 0.0
+
+
+class ProjectProgress(NamedTuple):
+    task_count: int
+    done_count: int
+    planned_hours: int
+    done_hours: int
+
+    @property
+    def completion_rate(self) -> float:
+        """Part des heures terminées, entre 0 et 1"""
+        return self.done_hours / self.planned_hours if self.planned_hours else 0.0
+
+    @property
+    def label(self) -> str:
+        """'4/10h 40%', '-' pour un projet sans tâche"""
+        if not self.task_count:
+            return "-"
+        return f"{self.done_hours}/{self.planned_hours}h {self.completion_rate:.0%}"
+
+
+NO_PROGRESS = ProjectProgress(0, 0, 0, 0)
+
+
+def create_stats_tables(cursor):
+    """Crée les tables de résumé et leurs triggers, et les remplit depuis tasks"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE name = 'task_summary'")
+    exists = cursor.fetchone() is not None
+
+    for statement in STATS_TABLES + STATS_TRIGGERS:
+        cursor.execute(statement)
+
+    if not exists:
+        rebuild_stats(cursor)
+
+
+def recreate_stats_triggers(cursor):
+    """Remplace les triggers de résumé par leur version actuelle et recalcule les tables"""
+    for name in STATS_TRIGGER_NAMES:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for statement in STATS_TRIGGERS:
+        cursor.execute(statement)
+    rebuild_stats(cursor)
+
+
+def rebuild_stats(cursor):
+    """Recalcule les résumés à partir de tasks (création, ou après une réparation)"""
+    done = _is_done("tasks")
+    backlog = f"(NOT tasks.recurring AND NOT {done} AND tasks.scheduled_time IS NULL)"
+    cursor.execute("DELETE FROM task_summary")
+    cursor.execute(f'''
+        INSERT INTO task_summary
+        SELECT 1, COUNT(*), COALESCE(SUM({done}), 0),
+               COALESCE(SUM(duration), 0), COALESCE(SUM({done} * duration), 0),
+               COALESCE(SUM({backlog}), 0), COALESCE(SUM({backlog} * duration), 0)
+        FROM tasks
+    ''')
+
+    cursor.execute("DELETE FROM daily_load")
+    cursor.execute(f'''
+        INSERT INTO daily_load (day_key, hours, done_hours)
+        SELECT day_key, SUM((NOT done) * duration), SUM(done * duration)
+        FROM (
+            SELECT {_day_key('scheduled_time')} AS day_key, duration, {done} AS done
+            FROM tasks WHERE NOT recurring
+        )
+        WHERE day_key IS NOT NULL
+        GROUP BY day_key
+    ''')
+
+    cursor.execute("DELETE FROM weekday_load")
+    cursor.executemany(
+        "INSERT INTO weekday_load (day_of_week, day_short, day_name) VALUES (?, ?, ?)",
+        [(day, DAYS_SHORT[day], DAY_NAMES[day]) for day in range(7)],
+    )
+    cursor.execute(f'''
+        UPDATE weekday_load SET hours = (
+            SELECT COALESCE(SUM(tasks.duration), 0) FROM tasks WHERE {_on_weekday("tasks")}
+        )
+    ''')
+
+
+def task_summary(conn) -> TaskSummary:
+    """Compteurs globaux, lus en une ligne"""
+    row = conn.execute('''
+        SELECT task_count, done_count, total_hours, done_hours, backlog_count, backlog_hours
+        FROM task_summary WHERE id = 1
+    ''').fetchone()
+    return TaskSummary(*row) if row else TaskSummary(0, 0, 0, 0, 0, 0)
+
+
+def project_progress(conn) -> Dict[int, ProjectProgress]:
+    """
+    Heures prévues et terminées par projet, tâches archivées comprises
+    Une seule requête groupée, servie par les index sur project_id.
+    """
+    rows = conn.execute(f'''
+        SELECT project_id, SUM(task_count), SUM(done_count), SUM(planned_hours), SUM(done_hours)
+        FROM (
+            SELECT project_id, COUNT(*) AS task_count, SUM({_is_done("tasks")}) AS done_count,
+                   SUM(duration) AS planned_hours, SUM({_is_done("tasks")} * duration) AS done_hours
+            FROM tasks WHERE project_id IS NOT NULL GROUP BY project_id
+            UNION ALL
+            SELECT project_id, COUNT(*), COUNT(*), SUM(duration), SUM(duration)
+            FROM tasks_archive WHERE project_id IS NOT NULL GROUP BY project_id
+        )
+        GROUP BY project_id
+    ''').fetchall()
+    return {row[0]: ProjectProgress(*row[1:]) for row in rows}
+
+
+def booked_hours(conn, dates: List[date]) -> Dict[date, int]:
+    """Heures réservées par date (tâches non terminées) : tâches datées + heures hebdomadaires du jour"""
+    weekly = dict(conn.execute("SELECT day_of_week, hours FROM weekday_load").fetchall())
+    keys = {day.strftime("%d/%m"): day for day in dates}
+    placeholders = ",".join("?" * len(keys))
+    dated = dict(conn.execute(
+        f"SELECT day_key, hours FROM daily_load WHERE day_key IN ({placeholders})", list(keys)
+    ).fetchall()) if keys else {}
+    return {day: weekly.get(day.weekday(), 0) + dated.get(key, 0) for key, day in keys.items()}
@@ -0,0 +1,118 @@
+"""
+Sliding-window cache of week grids for PlanIt
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Optional
+
+from planit.core.models import WeekGrid
+
+
+class WeekCache:
+    """
+    Cache LRU borné de WeekGrid, indexé par clé (calendrier, offset de semaine)
+
+    Les grilles sont calculées à partir d'un snapshot immuable du read model,
+    ce qui permet de les précalculer dans un thread sans toucher à SQLite.
+    La clé contient tout ce dont dépend la grille : un calcul lancé pour un
+    calendrier ne peut pas être servi pour un autre. Un nouveau snapshot (la
+    base a changé) ou clear() vide le cache ; le numéro de génération écarte
+    les calculs lancés avant. Le thread de préchargement n'est créé qu'au
+    premier prefetch() : une commande qui n'en lance pas n'a aucun thread.
+    """
+
+    def __init__(self, build: Callable[[Hashable, object], WeekGrid], max_size: int = 8):
+        self._build = build
+        self.max_size = max_size
+        self._grids: "OrderedDict[Hashable, WeekGrid]" = OrderedDict()
+        self._pending: Dict[Hashable, Future] = {}
+        self._snapshot = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._closed = False
+
+    def _sync_snapshot(self, snapshot):
+        """Vide le cache si le snapshot a changé (à appeler sous verrou)"""
+        if snapshot is not self._snapshot:
+            self._snapshot = snapshot
+            self._reset()
+
+    def _reset(self):
+        """Oublie grilles et calculs en cours (à appeler sous verrou)"""
+        self._generation += 1
+        self._grids.clear()
+        self._pending.clear()
+
+    def _store(self, generation: int, key: Hashable, grid: WeekGrid):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._grids[key] = grid
+            self._grids.move_to_end(key)
+            while len(self._grids) > self.max_size:
+                self._grids.popitem(last=False)
+            self._pending.pop(key, None)
+
+    def _compute(self, generation: int, snapshot, key: Hashable) -> WeekGrid:
+        grid = self._build(key, snapshot)
+        self._store(generation, key, grid)
+        return grid
+
+    def get(self, snapshot, key: Hashable) -> WeekGrid:
+        """Grille de la semaine : depuis le cache, le calcul en cours, ou calculée ici"""
+        with self._lock:
+            self._sync_snapshot(snapshot)
+            grid = self._grids.get(key)
+            if grid is not None:
+                self._grids.move_to_end(key)
+                return grid
+            pending = self._pending.get(key)
+            generation = self._generation
+
+        if pending is not None:
+            try:
+                return pending.result()
+            except CancelledError:
+                # Préchargement annulé par shutdown() : calculé ici
+                pass
+        return self._compute(generation, snapshot, key)
+
+    def prefetch(self, snapshot, keys):
+        """Lance en arrière-plan le calcul des semaines absentes du cache"""
+        with self._lock:
+            if self._closed:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planit-prefetch")
+            self._sync_snapshot(snapshot)
+            for key in keys:
+                if key in self._grids or key in self._pending:
+                    continue
+                self._pending[key] = self._executor.submit(self._compute, self._generation, snapshot, key)
+
+    def clear(self):
+        """Vide le cache (les grilles dépendent d'un réglage qui vient de changer)"""
+        with self._lock:
+            # Un calcul en cours dans le thread ne sera pas stocké (génération différente)
+            self._reset()
+
+    def peek(self, key: Hashable) -> Optional[WeekGrid]:
+        """Grille en cache sans calcul ni mise à jour LRU"""
+        with self._lock:
+            return self._grids.get(key)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._grids)
+
+    def shutdown(self):
+        """Arrête le thread de préchargement ; les calculs en attente sont annulés"""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
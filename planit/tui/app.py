@@ -2,18 +2,19 @@
 Main Textual TUI application for PlanIt
 """
 
-import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical
-from textual.widgets import Button, Footer, Header, Static, DataTable
+from textual.widgets import Button, Footer, Header, Input, Static, DataTable
 from textual.binding import Binding
 
 from planit.tui.styles import TUI_CSS
 from planit.tui.modals import AddTaskModal, DeleteTaskModal, AddProjectModal, MarkDoneModal
+from planit.tui.widgets import WeekGridView
 from planit.core.database import TaskManager
-from planit.core.planner import PlanningEngine
+from planit.core.planner import ANY_RESOURCE, PlanningEngine
+from planit.core.stats import NO_PROGRESS
 
 
 class PlanItTUI(App):
@@ -21,15 +22,24 @@ class PlanItTUI(App):
     
     CSS = TUI_CSS
     
+    # Vérification des écritures faites par d'autres sessions (secondes)
+    POLL_INTERVAL = 1.0
+    
+    # Colonnes de la liste des tâches : (clé, titre, largeur)
+    TASK_COLUMNS = (("id", "ID", 5), ("title", "Title", 20), ("duration", "Duration", 10), ("done", "Done", 8), ("recurring", "Recurring", 12))
+    
     BINDINGS = [
         Binding("a", "add_task", "Add Task"),
         Binding("l", "list_tasks", "List Tasks"),
         Binding("s", "schedule", "Schedule"),
         Binding("p", "planning", "Planning"),
         Binding("t", "timeline", "Timeline"),
+        Binding("i", "stats", "Stats"),
         Binding("j", "add_project", "Add Project"),
         Binding("n", "next_week", "Next Week"),
         Binding("b", "prev_week", "Prev Week"),
+        Binding("r", "next_resource", "Resource"),
+        Binding("slash", "search", "Search"),
         Binding("escape", "go_back", "Back"),
         Binding("q", "quit", "Quit"),
     ]
@@ -37,7 +47,48 @@ class PlanItTUI(App):
     def __init__(self):
         super().__init__()
         self.task_manager = TaskManager()
-        self.planner = PlanningEngine(self.task_manager)
+        self.planner = PlanningEngine(self.task_manager, prefetch=True)
+        # Vue affichée : "list", "search", "planning", "timeline", "stats" ou None
+        self.view = None
+        self.search_query = ""
+        self._data_version = None
+        self._change_seq = 0
+    
+    def on_mount(self) -> None:
+        """Start watching the database for writes from other sessions"""
+        self._data_version = self.task_manager.read_model.data_version()
+        self._change_seq = self.task_manager.last_change()
+        self.set_interval(self.POLL_INTERVAL, self.poll_changes)
+    
+    def on_unmount(self) -> None:
+        """Stop the week prefetch thread so quitting never waits for it"""
+        self.planner.close()
+    
+    def poll_changes(self) -> None:
+        """Refresh the displayed view when another session wrote to the database"""
+        # Une pragma, aucune table lue : quasi gratuit tant que rien ne change.
+        # Nos propres écritures ne changent pas data_version (même connexion).
+        version = self.task_manager.read_model.data_version()
+        if version == self._data_version:
+            return
+        self._data_version = version
+        changes = self.task_manager.changes_since(self._change_seq, self.task_manager.read_model.PATCH_LIMIT)
+        self._change_seq = changes.seq
+        self.refresh_view(changes)
+    
+    def refresh_view(self, changes) -> None:
+        """Redraw only the displayed view, and only if the changed tables feed it"""
+        if self.view == "list" and changes.touches("tasks"):
+            self.refresh_task_rows(changes)
+        elif self.view == "search" and changes.touches("tasks", "projects"):
+            self.show_search_results(self.search_query)
+        elif self.view == "planning" and changes.touches("tasks", "resources"):
+            # La grille ne repeint que les cellules modifiées
+            self.refresh_planning()
+        elif self.view == "timeline" and changes.touches("projects", "tasks"):
+            self.action_timeline()
+        elif self.view == "stats" and changes.touches("tasks", "availability", "availability_exceptions"):
+            self.action_stats()
     
     def compose(self) -> ComposeResult:
         """Create child widgets for the app."""
@@ -53,16 +104,21 @@ class PlanItTUI(App):
                 yield Button("📅 Planning", id="planning", variant="default")
                 yield Button("⏭️ Next Week", id="next_week", variant="default")
                 yield Button("⏮️ Prev Week", id="prev_week", variant="default")
+                yield Button("👥 Resource", id="next_resource", variant="default")
                 yield Button("📊 Add Project", id="add_project", variant="primary")
                 yield Button("📈 Timeline", id="timeline", variant="default")
+                yield Button("📉 Stats", id="stats", variant="default")
                 yield Button("🗑️ Delete Task", id="delete_task", variant="error")
                 yield Button("✅ Mark Done", id="mark_done", variant="warning")
                 yield Button("🔄 Reset", id="reset", variant="default")
             
             # Contenu principal
             with Vertical(classes="main-content"):
+                yield Input(placeholder="🔍 Search tasks and projects ( / )", id="search_box")
                 yield Static("Welcome to PlanIt! Use the sidebar buttons or keyboard shortcuts.", id="content")
                 yield DataTable(id="task_table", classes="task-table")
+                yield Static("", id="grid_summary")
+                yield WeekGridView(id="week_grid", classes="week-grid")
         
         yield Footer()
     
@@ -82,10 +138,14 @@ class PlanItTUI(App):
             self.action_next_week()
         elif button_id == "prev_week":
             self.action_prev_week()
+        elif button_id == "next_resource":
+            self.action_next_resource()
         elif button_id == "add_project":
             self.action_add_project()
         elif button_id == "timeline":
             self.action_timeline()
+        elif button_id == "stats":
+            self.action_stats()
         elif button_id == "delete_task":
             self.action_delete_task()
         elif button_id == "mark_done":
@@ -102,47 +162,131 @@ class PlanItTUI(App):
         table = self.query_one("#task_table", DataTable)
         table.clear(columns=True)
         
-        # Setup columns
-        table.add_column("ID", width=5)
-        table.add_column("Title", width=20)
-        table.add_column("Duration", width=10)
-        table.add_column("Done", width=8)
-        table.add_column("Recurring", width=12)
+        self.show_week_grid(False)
+        self.view = "list"
         
-        # Get tasks from database
-        conn = sqlite3.connect(self.task_manager.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, title, duration, completed, recurring, recurring_hours
-            FROM tasks
-            ORDER BY recurring DESC, id ASC
-        ''')
-        tasks = cursor.fetchall()
-        conn.close()
+        # Setup columns (keys used by refresh_task_rows)
+        for key, label, width in self.TASK_COLUMNS:
+            table.add_column(label, width=width, key=key)
         
-        # Add rows
+        # Get tasks from the in-memory read model
+        tasks = sorted(self.task_manager.get_tasks(), key=lambda task: (not task.recurring, task.id))
+        
+        # Add rows, keyed by task ID
         for task in tasks:
-            status = "✅" if task[3] else "⭕"
-            recurring = "🔄" if task[4] else "➖"
-            table.add_row(
-                str(task[0]),
-                task[1][:18],
-                f"{task[2]}h",
-                status,
-                recurring
-            )
+            table.add_row(*self.task_cells(task), key=str(task.id))
         
         self.update_content("📝 Task list refreshed!")
     
+    def task_cells(self, task) -> tuple:
+        """Cells of one task row, in TASK_COLUMNS order"""
+        status = "✅" if task.completed else "⭕"
+        recurring = "🔄" if task.recurring else "➖"
+        return str(task.id), task.title[:18], f"{task.duration}h", status, recurring
+    
+    def refresh_task_rows(self, changes) -> None:
+        """Update, add or remove only the rows of the tasks listed in the change log"""
+        ids = changes.rows.get("tasks")
+        if changes.full or not ids:
+            self.action_list_tasks()
+            return
+        table = self.query_one("#task_table", DataTable)
+        tasks = {task.id: task for task in self.task_manager.get_tasks() if task.id in ids}
+        for task_id in sorted(ids):
+            key = str(task_id)
+            task = tasks.get(task_id)
+            if key in table.rows:
+                if task is None:
+                    table.remove_row(key)
+                else:
+                    for (column, _, _), value in zip(self.TASK_COLUMNS, self.task_cells(task)):
+                        table.update_cell(key, column, value)
+            elif task is not None:
+                if task.recurring:
+                    # Les récurrentes sont en tête de liste : on reconstruit le tableau
+                    self.action_list_tasks()
+                    return
+                table.add_row(*self.task_cells(task), key=key)
+        self.update_content(f"📝 {len(ids)} task(s) changed in another session")
+    
+    def action_search(self) -> None:
+        """Focus the search box"""
+        self.query_one("#search_box", Input).focus()
+    
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Search as you type (FTS5 index, ranked results)"""
+        if event.input.id != "search_box":
+            return
+        query = event.value.strip()
+        if query:
+            self.show_search_results(query)
+    
+    def show_search_results(self, query: str) -> None:
+        """Show ranked search results in the table"""
+        table = self.query_one("#task_table", DataTable)
+        table.clear(columns=True)
+        
+        self.show_week_grid(False)
+        self.view = "search"
+        self.search_query = query
+        
+        table.add_column("Type", width=8)
+        table.add_column("ID", width=5)
+        table.add_column("Title", width=24)
+        table.add_column("Details", width=22)
+        
+        results = self.task_manager.search(query)
+        for result in results:
+            icon = {"task": "📝", "archive": "🗄️", "project": "📊"}[result.kind]
+            table.add_row(icon, str(result.id), result.title[:24], result.detail[:22])
+        
+        self.update_content(f"🔍 {len(results)} result(s) for '{query}'")
+    
     def action_schedule(self) -> None:
         """Auto-schedule tasks"""
         self.planner.auto_schedule()
         self.update_content("🔄 Auto-scheduling completed!")
+        self.refresh_planning()
     
     def action_planning(self) -> None:
-        """Show detailed weekly planning - optimized for TUI"""
-        content = self.planner.get_compact_schedule_content()
-        self.update_content(content)
+        """Show the weekly planning grid (full 24h, scrollable)"""
+        self.show_week_grid(True)
+        self.view = "planning"
+        self.refresh_planning()
+        self.update_content("Nav: Next Week (n) | Prev Week (b) | Resource (r) | scroll for 0h-23h")
+    
+    def show_week_grid(self, visible: bool) -> None:
+        """Switch the main area between the week grid and the task table"""
+        self.query_one("#week_grid", WeekGridView).display = visible
+        self.query_one("#grid_summary", Static).display = visible
+        self.query_one("#task_table", DataTable).display = not visible
+    
+    def refresh_planning(self) -> None:
+        """Push a fresh WeekGrid to the grid widget, which repaints only changed cells"""
+        grid_view = self.query_one("#week_grid", WeekGridView)
+        if not grid_view.display:
+            # Garde les semaines voisines prêtes pour le prochain affichage
+            self.planner.prefetch_weeks()
+            return
+        
+        grid = self.planner.week_grid()
+        grid_view.grid = grid
+        
+        week_start = grid.week_dates[0].strftime("%d/%m")
+        week_end = grid.week_dates[6].strftime("%d/%m")
+        offset = self.planner.current_week_offset
+        if offset == 0:
+            label = "Current week"
+        else:
+            label = f"{offset:+d} week"
+        
+        summary = " | ".join(f"{title}: {hours}h" for title, hours in grid.hours_by_title().items())
+        if self.planner.resource_id is not ANY_RESOURCE:
+            label += f", {self.planner.resource_label()}"
+        self.query_one("#grid_summary", Static).update(
+            f"📅 SCHEDULE ({week_start} - {week_end}) ({label})\n"
+            f"📋 {summary or 'No scheduled tasks for this week.'}"
+        )
     
     def action_next_week(self) -> None:
         """Show next week"""
@@ -154,25 +298,29 @@ class PlanItTUI(App):
         self.planner.prev_week()
         self.action_planning()
     
+    def action_next_resource(self) -> None:
+        """Cycle the planning through everyone, then each resource's calendar"""
+        views = [ANY_RESOURCE] + [resource.id for resource in self.task_manager.get_resources()]
+        current = views.index(self.planner.resource_id) if self.planner.resource_id in views else 0
+        self.planner.set_resource(views[(current + 1) % len(views)])
+        self.action_planning()
+    
     def action_add_project(self) -> None:
         """Add a new project"""
         self.push_screen(AddProjectModal())
     
     def action_timeline(self) -> None:
         """Show compact project timeline"""
+        self.show_week_grid(False)
+        self.view = "timeline"
         content = "📈 PROJECT TIMELINE\n\n"
         
-        conn = sqlite3.connect(self.task_manager.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, name, start_date, end_date, description
-            FROM projects
-            ORDER BY start_date ASC
-        ''')
-        projects = cursor.fetchall()
-        conn.close()
+        projects = self.task_manager.get_projects()
         
         if projects:
+            # Done/planned hours of every project in one grouped query
+            progress = self.task_manager.project_progress()
+            
             # Generate compact month headers (2 months only for TUI)
             current_date = datetime.now().date()
             months = []
@@ -187,22 +335,25 @@ class PlanItTUI(App):
                 months.append(month_date)
             
             # Compact header
-            content += "ID|Project Name   |"
+            content += "ID|Project Name   |Done/Plan |"
             for month in months:
                 month_name = month.strftime("%b")
                 content += f"{month_name:4}|"
             content += "\n"
-            content += "--|---------------|"
+            content += "--|---------------|----------|"
             for _ in months:
                 content += "----|"
             content += "\n"
             
             # Projects with compact bars
             current_year = datetime.now().year
-            for project_id, name, start_str, end_str, desc in projects[:8]:  # Limit to 8 projects
+            for project in projects[:8]:  # Limit to 8 projects
+                project_id, name = project.id, project.name
                 try:
-                    start_month, start_day = map(int, start_str.split('/'))
-                    end_month, end_day = map(int, end_str.split('/'))
+                    if project.start is None or project.end is None:
+                        raise ValueError
+                    start_month, start_day = project.start
+                    end_month, end_day = project.end
                     
                     start_date = datetime(current_year, start_month, start_day).date()
                     end_date = datetime(current_year, end_month, end_day).date()
@@ -210,16 +361,14 @@ class PlanItTUI(App):
                     if end_date < start_date:
                         end_date = datetime(current_year + 1, end_month, end_day).date()
                     
-                    line = f"{project_id:2}|{name[:15]:15}|"
+                    line = f"{project_id:2}|{name[:15]:15}|{progress.get(project_id, NO_PROGRESS).label:10}|"
                     
                     for month in months:
                         month_start = month
                         if month.month == 12:
-                            month_end = month.replace(year=month.year + 1, month=1, day=1)
-                            month_end = month_end.replace(day=month_end.day - 1)
+                            month_end = month.replace(year=month.year + 1, month=1, day=1) - timedelta(days=1)
                         else:
-                            month_end = month.replace(month=month.month + 1, day=1)
-                            month_end = month_end.replace(day=month_end.day - 1)
+                            month_end = month.replace(month=month.month + 1, day=1) - timedelta(days=1)
                         
                         if start_date <= month_end and end_date >= month_start:
                             line += "████|"
@@ -242,6 +391,30 @@ class PlanItTUI(App):
         content += "\n\nControls: j=Add Project"
         self.update_content(content)
     
+    def action_stats(self) -> None:
+        """Show workload statistics for the displayed week"""
+        self.show_week_grid(False)
+        self.view = "stats"
+        self.query_one("#task_table", DataTable).clear(columns=True)
+        summary = self.task_manager.task_summary()
+        
+        content = "📉 WORKLOAD STATISTICS\n\n"
+        content += f"Tasks: {summary.task_count} ({summary.done_count} done, {summary.completion_rate:.0%})\n"
+        content += f"Hours: {summary.total_hours}h ({summary.done_hours}h done)\n"
+        content += f"Unscheduled: {summary.backlog_count} task(s), {summary.backlog_hours}h\n\n"
+        
+        content += "Day      |Booked|Avail|Free|Load\n"
+        content += "---------|------|-----|----|----\n"
+        week_dates = self.planner.get_week_dates(self.planner.current_week_offset)
+        total_booked = total_available = 0
+        for day, booked, available in self.planner.week_load(week_dates):
+            load = f"{booked / available:.0%}" if available else "-"
+            content += f"{day.strftime('%a %d/%m')}|{booked:5}h|{available:4}h|{max(available - booked, 0):3}h|{load:>4}\n"
+            total_booked += booked
+            total_available += available
+        content += f"\n📊 Week: {total_booked}h booked / {total_available}h available"
+        self.update_content(content)
+    
     def action_delete_task(self) -> None:
         """Delete a task"""
         self.push_screen(DeleteTaskModal())
@@ -254,6 +427,7 @@ class PlanItTUI(App):
         """Reset schedule"""
         self.task_manager.reset_schedule()
         self.update_content("🔄 Schedule reset completed!")
+        self.refresh_planning()
     
     def action_go_back(self) -> None:
         """Go back to main interface"""
@@ -6,10 +6,6 @@ from textual.screen import ModalScreen
 from textual.containers import Container, Horizontal
 from textual.widgets import Button, Static, Label, Input
 from textual.app import ComposeResult
-from planit.core.database import TaskManager
-
-# Instance globale pour les modals
-planner = TaskManager()
 
 
 class AddTaskModal(ModalScreen):
@@ -37,8 +33,9 @@ class AddTaskModal(ModalScreen):
             try:
                 duration = int(duration_input.value)
                 if title and duration > 0:
-                    planner.add_task(title, duration)
+                    self.app.task_manager.add_task(title, duration)
                     self.app.update_content(f"✅ Task '{title}' added successfully!")
+                    self.app.refresh_planning()
                     self.dismiss()
                 else:
                     self.app.update_content("❌ Please enter valid title and duration")
@@ -71,8 +68,9 @@ class DeleteTaskModal(ModalScreen):
             
             try:
                 task_id = int(task_id_input.value)
-                planner.delete_task(task_id)
+                self.app.task_manager.delete_task(task_id)
                 self.app.update_content(f"🗑️ Task {task_id} deleted!")
+                self.app.refresh_planning()
                 self.dismiss()
             except ValueError:
                 self.app.update_content("❌ Task ID must be a number")
@@ -140,7 +138,7 @@ class AddProjectModal(ModalScreen):
                         raise ValueError(f"Invalid {label} date values")
                 
                 # CRITICAL: Call add_project, NOT add_task
-                planner.add_project(name, start_date, end_date, description)
+                self.app.task_manager.add_project(name, start_date, end_date, description)
                 self.app.update_content(f"📊 Project '{name}' added successfully! Use 'timeline' to see it.")
                 self.dismiss()
                 
@@ -173,8 +171,9 @@ class MarkDoneModal(ModalScreen):
             
             try:
                 task_id = int(task_id_input.value)
-                planner.complete_task(task_id)
+                self.app.task_manager.complete_task(task_id)
                 self.app.update_content(f"✅ Task {task_id} marked as done!")
+                self.app.refresh_planning()
                 self.dismiss()
             except ValueError:
                 self.app.update_content("❌ Task ID must be a number")
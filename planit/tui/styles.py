@@ -43,6 +43,21 @@ Button {
     scrollbar-gutter: stable;
 }
 
+#search_box {
+    margin: 0 0 1 0;
+}
+
+#grid_summary {
+    height: auto;
+    max-height: 4;
+    display: none;
+}
+
+.week-grid {
+    height: 2fr;
+    display: none;
+}
+
 /* Modal styles */
 AddTaskModal {
     align: center middle;
@@ -0,0 +1,153 @@
+"""
+Custom Textual widgets for PlanIt TUI
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from rich.segment import Segment
+from textual.geometry import Region, Size
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+from planit.core.models import DAY_NAMES, WeekGrid
+
+
+class WeekGridView(ScrollView):
+    """
+    Grille semaine (7 jours x 24h) rendue ligne par ligne
+
+    La WeekGrid est un état réactif : à chaque nouvelle grille, seules les
+    cellules modifiées sont invalidées et redessinées. L'en-tête des jours
+    reste fixe pendant le défilement vertical.
+    """
+
+    COMPONENT_CLASSES = {
+        "week-grid--header",
+        "week-grid--time",
+        "week-grid--busy",
+        "week-grid--free",
+        "week-grid--today",
+    }
+
+    DEFAULT_CSS = """
+    WeekGridView {
+        height: 1fr;
+    }
+    WeekGridView > .week-grid--header {
+        text-style: bold;
+        color: $accent;
+    }
+    WeekGridView > .week-grid--time {
+        color: $text-muted;
+    }
+    WeekGridView > .week-grid--busy {
+        background: $primary 40%;
+        color: $text;
+    }
+    WeekGridView > .week-grid--free {
+        color: $text-muted;
+    }
+    WeekGridView > .week-grid--today {
+        text-style: bold reverse;
+    }
+    """
+
+    TIME_WIDTH = 6
+    CELL_WIDTH = 12
+    HEADER_HEIGHT = 1
+    # Heure affichée en haut à l'ouverture
+    FIRST_VISIBLE_HOUR = 8
+
+    grid: reactive[Optional[WeekGrid]] = reactive(None, repaint=False, layout=False)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._line_cache: Dict[int, Strip] = {}
+        self.virtual_size = Size(self.TIME_WIDTH + 7 * self.CELL_WIDTH, self.HEADER_HEIGHT + 24)
+
+    def on_mount(self) -> None:
+        self.scroll_to(y=self.FIRST_VISIBLE_HOUR, animate=False)
+
+    def watch_grid(self, old: Optional[WeekGrid], new: Optional[WeekGrid]) -> None:
+        """Invalide uniquement ce qui a changé entre deux grilles"""
+        if new is None:
+            return
+        if old is None:
+            self._line_cache.clear()
+            self.refresh()
+            return
+
+        regions = []
+        if old.week_dates != new.week_dates:
+            # En-tête (dates) : une seule ligne
+            self._line_cache.pop(-1, None)
+            regions.append(Region(0, 0, self.size.width, self.HEADER_HEIGHT))
+
+        for day, hour in new.changed_cells(old):
+            self._line_cache.pop(hour, None)
+            region = self._cell_region(day, hour)
+            if region is not None:
+                regions.append(region)
+
+        if regions:
+            self.refresh(*regions)
+
+    def _cell_region(self, day: int, hour: int) -> Optional[Region]:
+        """Zone de la cellule dans le widget, None si elle est hors de l'écran"""
+        scroll_x, scroll_y = self.scroll_offset
+        y = self.HEADER_HEIGHT + hour - scroll_y
+        if y < self.HEADER_HEIGHT or y >= self.size.height:
+            return None
+        x = self.TIME_WIDTH + day * self.CELL_WIDTH - scroll_x
+        return Region(x, y, self.CELL_WIDTH, 1)
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        if y < self.HEADER_HEIGHT:
+            key = -1
+        else:
+            key = y - self.HEADER_HEIGHT + scroll_y
+            if key >= 24:
+                return Strip.blank(self.size.width, self.rich_style)
+
+        strip = self._line_cache.get(key)
+        if strip is None:
+            strip = self._render_header() if key == -1 else self._render_hour(key)
+            self._line_cache[key] = strip
+        return strip.crop(scroll_x, scroll_x + self.size.width)
+
+    def _render_header(self) -> Strip:
+        header_style = self.get_component_rich_style("week-grid--header")
+        today_style = self.get_component_rich_style("week-grid--today")
+        today = datetime.now().date()
+        segments = [Segment(" " * self.TIME_WIDTH, header_style)]
+        for day, day_name in enumerate(DAY_NAMES):
+            label = day_name[:3]
+            if self.grid is not None:
+                day_date = self.grid.week_dates[day]
+                label = f"{label} {day_date.strftime('%d/%m')}"
+                style = today_style if day_date == today else header_style
+            else:
+                style = header_style
+            segments.append(Segment(f"{label:{self.CELL_WIDTH}}"[:self.CELL_WIDTH], style))
+        return Strip(segments)
+
+    def _render_hour(self, hour: int) -> Strip:
+        time_style = self.get_component_rich_style("week-grid--time")
+        busy_style = self.get_component_rich_style("week-grid--busy")
+        free_style = self.get_component_rich_style("week-grid--free")
+        cells = self.grid.cells if self.grid is not None else {}
+        segments = [Segment(f"{hour:2}h   ", time_style)]
+        for day in range(7):
+            title = cells.get((day, hour))
+            if title:
+                text = f"{title[:self.CELL_WIDTH - 1]:{self.CELL_WIDTH - 1}} "
+                segments.append(Segment(text, busy_style))
+            else:
+                segments.append(Segment(f"{'·':{self.CELL_WIDTH}}", free_style))
+        return Strip(segments)
+
+    def on_resize(self) -> None:
+        self._line_cache.clear()
@@ -48,6 +48,10 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        # Moteur vectorisé du planificateur (schedule --backend numpy)
+        "numpy": ["numpy>=1.22"],
+    },
     entry_points={
         "console_scripts": [
             "planit=main:main",
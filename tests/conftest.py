@@ -0,0 +1,27 @@
+"""
+Shared fixtures for the PlanIt test suite
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from planit.core.database import TaskManager
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Base vide dans un répertoire temporaire (aussi répertoire courant)"""
+    monkeypatch.chdir(tmp_path)
+    return os.path.join(tmp_path, "planit.db")
+
+
+@pytest.fixture
+def manager(db_path):
+    task_manager = TaskManager(db_path)
+    yield task_manager
+    task_manager.close()
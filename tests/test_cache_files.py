@@ -0,0 +1,29 @@
+"""
+On-disk caches get ordinary file permissions, not mkstemp's 0600
+"""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from planit.core.atomicfile import FILE_MODE
+from planit.core.columnar import write_snapshot
+from planit.core.rendercache import RenderCache
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+
+
+def test_columnar_snapshot_mode(manager, tmp_path):
+    manager.add_task("A", 1)
+    path = os.path.join(tmp_path, "snapshot.col")
+    write_snapshot(path, manager.snapshot(), 1)
+    assert stat.S_IMODE(os.stat(path).st_mode) == FILE_MODE
+
+
+def test_render_cache_mode(manager, tmp_path):
+    cache = RenderCache(manager.conn, manager._lock, os.path.join(tmp_path, "views"), None)
+    path = os.path.join(cache.directory, "list.txt")
+    cache._store(path, "token", "output")
+    assert stat.S_IMODE(os.stat(path).st_mode) == FILE_MODE
@@ -0,0 +1,79 @@
+"""
+Several sessions on one database: optimistic updates, concurrent scheduling
+"""
+
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+from planit.core.database import TaskManager
+
+ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+def _sessions(code: str, count: int, cwd):
+    """Lance count processus en même temps et attend qu'ils se terminent"""
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", f"import sys; sys.path.insert(0, {ROOT!r}); {code}"],
+            cwd=cwd, stdout=subprocess.DEVNULL,
+        )
+        for _ in range(count)
+    ]
+    return [process.wait(timeout=120) for process in processes]
+
+
+def test_stale_version_is_rejected(db_path):
+    first, second = TaskManager(db_path), TaskManager(db_path)
+    first.add_task("Shared", 1)
+    version = second.get_tasks()[0].version
+
+    assert first.update_task(1, version, duration=2)
+    assert not second.update_task(1, version, duration=5)
+    assert second.get_tasks()[0].duration == 2
+    first.close()
+    second.close()
+
+
+def test_no_lost_update_across_processes(db_path, tmp_path):
+    manager = TaskManager(db_path)
+    manager.add_task("Counter", 0)
+    manager.close()
+
+    increments = (
+        f"from planit.core.database import TaskManager\n"
+        f"m = TaskManager({db_path!r})\n"
+        "for _ in range(25):\n"
+        "    while True:\n"
+        "        value, version = m.conn.execute('SELECT duration, version FROM tasks WHERE id = 1').fetchone()\n"
+        "        if m.update_task(1, version, duration=value + 1): break\n"
+        "m.close()"
+    )
+    assert _sessions(increments, 4, tmp_path) == [0] * 4
+
+    manager = TaskManager(db_path)
+    assert manager.get_tasks()[0].duration == 100
+    manager.close()
+
+
+def test_concurrent_schedule_never_double_books(db_path, tmp_path):
+    manager = TaskManager(db_path)
+    for index in range(30):
+        manager.add_task(f"Task {index}", 1 + index % 3)
+    manager.close()
+
+    schedule = (
+        f"from planit.core.database import TaskManager; from planit.core.planner import PlanningEngine\n"
+        f"m = TaskManager({db_path!r}); PlanningEngine(m).auto_schedule(); m.close()"
+    )
+    assert _sessions(schedule, 4, tmp_path) == [0] * 4
+
+    manager = TaskManager(db_path)
+    tasks = manager.get_tasks()
+    assert all(task.scheduled_time for task in tasks)
+    hours = Counter(
+        (task.scheduled_date, hour) for task in tasks for hour in range(task.start_hour, task.end_hour)
+    )
+    assert max(hours.values()) == 1
+    manager.close()
@@ -0,0 +1,82 @@
+"""
+Dependencies in the planner and the rebalancer
+"""
+
+from datetime import timedelta
+
+from planit.core.intervals import to_slot
+from planit.core.models import format_scheduled_time
+from planit.core.planner import PlanningEngine
+
+
+def _place(manager, task_id, day, start, end):
+    with manager.transaction() as cursor:
+        cursor.execute("UPDATE tasks SET scheduled_time = ? WHERE id = ?", (format_scheduled_time(day, start, end), task_id))
+
+
+def _positions(manager, engine):
+    """Heure absolue (début, fin) de chaque tâche datée de l'horizon"""
+    _search_start, first_monday = engine._horizon()
+    positions = {}
+    for task in manager.snapshot().tasks:
+        for week in range(engine.SCHEDULE_HORIZON_WEEKS):
+            week_dates = engine.get_week_dates_from(first_monday + timedelta(weeks=week))
+            days = task.days_in_week(week_dates)
+            if days:
+                positions[task.id] = (to_slot(week_dates[days[0]], task.start_hour), to_slot(week_dates[days[0]], task.end_hour))
+                break
+    return positions
+
+
+def test_failure_behind_prerequisite_does_not_block_other_tasks(manager):
+    engine = PlanningEngine(manager)
+    _search_start, first_monday = engine._horizon()
+    last_friday = first_monday + timedelta(weeks=engine.SCHEDULE_HORIZON_WEEKS - 1, days=4)
+
+    manager.add_task("Late", 1)
+    _place(manager, 1, last_friday, 17, 18)
+    manager.add_task("B", 1, after=[1])
+    manager.add_task("C", 1)
+
+    plan = engine.plan()
+    assert [placement.task.title for placement in plan.placements] == ["C"]
+    assert [task.title for task in plan.unplaced] == ["B"]
+
+
+def test_rebalance_keeps_dependency_order(manager):
+    engine = PlanningEngine(manager)
+    _search_start, first_monday = engine._horizon()
+    monday = first_monday + timedelta(weeks=1)
+
+    # Une chaîne de 8 tâches entassée sur un seul jour : le recuit veut l'étaler
+    for hour in range(9, 17):
+        manager.add_task(f"Step {hour}", 1, after=[hour - 9] if hour > 9 else None)
+        _place(manager, hour - 8, monday, hour, hour + 1)
+
+    engine.rebalance(seconds=0.3, seed=1)
+
+    positions = _positions(manager, engine)
+    assert len({start // 24 for start, _end in positions.values()}) > 1
+    for task_id, required in manager.snapshot().prerequisites.items():
+        for prerequisite in required:
+            assert positions[prerequisite][1] <= positions[task_id][0]
+
+
+def test_rebalance_respects_fixed_prerequisite(manager):
+    engine = PlanningEngine(manager)
+    _search_start, first_monday = engine._horizon()
+    monday = first_monday + timedelta(weeks=1)
+
+    # Prérequis dans un autre calendrier : ne bouge pas, mais borne sa suite
+    manager.add_resource("alice")
+    manager.add_task("Design", 2, resource_id=1)
+    _place(manager, 1, monday + timedelta(days=2), 9, 11)
+    for index in range(6):
+        manager.add_task(f"Build {index}", 1, after=[1])
+        _place(manager, index + 2, monday + timedelta(days=3), 9 + index, 10 + index)
+
+    engine.rebalance(seconds=0.3, seed=2)
+
+    positions = _positions(manager, engine)
+    for task_id in range(2, 8):
+        assert positions[task_id][0] >= positions[1][1]
@@ -0,0 +1,102 @@
+"""
+iCalendar import: time zones converted to local time, re-import is a no-op
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from planit.core.database import TaskManager
+from planit.core.icalendar import event_row, parse_events
+
+
+@pytest.fixture
+def local_utc(monkeypatch):
+    """Heure locale = UTC pendant le test"""
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset unavailable")
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _rows(*lines):
+    timezones = {}
+    return [event_row(event, {}, timezones)[0] for event in parse_events(list(lines), timezones)]
+
+
+def _event(uid, start, end, *extra):
+    return ["BEGIN:VEVENT", f"UID:{uid}", start, end, "SUMMARY:Meeting", *extra, "END:VEVENT"]
+
+
+def test_utc_and_tzid_are_converted(local_utc):
+    rows = _rows(
+        *_event("utc", "DTSTART:20261020T090000Z", "DTEND:20261020T100000Z"),
+        *_event("paris", "DTSTART;TZID=Europe/Paris:20261020T150000", "DTEND;TZID=Europe/Paris:20261020T170000"),
+        *_event("windows", "DTSTART;TZID=\"Eastern Standard Time\":20261020T090000", "DTEND;TZID=Eastern Standard Time:20261020T100000"),
+        *_event("floating", "DTSTART:20261020T090000", "DTEND:20261020T100000"),
+    )
+    assert [row[3] for row in rows] == [
+        "Tuesday 20/10 9h-10h", "Tuesday 20/10 13h-15h", "Tuesday 20/10 13h-14h", "Tuesday 20/10 9h-10h",
+    ]
+
+
+def test_vtimezone_of_the_file_is_used(local_utc):
+    rows = _rows(
+        "BEGIN:VCALENDAR",
+        "BEGIN:VTIMEZONE", "TZID:Office time",
+        "BEGIN:STANDARD", "DTSTART:19700101T000000", "TZOFFSETFROM:+0300", "TZOFFSETTO:+0300", "END:STANDARD",
+        "END:VTIMEZONE",
+        *_event("custom", "DTSTART;TZID=Office time:20261020T120000", "DTEND;TZID=Office time:20261020T130000"),
+        "END:VCALENDAR",
+    )
+    assert rows[0][3] == "Tuesday 20/10 9h-10h"
+
+
+def test_weekly_rule_follows_the_day_change(local_utc):
+    rows = _rows(*_event(
+        "weekly", "DTSTART;TZID=Asia/Tokyo:20261020T070000", "DTEND;TZID=Asia/Tokyo:20261020T080000",
+        "RRULE:FREQ=WEEKLY;BYDAY=TU,FR",
+    ))
+    # 7h à Tokyo le mardi = 22h UTC le lundi
+    assert rows[0][5:7] == ("mon,thu", "22-23")
+
+
+def test_reimport_does_not_consume_ids(manager, tmp_path):
+    path = tmp_path / "calendar.ics"
+    path.write_text("\r\n".join(
+        ["BEGIN:VCALENDAR"]
+        + _event("a@test", "DTSTART:20261020T090000", "DTEND:20261020T100000")
+        + _event("b@test", "DTSTART:20261021T090000", "DTEND:20261021T100000")
+        + ["END:VCALENDAR", ""]
+    ))
+    for _ in range(3):
+        manager.import_ics(str(path))
+    manager.add_task("After", 1)
+
+    rows = list(sqlite3.connect(manager.db_path).execute("SELECT id, title FROM tasks ORDER BY id"))
+    assert rows == [(1, "Meeting"), (2, "Meeting"), (3, "After")]
+
+
+def test_reimporting_own_export_adds_nothing(manager, tmp_path):
+    manager.add_task("Live", 1, manual_schedule="9h-10h", manual_date="Tuesday 20/10")
+    manager.add_task("Weekly", 1, recurring=True, recurring_days="mon", recurring_hours="8-9")
+    manager.add_task("Archived", 1, manual_schedule="11h-12h", manual_date="Monday 19/10")
+    with manager.transaction() as cursor:
+        cursor.execute("UPDATE tasks SET completed = TRUE, completed_at = '2020-01-01' WHERE id = 3")
+    manager.maintain(days=30)
+    path = str(tmp_path / "out.ics")
+    assert manager.export_ics(path) == 3
+
+    manager.import_ics(path)
+    assert [task.title for task in manager.get_tasks()] == ["Live", "Weekly"]
+
+    # Dans une autre base, les mêmes UIDs sont des événements étrangers
+    other = TaskManager(str(tmp_path / "other.db"))
+    other.import_ics(path)
+    other.import_ics(path)
+    assert sorted(task.title for task in other.get_tasks()) == ["Archived", "Live", "Weekly"]
+    other.close()
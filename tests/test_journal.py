@@ -0,0 +1,112 @@
+"""
+Per-session write journals: recovery after a crash, never from a live session
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+from planit.core.database import TaskManager
+
+ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+def _python(code: str, cwd):
+    return subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {ROOT!r}); {code}"], cwd=cwd, timeout=60)
+
+
+def _titles(db_path):
+    return [row[0] for row in sqlite3.connect(db_path).execute("SELECT title FROM tasks ORDER BY id")]
+
+
+def test_live_batch_is_not_replayed_by_another_session(db_path, tmp_path):
+    manager = TaskManager(db_path)
+    manager.begin_batch(max_writes=100, max_delay=60)
+    manager.add_task("interactive-task", 1)
+
+    # Une autre session démarre pendant que le batch est ouvert
+    _python(f"from planit.core.database import TaskManager; TaskManager({db_path!r}).close()", tmp_path)
+    manager.close()
+
+    assert _titles(db_path) == ["interactive-task"]
+
+
+def test_other_session_does_not_delete_live_journal(db_path, tmp_path):
+    manager = TaskManager(db_path)
+    manager.begin_batch(max_writes=100, max_delay=60)
+    manager.add_task("pending", 1)
+    journal = manager.journal.path
+
+    _python(f"from planit.core.database import TaskManager; TaskManager({db_path!r}).close()", tmp_path)
+
+    assert os.path.exists(journal)
+    manager.close()
+
+
+def test_crashed_session_is_recovered_once(db_path, tmp_path):
+    _python(
+        f"import os; from planit.core.database import TaskManager; m = TaskManager({db_path!r}); "
+        "m.begin_batch(max_writes=100, max_delay=60); m.add_task('crash-task', 1); os._exit(1)",
+        tmp_path,
+    )
+    TaskManager(db_path).close()
+    TaskManager(db_path).close()
+
+    assert _titles(db_path) == ["crash-task"]
+    assert not [name for name in os.listdir(tmp_path) if ".planit-journal" in name]
+
+
+def test_committed_entries_are_skipped(db_path):
+    # Crash entre le COMMIT et la suppression du journal : rien n'est rejoué
+    manager = TaskManager(db_path)
+    manager.begin_batch(max_writes=100, max_delay=60)
+    manager.add_task("committed", 1)
+    manager.flush()
+    with open(manager.journal.path, "w") as journal_file:
+        journal_file.write('{"seq": 1, "statements": [["INSERT INTO tasks (title, duration) VALUES (?, ?)", ["committed", 1]]]}\n')
+    dead = manager.journal.path.rsplit(".", 2)
+    os.rename(manager.journal.path, f"{dead[0]}.999999999.{dead[2]}")
+    manager.conn.execute(
+        "UPDATE journal_sessions SET name = ? WHERE name = ?",
+        (os.path.basename(f"{dead[0]}.999999999.{dead[2]}"), manager.journal.name),
+    )
+    manager.conn.close()
+
+    TaskManager(db_path).close()
+    assert _titles(db_path) == ["committed"]
+
+
+def _crash_after(db_path, tmp_path, operations):
+    _python(
+        f"import os; from planit.core.database import TaskManager; m = TaskManager({db_path!r}); "
+        f"m.begin_batch(max_writes=100, max_delay=60); {operations}; os._exit(1)",
+        tmp_path,
+    )
+
+
+def test_replay_never_targets_a_row_taken_meanwhile(db_path, tmp_path):
+    manager = TaskManager(db_path)
+    _crash_after(db_path, tmp_path, "m.add_task('mine', 1); m.add_task('next', 1, after=[1]); m.complete_task(1)")
+    # Avant la reprise, une session encore ouverte prend l'id 1
+    manager.add_task("other", 1)
+    manager.close()
+
+    recovering = TaskManager(db_path)
+    assert [(task.title, task.completed) for task in recovering.get_tasks()] == [("other", False)]
+    assert not recovering.snapshot().prerequisites
+    recovering.close()
+    assert [name for name in os.listdir(tmp_path) if ".planit-journal-rejected" in name]
+    TaskManager(db_path).close()
+    assert _titles(db_path) == ["other"]
+
+
+def test_replay_accepts_new_ids_nobody_refers_to(db_path, tmp_path):
+    manager = TaskManager(db_path)
+    _crash_after(db_path, tmp_path, "m.add_task('mine', 1)")
+    manager.add_task("other", 1)
+    manager.close()
+
+    TaskManager(db_path).close()
+    assert _titles(db_path) == ["other", "mine"]
@@ -0,0 +1,111 @@
+"""
+Schema migrations: legacy databases, partial upgrades, idempotent steps
+"""
+
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from planit.core import migrations
+from planit.core.database import TaskManager
+from planit.core.migrations import MIGRATIONS, SCHEMA_VERSION, migrate
+from planit.core.models import format_scheduled_time
+
+
+def _user_version(db_path):
+    return sqlite3.connect(db_path).execute("PRAGMA user_version").fetchone()[0]
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _schema(conn):
+    return sorted(conn.execute("SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"))
+
+
+def test_legacy_database_is_upgraded_in_place(db_path):
+    # Base d'avant les migrations : schéma d'origine, user_version = 0
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, duration INTEGER NOT NULL,
+            completed BOOLEAN DEFAULT FALSE, scheduled_time TEXT,
+            recurring BOOLEAN DEFAULT FALSE, recurring_days TEXT, recurring_hours TEXT
+        )
+    ''')
+    conn.execute("CREATE TABLE availability (day_of_week INTEGER, start_hour INTEGER, end_hour INTEGER)")
+    conn.execute("INSERT INTO availability VALUES (0, 8, 12)")
+    conn.execute("INSERT INTO tasks (title, duration) VALUES ('Old task', 2)")
+    conn.commit()
+    conn.close()
+
+    manager = TaskManager(db_path)
+    assert _user_version(db_path) == SCHEMA_VERSION
+    assert [(task.title, task.version, task.pinned) for task in manager.get_tasks()] == [("Old task", 0, False)]
+    # La disponibilité existante est gardée, sans disponibilité par défaut ajoutée
+    assert list(manager.conn.execute("SELECT day_of_week, start_hour, end_hour FROM availability")) == [(0, 8, 12)]
+    assert manager.task_summary().total_hours == 2
+    assert manager.search("Old")
+    manager.close()
+
+
+def test_every_step_is_idempotent(manager):
+    before = _schema(manager.conn)
+    availability = list(manager.conn.execute("SELECT * FROM availability"))
+    for _version, _description, step in MIGRATIONS:
+        with manager.transaction() as cursor:
+            step(cursor)
+    assert _schema(manager.conn) == before
+    assert list(manager.conn.execute("SELECT * FROM availability")) == availability
+
+
+def test_upgrade_from_v15_rebuilds_load(db_path):
+    monday = date.today() - timedelta(days=date.today().weekday())
+    manager = TaskManager(db_path)
+    manager.add_task("Done", 3)
+    with manager.transaction() as cursor:
+        cursor.execute("UPDATE tasks SET scheduled_time = ?, completed = TRUE WHERE id = 1", (format_scheduled_time(monday, 9, 12),))
+        # Résumé laissé par l'ancienne règle : une tâche faite comptait encore
+        cursor.execute("UPDATE daily_load SET hours = 3, done_hours = 0")
+    manager.conn.execute("PRAGMA user_version = 15")
+    manager.close()
+
+    manager = TaskManager(db_path)
+    assert _user_version(db_path) == SCHEMA_VERSION
+    assert manager.booked_hours([monday])[monday] == 0
+    manager.close()
+
+
+def test_failed_step_keeps_previous_version(db_path, monkeypatch):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+
+    def broken(cursor):
+        cursor.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("step failed")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS[:2] + [(3, "broken", broken)])
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", 3)
+    with pytest.raises(RuntimeError):
+        migrate(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 2
+    assert "half_done" not in {name for _type, name in _schema(conn)}
+
+    monkeypatch.undo()
+    migrate(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    conn.close()
+
+
+def test_newer_schema_is_left_alone(db_path, capsys):
+    TaskManager(db_path).close()
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    before = _schema(conn)
+
+    assert migrate(conn) == SCHEMA_VERSION + 1
+    assert "is newer than this PlanIt" in capsys.readouterr().out
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION + 1
+    assert _schema(conn) == before
+    conn.close()
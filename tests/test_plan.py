@@ -0,0 +1,83 @@
+"""
+Previewed plans: what is shown is what gets written once confirmed
+"""
+
+import pytest
+from typer.testing import CliRunner
+
+from planit.core.models import format_scheduled_time
+from planit.core.planner import PlanningEngine
+
+
+@pytest.fixture
+def cli(manager, monkeypatch):
+    """Module des commandes branché sur la base de test"""
+    from planit.cli import commands
+    engine = PlanningEngine(manager)
+    monkeypatch.setattr(commands, "planner", manager)
+    monkeypatch.setattr(commands, "engine", engine)
+    return commands
+
+
+def _scheduled(manager):
+    return {task.id: task.scheduled_time for task in manager.get_tasks()}
+
+
+def test_apply_writes_the_previewed_slots(manager):
+    engine = PlanningEngine(manager)
+    for index in range(3):
+        manager.add_task(f"T{index}", 2)
+
+    plan = engine.preview_plan()
+    assert _scheduled(manager) == {1: None, 2: None, 3: None}
+
+    assert engine.apply_plan(plan)
+    assert _scheduled(manager) == {placement.task.id: placement.scheduled_time for placement in plan.placements}
+
+
+def test_stale_plan_skips_slot_taken_meanwhile(manager):
+    engine = PlanningEngine(manager)
+    manager.add_task("A", 1)
+    manager.add_task("B", 1)
+    plan = engine.preview_plan()
+    first = plan.placements[0]
+
+    # Une autre écriture occupe le créneau prévu pour la première tâche
+    manager.add_task("Intruder", 1)
+    with manager.transaction() as cursor:
+        cursor.execute(
+            "UPDATE tasks SET scheduled_time = ? WHERE id = 3",
+            (format_scheduled_time(first.day, first.start_hour, first.end_hour),),
+        )
+
+    assert not engine.apply_plan(plan)
+    scheduled = _scheduled(manager)
+    assert scheduled[first.task.id] is None
+    assert scheduled[plan.placements[1].task.id] == plan.placements[1].scheduled_time
+
+
+def test_schedule_confirm_applies_only_when_accepted(cli):
+    cli.planner.add_task("A", 2)
+    runner = CliRunner()
+
+    result = runner.invoke(cli.app, ["schedule", "--confirm"], input="n\n")
+    assert result.exit_code == 0
+    assert _scheduled(cli.planner) == {1: None}
+
+    result = runner.invoke(cli.app, ["schedule", "--confirm"], input="y\n")
+    assert result.exit_code == 0
+    assert _scheduled(cli.planner)[1] is not None
+
+
+def test_compare_confirm_applies_the_chosen_strategy(cli):
+    for index in range(3):
+        cli.planner.add_task(f"T{index}", index + 1)
+    plans = cli.engine.compare_strategies()
+
+    result = CliRunner().invoke(cli.app, ["schedule", "--compare", "--confirm"], input="longest-first\n")
+    assert result.exit_code == 0
+    assert _scheduled(cli.planner) == {placement.task.id: placement.scheduled_time for placement in plans["longest-first"].placements}
+
+    cli.planner.add_task("Later", 1)
+    result = CliRunner().invoke(cli.app, ["schedule", "--compare", "--confirm"], input="nope\n")
+    assert result.exit_code == 1
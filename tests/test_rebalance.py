@@ -0,0 +1,47 @@
+"""
+Rebalancer: load evening without moving pinned (manually placed) tasks
+"""
+
+from datetime import timedelta
+
+from planit.core.models import format_scheduled_time
+from planit.core.planner import PlanningEngine
+
+
+def test_manual_task_is_pinned_and_not_moved(manager):
+    engine = PlanningEngine(manager)
+    _search_start, first_monday = engine._horizon()
+    wednesday = first_monday + timedelta(weeks=1, days=2)
+
+    manager.add_task("Meeting", 2, manual_schedule="10h-12h", manual_date=f"Wednesday {wednesday.strftime('%d/%m')}")
+    # Journée surchargée autour de la réunion : le recuit veut la vider
+    for hour in (9, 12, 13, 14, 15, 16):
+        manager.add_task(f"Work {hour}", 1)
+        with manager.transaction() as cursor:
+            cursor.execute(
+                "UPDATE tasks SET scheduled_time = ? WHERE title = ?",
+                (format_scheduled_time(wednesday, hour, hour + 1), f"Work {hour}"),
+            )
+    meeting = manager.get_tasks()[0]
+    assert meeting.pinned
+
+    engine.rebalance(seconds=0.3, seed=3)
+
+    tasks = {task.title: task for task in manager.get_tasks()}
+    assert tasks["Meeting"].scheduled_time == meeting.scheduled_time
+    assert any(task.scheduled_time != format_scheduled_time(wednesday, int(title.split()[1]), int(title.split()[1]) + 1)
+               for title, task in tasks.items() if title.startswith("Work"))
+
+
+def test_auto_scheduled_tasks_are_not_pinned(manager):
+    engine = PlanningEngine(manager)
+    manager.add_task("Backlog", 1)
+    engine.auto_schedule()
+    task = manager.get_tasks()[0]
+    assert task.scheduled_time is not None and not task.pinned
+
+
+def test_reset_unpins(manager):
+    manager.add_task("Meeting", 1, manual_schedule="10h-11h", manual_date="Wednesday 21/10")
+    manager.reset_schedule()
+    assert not manager.get_tasks()[0].pinned
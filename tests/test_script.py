@@ -0,0 +1,50 @@
+"""
+Command scripts: failures come from exit codes, each step starts from a fresh view
+"""
+
+import pytest
+
+from planit.core.planner import PlanningEngine
+
+
+@pytest.fixture
+def cli(manager, monkeypatch):
+    """Module des commandes branché sur la base de test"""
+    from planit.cli import commands
+    engine = PlanningEngine(manager)
+    monkeypatch.setattr(commands, "planner", manager)
+    monkeypatch.setattr(commands, "engine", engine)
+    return commands
+
+
+def _run(cli, text, **options):
+    from planit.cli.script import parse_script, run_script
+    return run_script(cli.app, cli.planner, cli.engine, parse_script(text), **options)
+
+
+def test_error_like_titles_are_not_failures(cli):
+    results = _run(cli, 'add "Error log review" -d 1\nadd "✗ marks" -d 1\nlist\nsearch Error')
+    assert [result.ok for result in results] == [True] * 4
+
+
+def test_failed_command_stops_the_script(cli):
+    results = _run(cli, 'add "A" -d 1\ndone 99\nadd "B" -d 1')
+    assert [result.ok for result in results] == [True, False]
+    assert [task.title for task in cli.planner.get_tasks()] == ["A"]
+
+
+def test_atomic_failure_rolls_back(cli):
+    results = _run(cli, 'add "A" -d 1\ndelete 42', atomic=True)
+    assert [result.ok for result in results] == [True, False]
+    assert cli.planner.get_tasks() == []
+
+
+def test_navigation_does_not_leak_between_steps(cli, capsys):
+    cli.planner.add_resource("alice")
+    capsys.readouterr()
+    _run(cli, "next\nplanning -R alice\nplanning")
+    output = capsys.readouterr().out.split("WEEKLY SCHEDULE")
+    assert "(+1 week)" in output[1]
+    assert "(Current week)" in output[2] and "Resource: alice" in output[2]
+    assert "(Current week)" in output[3] and "Resource:" not in output[3]
+    assert cli.engine.current_week_offset == 0
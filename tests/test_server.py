@@ -0,0 +1,50 @@
+"""
+HTTP API: concurrent /week requests for different calendars
+"""
+
+import json
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from planit.api import PlanItAPI, PlanItServer
+from planit.core.models import format_scheduled_time
+from planit.core.planner import ANY_RESOURCE
+
+
+def test_concurrent_week_requests_keep_their_resource(manager):
+    manager.add_resource("alice")
+    manager.add_resource("bob")
+    api = PlanItAPI(manager)
+    monday = api.engine.get_week_dates(0)[0]
+    for index, name in enumerate(("alice", "bob")):
+        manager.add_task(f"{name} task", 1, resource_id=index + 1)
+        with manager.transaction() as cursor:
+            cursor.execute(
+                "UPDATE tasks SET scheduled_time = ? WHERE id = ?",
+                (format_scheduled_time(monday + timedelta(days=index), 9, 10), index + 1),
+            )
+
+    server = PlanItServer(("127.0.0.1", 0), api)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+
+    def fetch(name, offset):
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/week?resource={name}&offset={offset}") as response:
+            return name, offset, json.loads(response.read())
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda args: fetch(*args), [(name, offset) for offset in range(-3, 4) for name in ("alice", "bob")] * 3))
+    finally:
+        server.shutdown()
+        server.server_close()
+        api.engine.close()
+
+    for name, offset, body in results:
+        assert body["resource"] == name
+        titles = {slot["title"] for day in body["days"] for slot in day["slots"]}
+        assert titles == ({f"{name} task"} if offset == 0 else set())
+    assert api.engine.resource_id is ANY_RESOURCE
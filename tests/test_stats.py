@@ -0,0 +1,54 @@
+"""
+Workload summaries: one done-task rule for dated and weekly load
+"""
+
+from datetime import date, timedelta
+
+from planit.core import stats
+from planit.core.models import format_scheduled_time
+
+
+def _summaries(manager):
+    # Une date revenue à zéro garde sa ligne dans daily_load : même contenu
+    return [
+        list(manager.conn.execute("SELECT * FROM task_summary")),
+        list(manager.conn.execute("SELECT * FROM daily_load WHERE hours OR done_hours ORDER BY day_key")),
+        list(manager.conn.execute("SELECT * FROM weekday_load ORDER BY day_of_week")),
+    ]
+
+
+def test_done_tasks_leave_both_loads(manager):
+    monday = date.today() - timedelta(days=date.today().weekday())
+    manager.add_task("Dated", 3)
+    with manager.transaction() as cursor:
+        cursor.execute("UPDATE tasks SET scheduled_time = ? WHERE id = 1", (format_scheduled_time(monday, 9, 12),))
+    manager.add_task("Weekly", 2, recurring=True, recurring_days="mon", recurring_hours="14-16")
+    assert manager.booked_hours([monday])[monday] == 5
+
+    manager.complete_task(1)
+    manager.complete_task(2)
+    assert manager.booked_hours([monday])[monday] == 0
+
+    with manager.transaction() as cursor:
+        cursor.execute("UPDATE tasks SET completed = FALSE WHERE id = 1")
+    assert manager.booked_hours([monday])[monday] == 3
+
+
+def test_triggers_match_a_full_rebuild(manager):
+    monday = date.today() - timedelta(days=date.today().weekday())
+    for index in range(6):
+        manager.add_task(f"Task {index}", index + 1)
+        with manager.transaction() as cursor:
+            cursor.execute(
+                "UPDATE tasks SET scheduled_time = ? WHERE id = ?",
+                (format_scheduled_time(monday + timedelta(days=index), 8, 9 + index), index + 1),
+            )
+    manager.add_task("Daily", 1, recurring=True, recurring_days="daily", recurring_hours="7-8")
+    for task_id in (2, 5, 7):
+        manager.complete_task(task_id)
+    manager.delete_task(3)
+
+    maintained = _summaries(manager)
+    with manager.transaction() as cursor:
+        stats.rebuild_stats(cursor)
+    assert _summaries(manager) == maintained
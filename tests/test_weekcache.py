@@ -0,0 +1,103 @@
+"""
+Week grid cache: grids never leak from one calendar to another
+"""
+
+import threading
+from datetime import timedelta
+
+from planit.core.models import format_scheduled_time
+from planit.core.planner import ANY_RESOURCE, PlanningEngine
+from planit.core.weekcache import WeekCache
+
+
+def test_prefetch_for_previous_resource_is_not_served(manager):
+    manager.add_resource("alice")
+    manager.add_task("Shared", 2)
+    manager.add_task("Alice only", 2, resource_id=1)
+    monday = PlanningEngine(manager).get_week_dates(0)[0]
+    with manager.transaction() as cursor:
+        cursor.execute("UPDATE tasks SET scheduled_time = ? WHERE id = 1", (format_scheduled_time(monday, 9, 11),))
+        cursor.execute("UPDATE tasks SET scheduled_time = ? WHERE id = 2", (format_scheduled_time(monday + timedelta(days=1), 9, 11),))
+
+    engine = PlanningEngine(manager, prefetch=True)
+    engine.prefetch_weeks()
+    engine.set_resource(1)
+    assert set(engine.week_grid().cells.values()) == {"Alice only"}
+    engine.set_resource(ANY_RESOURCE)
+    assert set(engine.week_grid().cells.values()) == {"Shared", "Alice only"}
+    assert set(engine.week_grid(0, resource_id=1).cells.values()) == {"Alice only"}
+    engine.close()
+
+
+def test_computation_started_before_clear_is_dropped():
+    started, release = threading.Event(), threading.Event()
+
+    def build(key, snapshot):
+        if key == "a":
+            started.set()
+            release.wait(5)
+        return ("grid", key, snapshot)
+
+    cache = WeekCache(build)
+    snapshot = object()
+    cache.prefetch(snapshot, ["a"])
+    started.wait(5)
+    cache.clear()
+    # Même snapshot qu'avant clear() : seule la génération distingue le calcul périmé
+    cache.get(snapshot, "b")
+    release.set()
+    cache._executor.shutdown(wait=True)
+
+    assert cache.peek("a") is None
+    assert cache.peek("b") == ("grid", "b", snapshot)
+
+
+def test_one_shot_engine_starts_no_thread(manager):
+    engine = PlanningEngine(manager)
+    engine.week_grid()
+    engine.next_week()
+    assert engine.week_cache._executor is None
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("planit-prefetch")]
+
+
+def test_shutdown_cancels_queued_prefetches():
+    release = threading.Event()
+
+    def build(key, snapshot):
+        release.wait(5)
+        return key
+
+    cache = WeekCache(build)
+    snapshot = object()
+    cache.prefetch(snapshot, range(5))
+    executor = cache._executor
+    cache.shutdown()
+    release.set()
+    executor.shutdown(wait=True)
+
+    # Seul le calcul déjà commencé a tourné ; après shutdown, get() calcule lui-même
+    assert len(cache) <= 1
+    assert cache.get(snapshot, 3) == 3
+    cache.prefetch(snapshot, [7])
+    assert cache._executor is None
+
+
+def test_snapshot_lazy_fields_are_built_once(manager):
+    manager.add_resource("alice")
+    manager.add_task("A", 1)
+    manager.add_task("B", 1, after=[1])
+    snapshot = manager.snapshot()
+    barrier = threading.Barrier(8)
+    results = []
+
+    def read():
+        barrier.wait()
+        results.append((snapshot.prerequisites, snapshot.free_time, snapshot.free_time_of(1)))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({tuple(map(id, result)) for result in results}) == 1